@@ -8,9 +8,83 @@ class Settings(BaseSettings):
     secret_key: str = Field(..., alias="SECRET_KEY")
     algorithm: str = Field(..., alias="ALGORITHM")
     access_token_expire_minutes: int = Field(..., alias="ACCESS_TOKEN_EXPIRE_MINUTES")
+
+    # MongoDB connection pool and timeouts (per worker process)
+    mongo_max_pool_size: int = Field(100, alias="MONGO_MAX_POOL_SIZE")
+    mongo_min_pool_size: int = Field(0, alias="MONGO_MIN_POOL_SIZE")
+    mongo_max_idle_time_ms: Optional[int] = Field(60000, alias="MONGO_MAX_IDLE_TIME_MS")
+    mongo_wait_queue_timeout_ms: Optional[int] = Field(2000, alias="MONGO_WAIT_QUEUE_TIMEOUT_MS")  # fail fast when the pool is exhausted
+    mongo_server_selection_timeout_ms: int = Field(5000, alias="MONGO_SERVER_SELECTION_TIMEOUT_MS")
+    mongo_connect_timeout_ms: int = Field(5000, alias="MONGO_CONNECT_TIMEOUT_MS")
+    mongo_socket_timeout_ms: Optional[int] = Field(30000, alias="MONGO_SOCKET_TIMEOUT_MS")
+    mongo_compressors: str = Field("zstd,snappy,zlib", alias="MONGO_COMPRESSORS")  # preference order; unavailable ones are skipped
+    mongo_analytics_read_preference: str = Field("secondaryPreferred", alias="MONGO_ANALYTICS_READ_PREFERENCE")
+    mongo_analytics_max_staleness_seconds: Optional[int] = Field(None, alias="MONGO_ANALYTICS_MAX_STALENESS_SECONDS")  # >= 90 when set
+    mongo_require_connection: bool = Field(False, alias="MONGO_REQUIRE_CONNECTION")  # refuse to start if the ping fails
+
+    # Documents, users, suggestions and comments: mongo, memory (nothing persisted) or sqlite
+    storage_backend: str = Field("mongo", alias="STORAGE_BACKEND")
+    storage_url: str = Field("sqlite:///writeflow.db", alias="STORAGE_URL")  # SQLAlchemy URL for the sqlite backend; sqlite:// is in-memory
+
+    # Document bodies longer than the threshold are stored as separate chunks (characters)
+    content_chunk_threshold: int = Field(262144, alias="CONTENT_CHUNK_THRESHOLD")
+    content_chunk_chars: int = Field(65536, alias="CONTENT_CHUNK_CHARS")
+
+    # Compression of stored document bodies and suggestion explanations: zstd or none
+    content_codec: str = Field("zstd", alias="CONTENT_CODEC")
+    content_codec_level: int = Field(3, alias="CONTENT_CODEC_LEVEL")
+    content_codec_min_chars: int = Field(64, alias="CONTENT_CODEC_MIN_CHARS")  # shorter values are stored plain
+    content_dictionary_size: int = Field(65536, alias="CONTENT_DICTIONARY_SIZE")  # bytes, for `codec train`
+
     groq_api_key: Optional[str] = Field(None, alias="GROQ_API_KEY")
     groq_model_name: Optional[str] = Field(None, alias="GROQ_MODEL_NAME")
 
+    # LLM response cache
+    llm_cache_ttl_seconds: int = Field(86400, alias="LLM_CACHE_TTL_SECONDS")
+    llm_cache_max_entries: int = Field(1024, alias="LLM_CACHE_MAX_ENTRIES")
+    llm_cache_path: Optional[str] = Field(".cache/llm_cache.sqlite3", alias="LLM_CACHE_PATH")  # empty disables disk tier
+    llm_cache_disk_max_entries: int = Field(50000, alias="LLM_CACHE_DISK_MAX_ENTRIES")
+
+    # Chunked LLM analysis
+    llm_chunk_chars: int = Field(2000, alias="LLM_CHUNK_CHARS")
+    llm_max_chunks: int = Field(50, alias="LLM_MAX_CHUNKS")
+    llm_max_concurrency: int = Field(4, alias="LLM_MAX_CONCURRENCY")
+    llm_structured_output: bool = Field(True, alias="LLM_STRUCTURED_OUTPUT")  # JSON replies, streamed
+
+    # Priority scheduler (per-class concurrency and queue bounds)
+    scheduler_interactive_concurrency: int = Field(16, alias="SCHEDULER_INTERACTIVE_CONCURRENCY")
+    scheduler_background_concurrency: int = Field(2, alias="SCHEDULER_BACKGROUND_CONCURRENCY")
+    scheduler_bulk_concurrency: int = Field(1, alias="SCHEDULER_BULK_CONCURRENCY")
+    scheduler_max_queue: int = Field(64, alias="SCHEDULER_MAX_QUEUE")
+    scheduler_max_total_queue: int = Field(128, alias="SCHEDULER_MAX_TOTAL_QUEUE")
+
+    # Offline NLP resources (built with `python -m app.services.nlp_resources`)
+    nltk_data_dir: str = Field("nltk_data", alias="NLTK_DATA_DIR")  # relative to backend/
+    nlp_preflight_strict: bool = Field(False, alias="NLP_PREFLIGHT_STRICT")  # refuse to start without the bundle
+
+    # Related-document search
+    similarity_index_dir: str = Field(".cache/similarity", alias="SIMILARITY_INDEX_DIR")
+
+    # Admin accounts (comma-separated emails), e.g. for request profiles
+    admin_emails: str = Field("", alias="ADMIN_EMAILS")
+
+    # Opt-in request profiling: X-Profile header from admins, or a random sample of requests
+    profiling_sample_rate: float = Field(0.0, alias="PROFILING_SAMPLE_RATE")
+    profiling_interval_ms: float = Field(5.0, alias="PROFILING_INTERVAL_MS")  # CPU-bound code is sampled at most once per GIL switch interval (5 ms)
+    profiling_max_seconds: float = Field(30.0, alias="PROFILING_MAX_SECONDS")  # stop sampling long requests
+    profiling_retention_days: int = Field(7, alias="PROFILING_RETENTION_DAYS")
+
+    # HTTP response compression (brotli when installed, else gzip) and conditional GET
+    response_compression: bool = Field(True, alias="RESPONSE_COMPRESSION")
+    response_compression_min_bytes: int = Field(1024, alias="RESPONSE_COMPRESSION_MIN_BYTES")
+    response_gzip_level: int = Field(6, alias="RESPONSE_GZIP_LEVEL")
+    response_brotli_quality: int = Field(4, alias="RESPONSE_BROTLI_QUALITY")
+    analytics_etag_max_age_seconds: int = Field(300, alias="ANALYTICS_ETAG_MAX_AGE_SECONDS")  # plagiarism scores depend on other users' documents
+
+    # Change events for cache invalidation: local (this process) or mongo (shared between workers; needs a replica set)
+    event_bus_backend: str = Field("local", alias="EVENT_BUS_BACKEND")
+    events_ttl_seconds: int = Field(3600, alias="EVENTS_TTL_SECONDS")  # how far behind a reconnecting worker can catch up
+
     # mongodb_url: str = "mongodb://localhost:27017"
     # database_name: str = "writeflow_pro"
     # secret_key: str = "your-secret-key-change-this-in-production"
@@ -1,15 +1,23 @@
 # app/database.py
 
+import importlib.util
+from urllib.parse import parse_qs, urlsplit
 from motor.motor_asyncio import AsyncIOMotorClient
 from pymongo import IndexModel, ASCENDING, TEXT
+from pymongo.read_preferences import read_pref_mode_from_name, make_read_preference
 from app.config import settings
+from app.services.metrics import MongoCommandMetrics, mongo_pool_monitor
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Wire compressor -> module it needs (zlib is built in)
+_COMPRESSOR_MODULES = {"zstd": "zstandard", "snappy": "snappy", "zlib": None}
+
 class Database:
     client: AsyncIOMotorClient = None
     database = None
+    analytics_database = None
 
 db = Database()
 
@@ -19,23 +27,77 @@ async def get_database():
         raise RuntimeError("❌ MongoDB not initialized. Did you forget to call connect_to_mongo?")
     return db.database
 
+# Read-heavy analytics may be served by secondaries (falls back to the primary on a standalone server)
+async def get_analytics_database():
+    if db.analytics_database is None:
+        return await get_database()
+    return db.analytics_database
+
+def available_compressors():
+    """Configured wire compressors whose libraries are installed, in preference order"""
+    available = []
+    for name in (c.strip() for c in settings.mongo_compressors.split(",")):
+        if name not in _COMPRESSOR_MODULES:
+            if name:
+                logger.warning(f"Unknown MongoDB compressor {name!r} ignored")
+            continue
+        module = _COMPRESSOR_MODULES[name]
+        if module is None or importlib.util.find_spec(module) is not None:
+            available.append(name)
+    return available
+
+def client_options():
+    """Pool, timeout and compression options from settings, except those the connection string sets itself"""
+    in_uri = {name.lower() for name in parse_qs(urlsplit(settings.mongodb_url).query)}
+    options = {
+        "maxPoolSize": settings.mongo_max_pool_size,
+        "minPoolSize": settings.mongo_min_pool_size,
+        "serverSelectionTimeoutMS": settings.mongo_server_selection_timeout_ms,
+        "connectTimeoutMS": settings.mongo_connect_timeout_ms,
+        "event_listeners": [MongoCommandMetrics(), mongo_pool_monitor],
+    }
+    # None means no limit; pymongo rejects 0 for these
+    for option, value in (
+        ("maxIdleTimeMS", settings.mongo_max_idle_time_ms),
+        ("waitQueueTimeoutMS", settings.mongo_wait_queue_timeout_ms),
+        ("socketTimeoutMS", settings.mongo_socket_timeout_ms),
+    ):
+        if value:
+            options[option] = value
+    compressors = available_compressors()
+    if compressors:
+        options["compressors"] = ",".join(compressors)
+    return {k: v for k, v in options.items() if k.lower() not in in_uri}
+
+def analytics_read_preference():
+    mode = read_pref_mode_from_name(settings.mongo_analytics_read_preference)
+    return make_read_preference(mode, None, max_staleness=settings.mongo_analytics_max_staleness_seconds or -1)
+
 # ✅ Connect to MongoDB
 async def connect_to_mongo():
     try:
-        db.client = AsyncIOMotorClient(settings.mongodb_url)
+        options = client_options()
+        db.client = AsyncIOMotorClient(settings.mongodb_url, **options)
+        mongo_pool_monitor.max_pool_size = db.client.options.pool_options.max_pool_size
         db.database = db.client[settings.database_name]
+        db.analytics_database = db.client.get_database(
+            settings.database_name, read_preference=analytics_read_preference()
+        )
 
         # Test connection
         await db.client.admin.command('ping')
-        logger.info("✅ Connected to MongoDB successfully")
+        logger.info(
+            f"✅ Connected to MongoDB successfully (pool {settings.mongo_min_pool_size}-"
+            f"{mongo_pool_monitor.max_pool_size}, compressors: {options.get('compressors', 'none')})"
+        )
 
         # Create indexes
         await create_indexes()
 
     except Exception as e:
-        # logger.error(f"❌ Failed to connect to MongoDB: {e}")
-        # raise
         logger.error(f"Failed to connect to MongoDB: {e}")
+        if settings.mongo_require_connection:
+            raise
         # Don't raise in development - allow app to start without MongoDB
         logger.warning("Starting without MongoDB connection - some features may not work")
 
@@ -56,6 +118,7 @@ async def create_indexes():
         await db.database.documents.create_index([("title", TEXT), ("content", TEXT)])
         await db.database.documents.create_index([("created_at", ASCENDING)])
         await db.database.documents.create_index([("updated_at", ASCENDING)])
+        await db.database.document_chunks.create_index([("document_id", ASCENDING)])
 
         # Suggestions
         await db.database.suggestions.create_index([("document_id", ASCENDING)])
@@ -66,6 +129,18 @@ async def create_indexes():
         await db.database.comments.create_index([("document_id", ASCENDING)])
         await db.database.comments.create_index([("user_id", ASCENDING)])
 
+        # Suggestion feedback counters
+        await db.database.suggestion_feedback.create_index([("user_id", ASCENDING)])
+
+        # Request profiles expire after the retention period
+        await db.database.request_profiles.create_index(
+            [("created_at", ASCENDING)], expireAfterSeconds=settings.profiling_retention_days * 86400
+        )
+        await db.database.request_profiles.create_index([("route", ASCENDING), ("created_at", ASCENDING)])
+
+        # Writing activity rollups
+        await db.database.writing_rollups.create_index([("user_id", ASCENDING), ("period", ASCENDING), ("bucket", ASCENDING)])
+
         logger.info("✅ Indexes created successfully")
 
     except Exception as e:
@@ -1,7 +1,10 @@
+import math
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from app.services.auth import verify_token
 from app.services.user_service import user_service
+from app.services.rate_limiter import rate_limiter
+from app.services import profiling
 from app.models.user import User
 
 security = HTTPBearer()
@@ -17,6 +20,7 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    profiling.tag(user_id=str(user.id), tier=user.subscription_tier)
     # Convert UserInDB to User
     return User(
         id=str(user.id),
@@ -33,4 +37,23 @@ async def get_current_active_user(current_user: User = Depends(get_current_user)
     """Get current active user"""
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
-    return current_user
\ No newline at end of file
+    return current_user
+
+async def get_admin_user(current_user: User = Depends(get_current_active_user)) -> User:
+    """Current user, if listed in ADMIN_EMAILS"""
+    if current_user.email.lower() not in profiling.admin_emails():
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    return current_user
+
+def rate_limited(scope: str, cost: float = 1.0):
+    """Dependency factory enforcing the per-user, per-tier request rate for a scope"""
+    async def dependency(current_user: User = Depends(get_current_active_user)) -> User:
+        retry_after = await rate_limiter.hit(current_user.id, current_user.subscription_tier, scope, cost)
+        if retry_after > 0:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Rate limit exceeded",
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+        return current_user
+    return dependency
@@ -1,10 +1,19 @@
+import asyncio
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.database import connect_to_mongo, close_mongo_connection, get_database
-from app.routers import auth, documents, suggestions, analytics, comments
+from app.repositories import init_storage, close_storage, repositories
+from app.routers import auth, documents, suggestions, analytics, comments, profiles
 import app.services.document_service as ds_module  # Used for assigning shared instance
 from app.services.document_service import DocumentService
+from app.services.scheduler import scheduler
+from app.services.plagiarism_service import plagiarism_service
+from app.services import nlp_resources
+from app.services.compression import CompressionMiddleware
+from app.services.events import event_bus
+from app.services.profiling import ProfilingMiddleware
+from app.services.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsMiddleware, mongo_pool_monitor, registry as metrics_registry
 from app.config import settings
 
 # # Configure logging
@@ -37,20 +46,39 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# gzip/brotli for larger text responses
+app.add_middleware(CompressionMiddleware)
+
+# Opt-in request profiles (X-Profile header from admins, or PROFILING_SAMPLE_RATE)
+app.add_middleware(ProfilingMiddleware)
+
+# Per-route latency histograms, exposed on /metrics
+app.add_middleware(MetricsMiddleware)
+
 # --- App Startup Event ---
 @app.on_event("startup")
 async def startup_event():
-    await connect_to_mongo()
-    db = await get_database()
+    # Check the offline NLTK bundle; nothing is downloaded at runtime
+    nlp_resources.preflight()
+    # MongoDB, or the memory/sqlite backend (STORAGE_BACKEND)
+    await init_storage()
     
     # ✅ Shared DocumentService initialized for app-wide use
-    ds_module.document_service = DocumentService(db["documents"])
+    ds_module.document_service = DocumentService(repositories.documents)
     print("✅ document_service initialized")
 
+    # Follow other workers' writes before building in-memory indexes (EVENT_BUS_BACKEND)
+    await event_bus.start()
+
+    # Build the plagiarism LSH index without delaying startup
+    app.state.plagiarism_load = asyncio.create_task(plagiarism_service.load())
+
 # --- App Shutdown Event ---
 @app.on_event("shutdown")
 async def shutdown_event():
-    await close_mongo_connection()
+    scheduler.shutdown()
+    await event_bus.stop()
+    await close_storage()
 
 # --- Register routers ---
 app.include_router(auth.router, prefix="/api/auth", tags=["authentication"])
@@ -58,6 +86,7 @@ app.include_router(documents.router, prefix="/api/auth/documents", tags=["docume
 app.include_router(suggestions.router, prefix="/api/ai", tags=["ai-suggestions"])
 app.include_router(analytics.router, prefix="/api/analytics", tags=["analytics"])
 app.include_router(comments.router, prefix="/api/comments", tags=["comments"])
+app.include_router(profiles.router, prefix="/api", tags=["profiles"])
 
 # --- Root Route ---
 @app.get("/")
@@ -68,3 +97,18 @@ async def root():
 @app.get("/health")
 async def health_check():
     return {"status": "ok"}
+
+# --- Scheduler queue metrics ---
+@app.get("/health/scheduler")
+async def scheduler_metrics():
+    return scheduler.snapshot()
+
+# --- MongoDB connection pool stats (this worker) ---
+@app.get("/health/mongo-pool")
+async def mongo_pool_stats():
+    return mongo_pool_monitor.snapshot()
+
+# --- Prometheus metrics ---
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(metrics_registry.render(), media_type=METRICS_CONTENT_TYPE)
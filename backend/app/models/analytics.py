@@ -1,6 +1,7 @@
 from pydantic import BaseModel
 from typing import Dict, List, Optional
 from datetime import datetime
+from app.models.suggestion import SuggestionPosition
 
 class ReadabilityAnalysis(BaseModel):
     flesch_reading_ease: float
@@ -39,6 +40,16 @@ class DocumentAnalytics(BaseModel):
     suggestions_count: Dict[str, int]
     generated_at: datetime
 
+class PlagiarismMatch(BaseModel):
+    document_id: Optional[str] = None  # only set when the source is the requester's own document
+    similarity: float  # % of the checked text's shingles found in the source
+    matched_spans: List[SuggestionPosition]
+
+class PlagiarismReport(BaseModel):
+    plagiarism_score: float
+    status: str
+    matches: List[PlagiarismMatch] = []
+
 class KeywordExtraction(BaseModel):
     keywords: List[Dict[str, float]]  # keyword: score
     entities: List[Dict[str, str]]    # entity: type
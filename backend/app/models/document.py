@@ -86,3 +86,25 @@ class Document(DocumentBase):
         doc_dict["last_modified"] = doc_dict["updated_at"]
 
         return cls(**doc_dict)
+
+
+# ----------------------------
+# ✅ Related Document Result
+# ----------------------------
+
+class SimilarDocument(BaseModel):
+    id: str
+    title: str
+    score: float  # cosine similarity, 0-1
+
+
+# ----------------------------
+# ✅ Partial Content Read
+# ----------------------------
+
+class DocumentContentRange(BaseModel):
+    document_id: str
+    start: int
+    end: int  # exclusive
+    length: int  # of the whole body
+    content: str
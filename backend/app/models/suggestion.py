@@ -11,6 +11,7 @@ class SuggestionPosition(BaseModel):
 class SuggestionBase(BaseModel):
     document_id: str
     type: str  # grammar, style, clarity, tone, plagiarism, vocabulary
+    rule_id: str = ""  # checker rule that produced it, e.g. grammar.there_their
     text: str
     suggestion: str
     explanation: str
@@ -0,0 +1,91 @@
+"""Storage for documents, users, suggestions and comments, selected by STORAGE_BACKEND.
+
+- mongo: Motor collections (default)
+- memory: the same repositories over an in-process MemoryDatabase; nothing is persisted
+- sqlite: SQLAlchemy Core on STORAGE_URL (an SQLite file by default)
+
+Large document bodies are kept in a chunk store next to the records (see content.py),
+and bodies and suggestion explanations are compressed by the content codec (see codec.py).
+
+Other collections (caches, rollups, feedback counters, profiles) keep using
+get_database(); without MongoDB they live in an in-process MemoryDatabase.
+"""
+import logging
+
+from app.config import settings
+from app.database import connect_to_mongo, close_mongo_connection, db
+from app.repositories.base import CommentRepository, DocumentRepository, SuggestionRepository, UserRepository
+from app.repositories.codec import EncodedSuggestionRepository, content_codec
+from app.repositories.content import ChunkedDocumentRepository
+from app.repositories.memory import MemoryDatabase
+from app.repositories.mongo import (
+    MongoChunkStore, MongoCommentRepository, MongoDictionaryStore, MongoDocumentRepository, MongoSuggestionRepository,
+    MongoUserRepository
+)
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("mongo", "memory", "sqlite")
+
+
+class Repositories:
+    documents: DocumentRepository = None
+    users: UserRepository = None
+    suggestions: SuggestionRepository = None
+    comments: CommentRepository = None
+    sql_storage = None
+
+repositories = Repositories()
+
+
+def _use_mongo_api(database, analytics_database=None):
+    analytics_database = analytics_database if analytics_database is not None else database
+    repositories.documents = ChunkedDocumentRepository(
+        MongoDocumentRepository(database["documents"], analytics_database["documents"]),
+        MongoChunkStore(database["document_chunks"])
+    )
+    repositories.users = MongoUserRepository(database["users"])
+    repositories.suggestions = EncodedSuggestionRepository(
+        MongoSuggestionRepository(database["suggestions"], analytics_database["suggestions"])
+    )
+    repositories.comments = MongoCommentRepository(database["comments"])
+    return MongoDictionaryStore(database["content_dictionaries"])
+
+
+async def init_storage(backend: str = None):
+    """Connect the configured backend and build the repositories"""
+    backend = backend or settings.storage_backend
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown STORAGE_BACKEND {backend!r}; expected one of {', '.join(BACKENDS)}")
+
+    if backend == "mongo":
+        await connect_to_mongo()
+        if db.database is not None:
+            await content_codec.load(_use_mongo_api(db.database, db.analytics_database))
+        return
+
+    db.database = MemoryDatabase(settings.database_name)
+    if backend == "memory":
+        dictionaries = _use_mongo_api(db.database)
+    else:
+        from app.repositories.sql import (
+            SQLChunkStore, SQLCommentRepository, SQLDictionaryStore, SQLDocumentRepository, SQLStorage,
+            SQLSuggestionRepository, SQLUserRepository
+        )
+        storage = SQLStorage(settings.storage_url)
+        await storage.open()
+        repositories.sql_storage = storage
+        repositories.documents = ChunkedDocumentRepository(SQLDocumentRepository(storage), SQLChunkStore(storage))
+        repositories.users = SQLUserRepository(storage)
+        repositories.suggestions = EncodedSuggestionRepository(SQLSuggestionRepository(storage))
+        repositories.comments = SQLCommentRepository(storage)
+        dictionaries = SQLDictionaryStore(storage)
+    await content_codec.load(dictionaries)
+    logger.info(f"Storage backend: {backend} (auxiliary collections in memory)")
+
+
+async def close_storage():
+    if repositories.sql_storage is not None:
+        await repositories.sql_storage.close()
+        repositories.sql_storage = None
+    await close_mongo_connection()
@@ -0,0 +1,143 @@
+"""Storage interfaces for documents, users, suggestions and comments.
+
+Records are plain dicts shaped like the MongoDB documents (see the *InDB
+models), with "_id" always returned as a string. Every backend generates
+ObjectId-style ids so ids stay valid across backends.
+"""
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+
+class WriteConflict(Exception):
+    """A write kept losing to concurrent writes of the same record"""
+
+
+class DocumentRepository(ABC):
+    @abstractmethod
+    async def insert(self, record: dict) -> str:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get(self, doc_id: str, user_id: Optional[str] = None, content: bool = True) -> Optional[dict]:
+        """The document; without its body when content=False"""
+        raise NotImplementedError
+
+    async def read_range(self, doc_id: str, start: int, end: Optional[int] = None,
+                         user_id: Optional[str] = None) -> Optional[Tuple[str, int]]:
+        """(content[start:end], total length), or None when no such document"""
+        record = await self.get(doc_id, user_id)
+        if record is None:
+            return None
+        content = record.get("content", "")
+        return content[start:end], len(content)
+
+    @abstractmethod
+    async def list_by_user(self, user_id: str) -> List[dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_many(self, doc_ids: Iterable[str], user_id: Optional[str] = None) -> List[dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def update(self, doc_id: str, user_id: str, changes: dict, version: Optional[int] = None,
+                     check_version: bool = False) -> bool:
+        """Set `changes` and bump `version`; False when no such document, or with check_version when it is no longer at `version`"""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def rewrite(self, doc_id: str, version: Optional[int], changes: dict) -> bool:
+        """Set `changes` without bumping `version`, only while the document is still at `version`"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def scan(self, user_id: Optional[str] = None, fields: Iterable[str] = ("content", "user_id")) -> AsyncIterator[dict]:
+        """Iterate documents (all users when user_id is None) with only `fields` plus "_id" """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def totals(self, user_id: str) -> Dict[str, int]:
+        """{"documents": count, "words": summed word_count} for a user"""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def count_by(self, user_id: str, field: str) -> Dict[str, int]:
+        """Number of the user's documents per value of `field`"""
+        raise NotImplementedError
+
+
+class UserRepository(ABC):
+    @abstractmethod
+    async def insert(self, record: dict) -> str:
+        """Raises ValueError when the email is already registered"""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get(self, user_id: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_by_email(self, email: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def update(self, user_id: str, changes: dict) -> bool:
+        raise NotImplementedError
+
+
+class SuggestionRepository(ABC):
+    @abstractmethod
+    async def insert_many(self, records: List[dict]) -> List[str]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def list_for_document(self, document_id: str, user_id: str, include_dismissed: bool = False) -> List[dict]:
+        """Newest first"""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def mark(self, suggestion_id: str, user_id: str, flag: str) -> Optional[dict]:
+        """Set `flag` (is_applied / is_dismissed) if not already set; the suggestion, or None"""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def count_by_type(self, user_id: str, document_id: Optional[str] = None) -> Dict[str, int]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def reviewed(self, user_id: Optional[str] = None) -> AsyncIterator[dict]:
+        """Iterate suggestions that were applied or dismissed"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def scan(self, user_id: Optional[str] = None, fields: Iterable[str] = ("explanation",)) -> AsyncIterator[dict]:
+        """Iterate suggestions (all users when user_id is None) with only `fields` plus "_id" """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def update(self, suggestion_id: str, changes: dict) -> bool:
+        raise NotImplementedError
+
+
+class CommentRepository(ABC):
+    @abstractmethod
+    async def insert(self, record: dict) -> str:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get(self, comment_id: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def list_for_document(self, document_id: str) -> List[dict]:
+        """Newest first"""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def update(self, comment_id: str, changes: dict, user_id: Optional[str] = None) -> bool:
+        """Set `changes`, restricted to the author's comments when user_id is given"""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def delete(self, comment_id: str, user_id: str) -> bool:
+        raise NotImplementedError
@@ -0,0 +1,297 @@
+"""Compression for stored prose: document bodies and suggestion explanations.
+
+With CONTENT_CODEC=zstd, values of at least CONTENT_CODEC_MIN_CHARS are
+compressed with zstd using the newest dictionary trained on stored prose
+(plain zstd until one is trained). A dictionary lets short values such as
+suggestion explanations compress too, since they share most of their
+vocabulary. Every stored value records the codec that wrote it:
+
+- "identity": stored as a plain string
+- "zstd:0": zstd without a dictionary
+- "zstd:<dictionary id>": zstd with that dictionary
+
+Dictionaries are never modified or deleted, so every stored value stays
+readable. Training a new one only changes how later writes are encoded.
+Values are decoded only when the body is read: metadata reads and
+ownership checks skip the compressed bytes, and range reads decode only
+the chunks they overlap.
+
+    python -m app.repositories.codec status   # values per codec
+    python -m app.repositories.codec train    # train a dictionary from stored prose
+    python -m app.repositories.codec migrate  # re-encode stored values with the current codec
+"""
+import argparse
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from app.config import settings
+from app.repositories.base import SuggestionRepository
+
+try:
+    import zstandard
+except ImportError:  # optional; values are then written uncompressed
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+IDENTITY = "identity"
+# Paragraph-sized training samples; zstd learns from many small samples better than a few large ones
+SAMPLE_CHARS = 2048
+
+Payload = Union[str, bytes]
+
+
+class DictionaryStore(ABC):
+    @abstractmethod
+    async def load(self) -> List[Tuple[int, bytes]]:
+        """(dictionary id, dictionary) pairs, oldest first"""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def save(self, dict_id: int, data: bytes):
+        raise NotImplementedError
+
+
+class ContentCodec:
+    """Encodes with the current codec and decodes any codec that was ever current"""
+
+    def __init__(self):
+        self.store: Optional[DictionaryStore] = None
+        self._dictionaries: Dict[int, "zstandard.ZstdCompressionDict"] = {}
+        self._latest: Optional[int] = None
+        self._compressor = None
+        self._decompressors: Dict[int, "zstandard.ZstdDecompressor"] = {}
+        self.current = IDENTITY
+
+    @property
+    def enabled(self) -> bool:
+        return settings.content_codec == "zstd" and zstandard is not None
+
+    def _add(self, dict_id: int, data: bytes):
+        self._dictionaries[dict_id] = zstandard.ZstdCompressionDict(data)
+        self._latest = dict_id
+
+    def _configure(self):
+        if not self.enabled:
+            self.current, self._compressor = IDENTITY, None
+            return
+        dictionary = self._dictionaries.get(self._latest) if self._latest is not None else None
+        self.current = f"zstd:{self._latest if dictionary is not None else 0}"
+        self._compressor = zstandard.ZstdCompressor(level=settings.content_codec_level, dict_data=dictionary)
+
+    async def load(self, store: DictionaryStore):
+        """Load the stored dictionaries and pick the codec new writes use"""
+        self.store = store
+        self._dictionaries, self._latest, self._decompressors = {}, None, {}
+        if zstandard is not None:
+            for dict_id, data in await store.load():
+                self._add(dict_id, data)
+        elif settings.content_codec == "zstd":
+            logger.warning("CONTENT_CODEC=zstd but zstandard is not installed; storing content uncompressed")
+        self._configure()
+        logger.info(f"Content codec: {self.current}")
+
+    async def ensure(self, codecs: Iterable[str]):
+        """Reload dictionaries if a value was written with one trained after this process loaded them"""
+        missing = {
+            int(codec.split(":", 1)[1]) for codec in codecs
+            if codec.startswith("zstd:") and codec != "zstd:0"
+        } - set(self._dictionaries)
+        if missing and self.store is not None and zstandard is not None:
+            for dict_id, data in await self.store.load():
+                if dict_id in missing:
+                    self._dictionaries[dict_id] = zstandard.ZstdCompressionDict(data)
+
+    def encode(self, text: str) -> Tuple[str, Payload]:
+        """(codec, payload); short or incompressible values stay plain strings"""
+        if self._compressor is None or len(text) < settings.content_codec_min_chars:
+            return IDENTITY, text
+        raw = text.encode("utf-8", "surrogatepass")
+        payload = self._compressor.compress(raw)
+        if len(payload) >= len(raw):
+            return IDENTITY, text
+        return self.current, payload
+
+    def decode(self, codec: Optional[str], payload: Payload) -> str:
+        if not codec or codec == IDENTITY:
+            return payload
+        if zstandard is None:
+            raise RuntimeError(f"Stored content uses {codec} but zstandard is not installed")
+        dict_id = int(codec.split(":", 1)[1])
+        decompressor = self._decompressors.get(dict_id)
+        if decompressor is None:
+            if dict_id and dict_id not in self._dictionaries:
+                raise KeyError(f"Unknown compression dictionary {dict_id}")
+            decompressor = zstandard.ZstdDecompressor(dict_data=self._dictionaries.get(dict_id))
+            self._decompressors[dict_id] = decompressor
+        return decompressor.decompress(bytes(payload)).decode("utf-8", "surrogatepass")
+
+    async def train(self, samples: List[str]) -> int:
+        """Train, store and switch to a new dictionary; its id"""
+        if zstandard is None:
+            raise RuntimeError("zstandard is not installed")
+        encoded = [sample.encode("utf-8", "surrogatepass") for sample in samples if sample.strip()]
+        try:
+            dictionary = await asyncio.to_thread(zstandard.train_dictionary, settings.content_dictionary_size, encoded)
+        except zstandard.ZstdError as e:
+            raise ValueError(f"Not enough prose to train a dictionary ({len(encoded)} samples): {e}")
+        dict_id = dictionary.dict_id()
+        await self.store.save(dict_id, dictionary.as_bytes())
+        self._add(dict_id, dictionary.as_bytes())
+        self._configure()
+        return dict_id
+
+
+content_codec = ContentCodec()
+
+
+def pack(record: dict, field: str) -> dict:
+    """`record` with `field` encoded: the plain field holds "" and <field>_encoded the payload"""
+    if field not in record:
+        return record
+    codec, payload = content_codec.encode(record[field] or "")
+    compressed = codec != IDENTITY
+    return {
+        **record,
+        field: "" if compressed else payload,
+        f"{field}_encoded": payload if compressed else None,
+        f"{field}_codec": codec,
+    }
+
+
+async def unpack(record: Optional[dict], field: str) -> Optional[dict]:
+    """Decode <field>_encoded back into `field` in place"""
+    if record is None:
+        return None
+    encoded = record.pop(f"{field}_encoded", None)
+    if encoded is not None:
+        codec = record.get(f"{field}_codec")
+        await content_codec.ensure([codec])
+        record[field] = content_codec.decode(codec, encoded)
+    return record
+
+
+def samples_from(text: str) -> List[str]:
+    """Paragraphs of `text`, cut to SAMPLE_CHARS"""
+    samples = []
+    for paragraph in text.split("\n\n"):
+        for start in range(0, len(paragraph), SAMPLE_CHARS):
+            samples.append(paragraph[start:start + SAMPLE_CHARS])
+    return samples
+
+
+class EncodedSuggestionRepository(SuggestionRepository):
+    """Compresses explanations on top of any SuggestionRepository"""
+
+    def __init__(self, inner: SuggestionRepository):
+        self.inner = inner
+
+    async def insert_many(self, records: List[dict]) -> List[str]:
+        return await self.inner.insert_many([pack(record, "explanation") for record in records])
+
+    async def list_for_document(self, document_id: str, user_id: str, include_dismissed: bool = False) -> List[dict]:
+        records = await self.inner.list_for_document(document_id, user_id, include_dismissed)
+        return [await unpack(record, "explanation") for record in records]
+
+    async def mark(self, suggestion_id: str, user_id: str, flag: str) -> Optional[dict]:
+        return await unpack(await self.inner.mark(suggestion_id, user_id, flag), "explanation")
+
+    async def count_by_type(self, user_id: str, document_id: Optional[str] = None) -> Dict[str, int]:
+        return await self.inner.count_by_type(user_id, document_id)
+
+    def reviewed(self, user_id: Optional[str] = None):
+        return self.inner.reviewed(user_id)
+
+    async def scan(self, user_id: Optional[str] = None, fields: Iterable[str] = ("explanation",)):
+        fields = tuple(fields)
+        if "explanation" not in fields:
+            async for record in self.inner.scan(user_id, fields):
+                yield record
+            return
+        async for record in self.inner.scan(user_id, fields + ("explanation_encoded", "explanation_codec")):
+            record = await unpack(record, "explanation")
+            if "explanation_codec" not in fields:
+                record.pop("explanation_codec", None)
+            yield record
+
+    async def update(self, suggestion_id: str, changes: dict) -> bool:
+        return await self.inner.update(suggestion_id, pack(changes, "explanation"))
+
+
+async def _status(repositories) -> Dict[str, Dict[str, int]]:
+    documents: Dict[str, int] = {}
+    async for record in repositories.documents.records.scan(fields=("content_codec", "content_chunks")):
+        for codec in repositories.documents.codecs(record):
+            documents[codec] = documents.get(codec, 0) + 1
+    suggestions: Dict[str, int] = {}
+    async for record in repositories.suggestions.inner.scan(fields=("explanation_codec",)):
+        codec = record.get("explanation_codec") or IDENTITY
+        suggestions[codec] = suggestions.get(codec, 0) + 1
+    return {"current": content_codec.current, "documents": documents, "suggestions": suggestions}
+
+
+async def _train(repositories, max_samples: int) -> int:
+    samples: List[str] = []
+    async for record in repositories.documents.scan(fields=("content",)):
+        samples.extend(samples_from(record.get("content") or ""))
+        if len(samples) >= max_samples:
+            break
+    async for record in repositories.suggestions.scan(fields=("explanation",)):
+        if len(samples) >= max_samples * 2:
+            break
+        if record.get("explanation"):
+            samples.append(record["explanation"])
+    return await content_codec.train(samples)
+
+
+async def _migrate(repositories) -> Dict[str, int]:
+    """Re-encode every value not written with the current codec"""
+    migrated = {"documents": 0, "suggestions": 0}
+    doc_ids = [record["_id"] async for record in repositories.documents.records.scan(
+        fields=("content_codec", "content_chunks")
+    ) if repositories.documents.codecs(record) != {content_codec.current}]
+    for doc_id in doc_ids:
+        if await repositories.documents.recode(doc_id):
+            migrated["documents"] += 1
+    async for record in repositories.suggestions.scan(fields=("explanation", "explanation_codec")):
+        codec = record.get("explanation_codec") or IDENTITY
+        if codec != content_codec.current and codec != content_codec.encode(record.get("explanation") or "")[0]:
+            await repositories.suggestions.update(record["_id"], {"explanation": record.get("explanation") or ""})
+            migrated["suggestions"] += 1
+    return migrated
+
+
+async def _main(args):
+    from app.repositories import close_storage, init_storage, repositories
+    await init_storage()
+    try:
+        if args.command == "train":
+            try:
+                dict_id = await _train(repositories, args.samples)
+            except ValueError as e:
+                raise SystemExit(str(e))
+            print(f"Trained dictionary {dict_id}; new writes use {content_codec.current}")
+        elif args.command == "migrate":
+            migrated = await _migrate(repositories)
+            print(f"Re-encoded {migrated['documents']} documents and {migrated['suggestions']} suggestions "
+                  f"with {content_codec.current}")
+        else:
+            status = await _status(repositories)
+            print(f"Current codec: {status['current']}")
+            for kind in ("documents", "suggestions"):
+                for codec, count in sorted(status[kind].items()):
+                    print(f"  {kind:<12} {codec:<20} {count}")
+    finally:
+        await close_storage()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Inspect, train and migrate the stored-content codec")
+    parser.add_argument("command", choices=["status", "train", "migrate"])
+    parser.add_argument("--samples", type=int, default=5000, help="maximum document paragraphs to train on")
+    # Run through the package module so init_storage loads the same codec instance
+    from app.repositories import codec
+    asyncio.run(codec._main(parser.parse_args()))
@@ -0,0 +1,273 @@
+"""Chunked storage for large document bodies.
+
+Content longer than CONTENT_CHUNK_THRESHOLD characters is split into
+chunks of about CONTENT_CHUNK_CHARS, cut at line breaks where possible,
+and stored in a separate chunk store. The document record keeps only the
+ordered chunk map ({"id", "chars", "hash"} per chunk), so fetching it
+stays cheap and no record approaches MongoDB's 16 MB limit.
+
+On update, leading and trailing chunks whose text is unchanged (compared
+by hash, without loading the old body) are kept; only the edited middle
+is re-chunked and written, and chunks that fell out are deleted after the
+record points at the new map. The record is only switched to the new map
+while it still has the version the plan was made against; a concurrent
+edit makes the update discard its chunks and plan again. Range reads fetch
+just the overlapping chunks.
+
+Inline bodies and each chunk are encoded with the content codec (see
+codec.py). The codec is recorded per chunk in the map and as content_codec
+on the record, so values written under an older codec stay readable until
+they are re-encoded in place.
+"""
+import hashlib
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from bson import ObjectId
+
+from app.config import settings
+from app.repositories.base import DocumentRepository, WriteConflict
+from app.repositories.codec import IDENTITY, Payload, content_codec, pack, unpack
+
+INLINE = "inline"
+CHUNKED = "chunked"
+LAYOUT_FIELDS = ("content_storage", "content_chunks", "content_length", "content_encoded", "content_codec")
+# Re-plans of a chunked update that lost to concurrent edits before giving up
+WRITE_ATTEMPTS = 5
+
+
+class ChunkStore(ABC):
+    @abstractmethod
+    async def put_many(self, document_id: str, chunks: List[Tuple[str, Payload]]):
+        """Store (chunk id, encoded payload) pairs"""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_many(self, chunk_ids: List[str]) -> Dict[str, Payload]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def delete_many(self, chunk_ids: List[str]):
+        raise NotImplementedError
+
+
+def chunk_hash(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=8).hexdigest()
+
+
+def split_chunks(text: str, size: int) -> List[str]:
+    """Pieces of at most `size` characters, preferring to end each after a newline in its second half"""
+    chunks = []
+    start = 0
+    while len(text) - start > size:
+        cut = text.rfind("\n", start + size // 2, start + size)
+        end = cut + 1 if cut != -1 else start + size
+        chunks.append(text[start:end])
+        start = end
+    if start < len(text):
+        chunks.append(text[start:])
+    return chunks
+
+
+def plan_write(content: str, previous: List[dict], size: int) -> Tuple[List[dict], List[Tuple[str, str]], List[str]]:
+    """(new chunk map, chunks to write, chunk ids to delete) for replacing `previous` with `content`"""
+    # Unchanged leading chunks
+    head, offset = 0, 0
+    while head < len(previous):
+        entry = previous[head]
+        if offset + entry["chars"] > len(content) or chunk_hash(content[offset:offset + entry["chars"]]) != entry["hash"]:
+            break
+        offset += entry["chars"]
+        head += 1
+    # Unchanged trailing chunks, not overlapping the kept head
+    tail, end = len(previous), len(content)
+    while tail > head:
+        entry = previous[tail - 1]
+        if end - entry["chars"] < offset or chunk_hash(content[end - entry["chars"]:end]) != entry["hash"]:
+            break
+        end -= entry["chars"]
+        tail -= 1
+
+    written = [(str(ObjectId()), text) for text in split_chunks(content[offset:end], size)]
+    chunk_map = (
+        previous[:head]
+        + [{"id": chunk_id, "chars": len(text), "hash": chunk_hash(text)} for chunk_id, text in written]
+        + previous[tail:]
+    )
+    dropped = [entry["id"] for entry in previous[head:tail]]
+    return chunk_map, written, dropped
+
+
+def _written(fields: dict, previous: List[dict]) -> List[str]:
+    """Ids of the chunks a write of `fields` added to `previous`"""
+    kept = {entry["id"] for entry in previous}
+    return [entry["id"] for entry in fields.get("content_chunks", []) if entry["id"] not in kept]
+
+
+def _overlapping(chunk_map: List[dict], start: int, end: int) -> Tuple[List[dict], int]:
+    """Chunks covering [start, end) and the offset of the first one"""
+    selected, offset, first_offset = [], 0, None
+    for entry in chunk_map:
+        if offset >= end:
+            break
+        chunk_end = offset + entry["chars"]
+        if chunk_end > start:
+            if first_offset is None:
+                first_offset = offset
+            selected.append(entry)
+        offset = chunk_end
+    return selected, first_offset or 0
+
+
+class ChunkedDocumentRepository(DocumentRepository):
+    """Stores large bodies in a ChunkStore on top of any DocumentRepository"""
+
+    def __init__(self, records: DocumentRepository, chunks: ChunkStore):
+        self.records = records
+        self.chunks = chunks
+
+    @staticmethod
+    def _chunked(content: str) -> bool:
+        return len(content) > settings.content_chunk_threshold
+
+    @staticmethod
+    def codecs(record: dict) -> set:
+        """Codecs the record's body is stored with"""
+        if record.get("content_storage") == CHUNKED:
+            return {entry.get("codec") or IDENTITY for entry in record["content_chunks"]}
+        return {record.get("content_codec") or IDENTITY}
+
+    async def _read_chunks(self, entries: List[dict]) -> str:
+        payloads = await self.chunks.get_many([entry["id"] for entry in entries])
+        await content_codec.ensure(entry.get("codec") or IDENTITY for entry in entries)
+        return "".join(content_codec.decode(entry.get("codec"), payloads[entry["id"]]) for entry in entries)
+
+    async def _assemble(self, record: dict) -> dict:
+        if record.get("content_storage") == CHUNKED:
+            record.pop("content_encoded", None)
+            record["content"] = await self._read_chunks(record["content_chunks"])
+            return record
+        return await unpack(record, "content")
+
+    async def _content_fields(self, doc_id: str, content: str, previous: List[dict]) -> Tuple[dict, List[str]]:
+        """Record fields for `content` (chunks already written) and the chunk ids to delete afterwards"""
+        if not self._chunked(content):
+            fields = pack({"content": content}, "content")
+            fields.update({"content_storage": INLINE, "content_chunks": [], "content_length": len(content)})
+            return fields, [entry["id"] for entry in previous]
+        chunk_map, written, dropped = plan_write(content, previous, settings.content_chunk_chars)
+        encoded = {chunk_id: content_codec.encode(text) for chunk_id, text in written}
+        for entry in chunk_map:
+            if entry["id"] in encoded:
+                entry["codec"] = encoded[entry["id"]][0]
+        if written:
+            await self.chunks.put_many(doc_id, [(chunk_id, payload) for chunk_id, (_, payload) in encoded.items()])
+        return {"content": "", "content_encoded": None, "content_codec": content_codec.current,
+                "content_storage": CHUNKED, "content_chunks": chunk_map, "content_length": len(content)}, dropped
+
+    async def insert(self, record: dict) -> str:
+        record = dict(record)
+        record["_id"] = str(record.get("_id") or ObjectId())
+        fields, _ = await self._content_fields(record["_id"], record.get("content", ""), [])
+        record.update(fields)
+        return await self.records.insert(record)
+
+    async def get(self, doc_id: str, user_id: Optional[str] = None, content: bool = True) -> Optional[dict]:
+        record = await self.records.get(doc_id, user_id, content=content)
+        if record is None or not content:
+            return record
+        return await self._assemble(record)
+
+    async def read_range(self, doc_id: str, start: int, end: Optional[int] = None,
+                         user_id: Optional[str] = None) -> Optional[Tuple[str, int]]:
+        # A chunked record's inline content is empty, so this fetch stays small either way
+        record = await self.records.get(doc_id, user_id)
+        if record is None:
+            return None
+        if record.get("content_storage") != CHUNKED:
+            content = (await unpack(record, "content")).get("content", "")
+            return content[start:end], len(content)
+        length = record["content_length"]
+        end = length if end is None else min(end, length)
+        if start >= end:
+            return "", length
+        selected, first_offset = _overlapping(record["content_chunks"], start, end)
+        text = await self._read_chunks(selected)
+        return text[start - first_offset:end - first_offset], length
+
+    async def list_by_user(self, user_id: str) -> List[dict]:
+        return [await self._assemble(record) for record in await self.records.list_by_user(user_id)]
+
+    async def get_many(self, doc_ids: Iterable[str], user_id: Optional[str] = None) -> List[dict]:
+        return [await self._assemble(record) for record in await self.records.get_many(doc_ids, user_id)]
+
+    async def update(self, doc_id: str, user_id: str, changes: dict, version: Optional[int] = None,
+                     check_version: bool = False) -> bool:
+        if "content" not in changes:
+            return await self.records.update(doc_id, user_id, changes, version, check_version)
+        for _ in range(WRITE_ATTEMPTS):
+            current = await self.records.get(doc_id, user_id, content=False)
+            if current is None or (check_version and current.get("version") != version):
+                return False
+            previous = current.get("content_chunks") or []
+            fields, dropped = await self._content_fields(doc_id, changes["content"], previous)
+            # The plan keeps chunks of `current`; only valid while nobody else has replaced them
+            if await self.records.update(doc_id, user_id, {**changes, **fields}, current.get("version"), check_version=True):
+                # Only once the record no longer references them
+                if dropped:
+                    await self.chunks.delete_many(dropped)
+                return True
+            written = _written(fields, previous)
+            if written:
+                await self.chunks.delete_many(written)
+        raise WriteConflict(f"Document {doc_id} changed during {WRITE_ATTEMPTS} attempts to save it")
+
+    async def rewrite(self, doc_id: str, version: Optional[int], changes: dict) -> bool:
+        if "content" not in changes:
+            return await self.records.rewrite(doc_id, version, changes)
+        current = await self.records.get(doc_id, content=False)
+        if current is None or current.get("version") != version:
+            return False
+        previous = current.get("content_chunks") or []
+        fields, dropped = await self._content_fields(doc_id, changes["content"], previous)
+        rewritten = await self.records.rewrite(doc_id, version, {**changes, **fields})
+        stale = dropped if rewritten else _written(fields, previous)
+        if stale:
+            await self.chunks.delete_many(stale)
+        return rewritten
+
+    async def scan(self, user_id: Optional[str] = None, fields: Iterable[str] = ("content", "user_id")):
+        fields = tuple(fields)
+        if "content" not in fields:
+            async for record in self.records.scan(user_id, fields):
+                yield record
+            return
+        async for record in self.records.scan(user_id, fields + LAYOUT_FIELDS):
+            record = await self._assemble(record)
+            for field in LAYOUT_FIELDS:
+                if field not in fields:
+                    record.pop(field, None)
+            yield record
+
+    async def totals(self, user_id: str) -> Dict[str, int]:
+        return await self.records.totals(user_id)
+
+    async def count_by(self, user_id: str, field: str) -> Dict[str, int]:
+        return await self.records.count_by(user_id, field)
+
+    async def recode(self, doc_id: str) -> bool:
+        """Rewrite the body with the current codec, unless it was edited meanwhile; whether it was rewritten"""
+        record = await self.records.get(doc_id)
+        if record is None or self.codecs(record) == {content_codec.current}:
+            return False
+        previous = record.get("content_chunks") or []
+        content = (await self._assemble(dict(record)))["content"]
+        fields, _ = await self._content_fields(doc_id, content, [])
+        written = [entry["id"] for entry in fields["content_chunks"]]
+        # Short or incompressible bodies stay plain under any codec
+        unchanged = self.codecs(fields) == self.codecs(record)
+        rewritten = not unchanged and await self.records.rewrite(doc_id, record.get("version"), fields)
+        stale = [entry["id"] for entry in previous] if rewritten else written
+        if stale:
+            await self.chunks.delete_many(stale)
+        return rewritten
@@ -0,0 +1,325 @@
+"""In-process stand-in for the Motor database.
+
+Implements the subset of the async collection API the services and
+repositories call (find/find_one, inserts, replace_one, updates with
+$set/$inc/$setOnInsert, find_one_and_update, bulk_write of UpdateOne,
+deletes, counts, and aggregation with $match/$group/$sort/$limit), so the
+app can run without a MongoDB server: STORAGE_BACKEND=memory, the
+auxiliary collections of the sqlite backend, and the API benchmarks.
+Nothing is persisted.
+"""
+import copy
+import re
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+
+_MISSING = object()
+
+
+def _get(doc: Dict[str, Any], path: str):
+    value = doc
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return _MISSING
+        value = value[part]
+    return value
+
+
+def _set(doc: Dict[str, Any], path: str, value):
+    parts = path.split(".")
+    for part in parts[:-1]:
+        doc = doc.setdefault(part, {})
+    doc[parts[-1]] = value
+
+
+def _unset(doc: Dict[str, Any], path: str):
+    parts = path.split(".")
+    for part in parts[:-1]:
+        doc = doc.get(part)
+        if not isinstance(doc, dict):
+            return
+    doc.pop(parts[-1], None)
+
+
+def _compare(value, condition) -> bool:
+    if not isinstance(condition, dict) or not any(k.startswith("$") for k in condition):
+        if isinstance(value, list) and not isinstance(condition, list):
+            return condition in value
+        return value == condition
+    for op, operand in condition.items():
+        present = value is not _MISSING
+        if op == "$eq" and not (present and value == operand):
+            return False
+        if op == "$ne" and present and value == operand:
+            return False
+        if op == "$in" and not (present and value in operand):
+            return False
+        if op == "$nin" and present and value in operand:
+            return False
+        if op == "$exists" and present != bool(operand):
+            return False
+        if op == "$regex" and not (present and re.search(operand, str(value), re.I if "i" in condition.get("$options", "") else 0)):
+            return False
+        if op in ("$gt", "$gte", "$lt", "$lte"):
+            if not present or value is None:
+                return False
+            if op == "$gt" and not value > operand:
+                return False
+            if op == "$gte" and not value >= operand:
+                return False
+            if op == "$lt" and not value < operand:
+                return False
+            if op == "$lte" and not value <= operand:
+                return False
+    return True
+
+
+def matches(doc: Dict[str, Any], query: Optional[Dict[str, Any]]) -> bool:
+    for key, condition in (query or {}).items():
+        if key == "$and":
+            if not all(matches(doc, q) for q in condition):
+                return False
+        elif key == "$or":
+            if not any(matches(doc, q) for q in condition):
+                return False
+        else:
+            value = _get(doc, key)
+            if value is _MISSING and condition is None:
+                continue
+            if not _compare(value, condition):
+                return False
+    return True
+
+
+def _apply_update(doc: Dict[str, Any], update: Dict[str, Any], inserting: bool):
+    for op, fields in update.items():
+        if op == "$setOnInsert" and not inserting:
+            continue
+        for path, value in fields.items():
+            if op in ("$set", "$setOnInsert"):
+                _set(doc, path, copy.deepcopy(value))
+            elif op == "$inc":
+                current = _get(doc, path)
+                _set(doc, path, (0 if current is _MISSING else current) + value)
+            elif op == "$unset":
+                _unset(doc, path)
+            elif op == "$push":
+                current = _get(doc, path)
+                _set(doc, path, ([] if current is _MISSING else current) + [copy.deepcopy(value)])
+            else:
+                raise NotImplementedError(f"Update operator {op} is not supported by the in-memory database")
+
+
+def _project(doc: Dict[str, Any], projection: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    doc = copy.deepcopy(doc)
+    if not projection:
+        return doc
+    included = {k for k, v in projection.items() if v}
+    if included:
+        keep = included | ({"_id"} if projection.get("_id", 1) else set())
+        return {k: v for k, v in doc.items() if k in keep}
+    return {k: v for k, v in doc.items() if k not in projection}
+
+
+def _value(doc: Dict[str, Any], expression):
+    if isinstance(expression, str) and expression.startswith("$"):
+        value = _get(doc, expression[1:])
+        return None if value is _MISSING else value
+    return expression
+
+
+def _group(docs: List[Dict[str, Any]], spec: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """$group with $sum accumulators"""
+    groups: Dict[Any, Dict[str, Any]] = {}
+    for doc in docs:
+        key = _value(doc, spec["_id"])
+        group = groups.setdefault(key, {"_id": key})
+        for field, accumulator in spec.items():
+            if field == "_id":
+                continue
+            (op, expression), = accumulator.items()
+            if op != "$sum":
+                raise NotImplementedError(f"Accumulator {op} is not supported by the in-memory database")
+            value = _value(doc, expression)
+            group[field] = group.get(field, 0) + (value if isinstance(value, (int, float)) else 0)
+    return list(groups.values())
+
+
+class MemoryCursor:
+    def __init__(self, docs: List[Dict[str, Any]], projection=None):
+        self._docs = docs
+        self._projection = projection
+        self._skip = 0
+        self._limit = 0
+
+    def sort(self, key, direction: int = 1):
+        keys = key if isinstance(key, list) else [(key, direction)]
+        for field, order in reversed(keys):
+            self._docs.sort(key=lambda d: (_get(d, field) is _MISSING, _get(d, field)), reverse=order < 0)
+        return self
+
+    def skip(self, count: int):
+        self._skip = count
+        return self
+
+    def limit(self, count: int):
+        self._limit = count
+        return self
+
+    def _selected(self):
+        docs = self._docs[self._skip:]
+        if self._limit:
+            docs = docs[:self._limit]
+        return [_project(d, self._projection) for d in docs]
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self._selected():
+            yield doc
+
+    async def to_list(self, length: Optional[int] = None):
+        docs = self._selected()
+        return docs if length is None else docs[:length]
+
+
+class MemoryCollection:
+    def __init__(self, name: str):
+        self.name = name
+        self._docs: Dict[Any, Dict[str, Any]] = {}
+
+    def _find(self, query) -> List[Dict[str, Any]]:
+        _id = (query or {}).get("_id")
+        if _id is not None and not isinstance(_id, dict):
+            doc = self._docs.get(_id)
+            return [doc] if doc is not None and matches(doc, query) else []
+        return [d for d in self._docs.values() if matches(d, query)]
+
+    async def create_index(self, *args, **kwargs):
+        return None
+
+    async def find_one(self, query=None, projection=None):
+        found = self._find(query)
+        return _project(found[0], projection) if found else None
+
+    def find(self, query=None, projection=None):
+        return MemoryCursor(self._find(query), projection)
+
+    async def count_documents(self, query=None):
+        return len(self._find(query))
+
+    async def insert_one(self, doc):
+        doc.setdefault("_id", ObjectId())
+        if doc["_id"] in self._docs:
+            raise ValueError(f"Duplicate _id {doc['_id']} in {self.name}")
+        self._docs[doc["_id"]] = copy.deepcopy(doc)
+        return SimpleNamespace(inserted_id=doc["_id"], acknowledged=True)
+
+    async def insert_many(self, docs, ordered: bool = True):
+        ids = [(await self.insert_one(doc)).inserted_id for doc in docs]
+        return SimpleNamespace(inserted_ids=ids, acknowledged=True)
+
+    def _upsert_doc(self, query, update):
+        doc = {k: copy.deepcopy(v) for k, v in query.items() if not k.startswith("$") and not isinstance(v, dict)}
+        _apply_update(doc, update, inserting=True)
+        doc.setdefault("_id", ObjectId())
+        self._docs[doc["_id"]] = doc
+        return doc
+
+    async def update_one(self, query, update, upsert: bool = False):
+        found = self._find(query)
+        if found:
+            _apply_update(found[0], update, inserting=False)
+            return SimpleNamespace(matched_count=1, modified_count=1, upserted_id=None)
+        if upsert:
+            doc = self._upsert_doc(query, update)
+            return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=doc["_id"])
+        return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=None)
+
+    async def update_many(self, query, update, upsert: bool = False):
+        found = self._find(query)
+        for doc in found:
+            _apply_update(doc, update, inserting=False)
+        if not found and upsert:
+            return await self.update_one(query, update, upsert=True)
+        return SimpleNamespace(matched_count=len(found), modified_count=len(found), upserted_id=None)
+
+    async def replace_one(self, query, replacement, upsert: bool = False):
+        found = self._find(query)
+        if found:
+            doc = copy.deepcopy(replacement)
+            doc["_id"] = found[0]["_id"]
+            self._docs[doc["_id"]] = doc
+            return SimpleNamespace(matched_count=1, modified_count=1, upserted_id=None)
+        if upsert:
+            doc = copy.deepcopy(replacement)
+            doc.setdefault("_id", query.get("_id", ObjectId()))
+            self._docs[doc["_id"]] = doc
+            return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=doc["_id"])
+        return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=None)
+
+    async def find_one_and_update(self, query, update, projection=None, upsert: bool = False,
+                                  return_document=ReturnDocument.BEFORE):
+        found = self._find(query)
+        if not found:
+            if not upsert:
+                return None
+            doc = self._upsert_doc(query, update)
+            return _project(doc, projection) if return_document == ReturnDocument.AFTER else None
+        before = _project(found[0], projection)
+        _apply_update(found[0], update, inserting=False)
+        return _project(found[0], projection) if return_document == ReturnDocument.AFTER else before
+
+    async def bulk_write(self, requests, ordered: bool = True):
+        for request in requests:
+            await self.update_one(request._filter, request._doc, upsert=request._upsert)
+        return SimpleNamespace(acknowledged=True)
+
+    async def delete_one(self, query):
+        found = self._find(query)
+        if found:
+            del self._docs[found[0]["_id"]]
+        return SimpleNamespace(deleted_count=len(found[:1]))
+
+    async def delete_many(self, query):
+        found = self._find(query)
+        for doc in found:
+            del self._docs[doc["_id"]]
+        return SimpleNamespace(deleted_count=len(found))
+
+    def aggregate(self, pipeline):
+        docs = [copy.deepcopy(d) for d in self._docs.values()]
+        for stage in pipeline:
+            (op, spec), = stage.items()
+            if op == "$match":
+                docs = [d for d in docs if matches(d, spec)]
+            elif op == "$group":
+                docs = _group(docs, spec)
+            elif op == "$sort":
+                for field, order in reversed(list(spec.items())):
+                    docs.sort(key=lambda d: (_get(d, field) is _MISSING, _get(d, field)), reverse=order < 0)
+            elif op == "$limit":
+                docs = docs[:spec]
+            else:
+                raise NotImplementedError(f"Aggregation stage {op} is not supported by the in-memory database")
+        return MemoryCursor(docs)
+
+
+class MemoryDatabase:
+    def __init__(self, name: str = "writeflow_bench"):
+        self.name = name
+        self._collections: Dict[str, MemoryCollection] = {}
+
+    def __getitem__(self, name: str) -> MemoryCollection:
+        if name not in self._collections:
+            self._collections[name] = MemoryCollection(name)
+        return self._collections[name]
+
+    def __getattr__(self, name: str) -> MemoryCollection:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
@@ -0,0 +1,255 @@
+"""Repositories over Motor collections (or anything with the same async API, e.g. MemoryDatabase)"""
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from app.repositories.base import CommentRepository, DocumentRepository, SuggestionRepository, UserRepository
+from app.repositories.codec import DictionaryStore
+from app.repositories.content import ChunkStore
+
+
+def _oid(value) -> Optional[ObjectId]:
+    if isinstance(value, ObjectId):
+        return value
+    return ObjectId(value) if ObjectId.is_valid(value) else None
+
+
+def _out(doc: Optional[dict]) -> Optional[dict]:
+    if doc is not None:
+        doc["_id"] = str(doc["_id"])
+    return doc
+
+
+def _in(record: dict) -> dict:
+    record = dict(record)
+    record["_id"] = _oid(record.get("_id")) or ObjectId()
+    return record
+
+
+async def _group_counts(collection, match: dict, field: str) -> Dict:
+    counts = {}
+    async for result in collection.aggregate([
+        {"$match": match},
+        {"$group": {"_id": f"${field}", "count": {"$sum": 1}}},
+    ]):
+        counts[result["_id"]] = result["count"]
+    return counts
+
+
+class MongoDocumentRepository(DocumentRepository):
+    def __init__(self, collection, analytics_collection=None):
+        self.collection = collection
+        # Aggregations may go to secondaries (see get_analytics_database)
+        self.analytics_collection = analytics_collection if analytics_collection is not None else collection
+
+    async def insert(self, record: dict) -> str:
+        result = await self.collection.insert_one(_in(record))
+        return str(result.inserted_id)
+
+    async def get(self, doc_id: str, user_id: Optional[str] = None, content: bool = True) -> Optional[dict]:
+        obj_id = _oid(doc_id)
+        if obj_id is None:
+            return None
+        query = {"_id": obj_id}
+        if user_id:
+            query["user_id"] = user_id
+        return _out(await self.collection.find_one(query, None if content else {"content": 0, "content_encoded": 0}))
+
+    async def list_by_user(self, user_id: str) -> List[dict]:
+        return [_out(doc) async for doc in self.collection.find({"user_id": user_id})]
+
+    async def get_many(self, doc_ids: Iterable[str], user_id: Optional[str] = None) -> List[dict]:
+        query = {"_id": {"$in": [oid for oid in map(_oid, doc_ids) if oid is not None]}}
+        if user_id:
+            query["user_id"] = user_id
+        return [_out(doc) async for doc in self.collection.find(query)]
+
+    async def update(self, doc_id: str, user_id: str, changes: dict, version: Optional[int] = None,
+                     check_version: bool = False) -> bool:
+        obj_id = _oid(doc_id)
+        if obj_id is None:
+            return False
+        query = {"_id": obj_id, "user_id": user_id}
+        if not check_version or version is not None:
+            versioned = {**query, "version": version if check_version else {"$exists": True}}
+            result = await self.collection.update_one(versioned, {"$set": changes, "$inc": {"version": 1}})
+            if result.matched_count or check_version:
+                return result.matched_count > 0
+        # Records saved before versions were stored read as version 1, so their first edit makes it 2
+        result = await self.collection.update_one(
+            {**query, "version": {"$exists": False}}, {"$set": {**changes, "version": 2}}
+        )
+        return result.matched_count > 0
+
+    async def rewrite(self, doc_id: str, version: Optional[int], changes: dict) -> bool:
+        obj_id = _oid(doc_id)
+        if obj_id is None:
+            return False
+        result = await self.collection.update_one({"_id": obj_id, "version": version}, {"$set": changes})
+        return result.matched_count > 0
+
+    async def scan(self, user_id: Optional[str] = None, fields: Iterable[str] = ("content", "user_id")):
+        query = {"user_id": user_id} if user_id else {}
+        async for doc in self.collection.find(query, {field: 1 for field in fields}):
+            yield _out(doc)
+
+    async def totals(self, user_id: str) -> Dict[str, int]:
+        # Summed server-side without loading every document
+        async for result in self.analytics_collection.aggregate([
+            {"$match": {"user_id": user_id}},
+            {"$group": {"_id": None, "documents": {"$sum": 1}, "words": {"$sum": "$word_count"}}}
+        ]):
+            return {"documents": result["documents"], "words": result["words"]}
+        return {"documents": 0, "words": 0}
+
+    async def count_by(self, user_id: str, field: str) -> Dict[str, int]:
+        return await _group_counts(self.analytics_collection, {"user_id": user_id}, field)
+
+
+class MongoUserRepository(UserRepository):
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def insert(self, record: dict) -> str:
+        try:
+            result = await self.collection.insert_one(_in(record))
+        except DuplicateKeyError:  # unique email index
+            raise ValueError("User with this email already exists")
+        return str(result.inserted_id)
+
+    async def get(self, user_id: str) -> Optional[dict]:
+        obj_id = _oid(user_id)
+        return _out(await self.collection.find_one({"_id": obj_id})) if obj_id else None
+
+    async def get_by_email(self, email: str) -> Optional[dict]:
+        return _out(await self.collection.find_one({"email": email}))
+
+    async def update(self, user_id: str, changes: dict) -> bool:
+        obj_id = _oid(user_id)
+        if obj_id is None:
+            return False
+        result = await self.collection.update_one({"_id": obj_id}, {"$set": changes})
+        return result.matched_count > 0
+
+
+class MongoSuggestionRepository(SuggestionRepository):
+    def __init__(self, collection, analytics_collection=None):
+        self.collection = collection
+        self.analytics_collection = analytics_collection if analytics_collection is not None else collection
+
+    async def insert_many(self, records: List[dict]) -> List[str]:
+        result = await self.collection.insert_many([_in(record) for record in records])
+        return [str(inserted_id) for inserted_id in result.inserted_ids]
+
+    async def list_for_document(self, document_id: str, user_id: str, include_dismissed: bool = False) -> List[dict]:
+        query = {"document_id": document_id, "user_id": user_id}
+        if not include_dismissed:
+            query["is_dismissed"] = False
+        cursor = self.collection.find(query).sort("created_at", -1)
+        return [_out(doc) async for doc in cursor]
+
+    async def mark(self, suggestion_id: str, user_id: str, flag: str) -> Optional[dict]:
+        obj_id = _oid(suggestion_id)
+        if obj_id is None:
+            return None
+        return _out(await self.collection.find_one_and_update(
+            {"_id": obj_id, "user_id": user_id, flag: {"$ne": True}},
+            {"$set": {flag: True}},
+            return_document=ReturnDocument.AFTER
+        ))
+
+    async def count_by_type(self, user_id: str, document_id: Optional[str] = None) -> Dict[str, int]:
+        match = {"user_id": user_id}
+        if document_id:
+            match["document_id"] = document_id
+        return await _group_counts(self.analytics_collection, match, "type")
+
+    async def reviewed(self, user_id: Optional[str] = None):
+        query = {"$or": [{"is_applied": True}, {"is_dismissed": True}]}
+        if user_id:
+            query["user_id"] = user_id
+        async for doc in self.collection.find(query, {"user_id": 1, "created_at": 1, "is_applied": 1, "is_dismissed": 1}):
+            yield _out(doc)
+
+    async def scan(self, user_id: Optional[str] = None, fields: Iterable[str] = ("explanation",)):
+        query = {"user_id": user_id} if user_id else {}
+        async for doc in self.collection.find(query, {field: 1 for field in fields}):
+            yield _out(doc)
+
+    async def update(self, suggestion_id: str, changes: dict) -> bool:
+        obj_id = _oid(suggestion_id)
+        if obj_id is None:
+            return False
+        result = await self.collection.update_one({"_id": obj_id}, {"$set": changes})
+        return result.matched_count > 0
+
+
+class MongoCommentRepository(CommentRepository):
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def insert(self, record: dict) -> str:
+        result = await self.collection.insert_one(_in(record))
+        return str(result.inserted_id)
+
+    async def get(self, comment_id: str) -> Optional[dict]:
+        obj_id = _oid(comment_id)
+        return _out(await self.collection.find_one({"_id": obj_id})) if obj_id else None
+
+    async def list_for_document(self, document_id: str) -> List[dict]:
+        cursor = self.collection.find({"document_id": document_id}).sort("created_at", -1)
+        return [_out(doc) async for doc in cursor]
+
+    async def update(self, comment_id: str, changes: dict, user_id: Optional[str] = None) -> bool:
+        obj_id = _oid(comment_id)
+        if obj_id is None:
+            return False
+        query = {"_id": obj_id}
+        if user_id:
+            query["user_id"] = user_id
+        result = await self.collection.update_one(query, {"$set": changes})
+        return result.matched_count > 0
+
+    async def delete(self, comment_id: str, user_id: str) -> bool:
+        obj_id = _oid(comment_id)
+        if obj_id is None:
+            return False
+        result = await self.collection.delete_one({"_id": obj_id, "user_id": user_id})
+        return result.deleted_count > 0
+
+
+class MongoChunkStore(ChunkStore):
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def put_many(self, document_id: str, chunks):
+        # Plain chunks keep a readable "text" field; encoded ones are stored as binary "data"
+        await self.collection.insert_many([
+            {"_id": chunk_id, "document_id": document_id, "text" if isinstance(payload, str) else "data": payload}
+            for chunk_id, payload in chunks
+        ])
+
+    async def get_many(self, chunk_ids):
+        return {
+            doc["_id"]: doc["text"] if "text" in doc else doc["data"]
+            async for doc in self.collection.find({"_id": {"$in": list(chunk_ids)}})
+        }
+
+    async def delete_many(self, chunk_ids):
+        await self.collection.delete_many({"_id": {"$in": list(chunk_ids)}})
+
+
+class MongoDictionaryStore(DictionaryStore):
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def load(self):
+        return [(doc["_id"], doc["data"]) async for doc in self.collection.find().sort("created_at", 1)]
+
+    async def save(self, dict_id: int, data: bytes):
+        await self.collection.update_one(
+            {"_id": dict_id}, {"$setOnInsert": {"data": data, "created_at": datetime.utcnow()}}, upsert=True
+        )
@@ -0,0 +1,411 @@
+"""Repositories on an embedded SQL database (SQLite by default) via SQLAlchemy Core.
+
+Each record is stored whole as Extended JSON (bson.json_util, so datetimes
+and ObjectIds round-trip) next to a few promoted columns used for lookups,
+ordering and grouping. SQLAlchemy's engine is synchronous, so every call
+runs on one dedicated worker thread: SQLite allows a single writer anyway,
+and a single connection lets `sqlite://` (in-memory) work across calls.
+"""
+import asyncio
+import functools
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional
+
+from bson import ObjectId, json_util
+from sqlalchemy import (
+    Boolean, Column, DateTime, Integer, LargeBinary, MetaData, String, Table, Text, create_engine, event, func, select
+)
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.pool import StaticPool
+
+from app.repositories.base import CommentRepository, DocumentRepository, SuggestionRepository, UserRepository
+from app.repositories.codec import DictionaryStore
+from app.repositories.content import ChunkStore
+from app.services import profiling
+
+SCAN_BATCH = 500
+
+metadata = MetaData()
+
+documents = Table(
+    "documents", metadata,
+    Column("id", String(24), primary_key=True),
+    Column("user_id", String(24), index=True),
+    Column("writing_goal", String(64)),
+    Column("word_count", Integer),
+    Column("created_at", DateTime),
+    # Kept out of the JSON so metadata reads can skip them
+    Column("content", Text, info={"detached": True}),
+    Column("content_encoded", LargeBinary, info={"detached": True}),
+    Column("data", Text, nullable=False),
+)
+document_chunks = Table(
+    "document_chunks", metadata,
+    Column("id", String(24), primary_key=True),
+    Column("document_id", String(24), index=True),
+    # Plain chunks in text, encoded ones in data
+    Column("text", Text),
+    Column("data", LargeBinary),
+)
+users = Table(
+    "users", metadata,
+    Column("id", String(24), primary_key=True),
+    Column("email", String(320), unique=True, nullable=False),
+    Column("data", Text, nullable=False),
+)
+suggestions = Table(
+    "suggestions", metadata,
+    Column("id", String(24), primary_key=True),
+    Column("user_id", String(24), index=True),
+    Column("document_id", String(24), index=True),
+    Column("type", String(64)),
+    Column("is_applied", Boolean),
+    Column("is_dismissed", Boolean),
+    Column("created_at", DateTime),
+    Column("explanation_encoded", LargeBinary, info={"detached": True}),
+    Column("data", Text, nullable=False),
+)
+comments = Table(
+    "comments", metadata,
+    Column("id", String(24), primary_key=True),
+    Column("user_id", String(24), index=True),
+    Column("document_id", String(24), index=True),
+    Column("created_at", DateTime),
+    Column("data", Text, nullable=False),
+)
+content_dictionaries = Table(
+    "content_dictionaries", metadata,
+    Column("id", Integer, primary_key=True, autoincrement=False),
+    Column("data", LargeBinary, nullable=False),
+    Column("created_at", DateTime, nullable=False),
+)
+
+
+def _row(table: Table, record: dict) -> dict:
+    """Column values for a record; "_id" becomes the primary key, the rest is kept as JSON"""
+    data = {k: v for k, v in record.items() if k != "_id"}
+    row = {"id": str(record["_id"])}
+    for column in table.columns:
+        if column.name in ("id", "data"):
+            continue
+        if column.info.get("detached"):
+            row[column.name] = data.pop(column.name, None)
+        else:
+            row[column.name] = data.get(column.name)
+    row["data"] = json_util.dumps(data)
+    return row
+
+
+def _record(row, fields: Optional[Iterable[str]] = None) -> dict:
+    data = json_util.loads(row.data)
+    mapping = row._mapping
+    for column in row._fields:
+        if column not in ("id", "data") and column not in data and mapping[column] is not None:
+            data[column] = mapping[column]
+    if fields is not None:
+        data = {k: data[k] for k in fields if k in data}
+    data["_id"] = row.id
+    return data
+
+
+def _without_content():
+    return select(*[column for column in documents.c if column.name not in ("content", "content_encoded")])
+
+
+def _new_id(record: dict) -> dict:
+    record = dict(record)
+    record["_id"] = str(record.get("_id") or ObjectId())
+    return record
+
+
+class SQLStorage:
+    """Engine plus the single worker thread all statements run on"""
+
+    def __init__(self, url: str):
+        self.url = make_url(url)
+        options = {}
+        if self.url.get_backend_name() == "sqlite":
+            options = {"poolclass": StaticPool, "connect_args": {"check_same_thread": False}}
+        self.engine = create_engine(self.url, **options)
+        if self.url.get_backend_name() == "sqlite":
+            event.listen(self.engine, "connect", _sqlite_pragmas)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sql-storage")
+
+    async def run(self, func, *args, **kwargs):
+        call = profiling.propagate(functools.partial(func, *args, **kwargs))
+        return await asyncio.get_running_loop().run_in_executor(self._executor, call)
+
+    async def open(self):
+        await self.run(metadata.create_all, self.engine)
+
+    async def close(self):
+        await self.run(self.engine.dispose)
+        self._executor.shutdown(wait=False)
+
+    # Blocking helpers, called through run()
+    def insert(self, table: Table, records: List[dict]) -> List[str]:
+        rows = [_row(table, record) for record in records]
+        with self.engine.begin() as conn:
+            conn.execute(table.insert(), rows)
+        return [row["id"] for row in rows]
+
+    def select(self, statement, fields: Optional[Iterable[str]] = None) -> List[dict]:
+        with self.engine.connect() as conn:
+            return [_record(row, fields) for row in conn.execute(statement)]
+
+    def scalars(self, statement) -> list:
+        with self.engine.connect() as conn:
+            return list(conn.execute(statement))
+
+    def update(self, table: Table, where, changes: dict, increment: Optional[str] = None,
+               unless: Optional[str] = None, expect: Optional[dict] = None, missing: int = 0) -> Optional[dict]:
+        """Merge `changes` into the first matching record; the updated record, or None when none matched.
+
+        `increment` names a counter field to bump, taken to be `missing` when unset; `unless` names a
+        flag that must not already be set; `expect` gives field values the record must still have.
+        """
+        with self.engine.begin() as conn:
+            row = conn.execute(select(table).where(*where)).first()
+            if row is None:
+                return None
+            record = _record(row)
+            if unless and record.get(unless):
+                return None
+            if expect and any(record.get(field) != value for field, value in expect.items()):
+                return None
+            record.update(changes)
+            if increment:
+                current = record.get(increment)
+                record[increment] = (missing if current is None else current) + 1  # like $inc
+            conn.execute(table.update().where(table.c.id == row.id).values(**_row(table, record)))
+            return record
+
+    def delete(self, table: Table, where) -> int:
+        with self.engine.begin() as conn:
+            return conn.execute(table.delete().where(*where)).rowcount
+
+    async def scan(self, statement, fields: Optional[Iterable[str]] = None):
+        """Yield records in primary-key batches so large tables are not loaded at once"""
+        table = statement.get_final_froms()[0]
+        last_id = ""
+        while True:
+            batch = await self.run(
+                self.select, statement.where(table.c.id > last_id).order_by(table.c.id).limit(SCAN_BATCH), fields
+            )
+            for record in batch:
+                yield record
+            if len(batch) < SCAN_BATCH:
+                return
+            last_id = batch[-1]["_id"]
+
+
+def _sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    # WAL lets readers proceed during writes; NORMAL fsyncs at checkpoints only
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
+
+
+class SQLDocumentRepository(DocumentRepository):
+    def __init__(self, storage: SQLStorage):
+        self.storage = storage
+
+    async def insert(self, record: dict) -> str:
+        return (await self.storage.run(self.storage.insert, documents, [_new_id(record)]))[0]
+
+    async def get(self, doc_id: str, user_id: Optional[str] = None, content: bool = True) -> Optional[dict]:
+        statement = (select(documents) if content else _without_content()).where(documents.c.id == str(doc_id))
+        if user_id:
+            statement = statement.where(documents.c.user_id == user_id)
+        found = await self.storage.run(self.storage.select, statement)
+        return found[0] if found else None
+
+    async def list_by_user(self, user_id: str) -> List[dict]:
+        return await self.storage.run(self.storage.select, select(documents).where(documents.c.user_id == user_id))
+
+    async def get_many(self, doc_ids: Iterable[str], user_id: Optional[str] = None) -> List[dict]:
+        statement = select(documents).where(documents.c.id.in_([str(d) for d in doc_ids]))
+        if user_id:
+            statement = statement.where(documents.c.user_id == user_id)
+        return await self.storage.run(self.storage.select, statement)
+
+    async def update(self, doc_id: str, user_id: str, changes: dict, version: Optional[int] = None,
+                     check_version: bool = False) -> bool:
+        where = (documents.c.id == str(doc_id), documents.c.user_id == user_id)
+        expect = {"version": version} if check_version else None
+        # Records saved before versions were stored read as version 1
+        updated = await self.storage.run(
+            self.storage.update, documents, where, changes, increment="version", expect=expect, missing=1
+        )
+        return updated is not None
+
+    async def rewrite(self, doc_id: str, version: Optional[int], changes: dict) -> bool:
+        where = (documents.c.id == str(doc_id),)
+        updated = await self.storage.run(self.storage.update, documents, where, changes, expect={"version": version})
+        return updated is not None
+
+    async def scan(self, user_id: Optional[str] = None, fields: Iterable[str] = ("content", "user_id")):
+        fields = tuple(fields)
+        statement = select(documents) if "content" in fields else _without_content()
+        if user_id:
+            statement = statement.where(documents.c.user_id == user_id)
+        async for record in self.storage.scan(statement, fields):
+            yield record
+
+    async def totals(self, user_id: str) -> Dict[str, int]:
+        statement = select(func.count(), func.coalesce(func.sum(documents.c.word_count), 0)).where(
+            documents.c.user_id == user_id
+        )
+        (count, words), = await self.storage.run(self.storage.scalars, statement)
+        return {"documents": count, "words": words}
+
+    async def count_by(self, user_id: str, field: str) -> Dict[str, int]:
+        if field in documents.c:
+            column = documents.c[field]
+            statement = select(column, func.count()).where(documents.c.user_id == user_id).group_by(column)
+            return dict(await self.storage.run(self.storage.scalars, statement))
+        counts: Dict = {}
+        async for record in self.scan(user_id, fields=(field,)):
+            counts[record.get(field)] = counts.get(record.get(field), 0) + 1
+        return counts
+
+
+class SQLUserRepository(UserRepository):
+    def __init__(self, storage: SQLStorage):
+        self.storage = storage
+
+    async def insert(self, record: dict) -> str:
+        try:
+            return (await self.storage.run(self.storage.insert, users, [_new_id(record)]))[0]
+        except IntegrityError:
+            raise ValueError("User with this email already exists")
+
+    async def get(self, user_id: str) -> Optional[dict]:
+        found = await self.storage.run(self.storage.select, select(users).where(users.c.id == str(user_id)))
+        return found[0] if found else None
+
+    async def get_by_email(self, email: str) -> Optional[dict]:
+        found = await self.storage.run(self.storage.select, select(users).where(users.c.email == email))
+        return found[0] if found else None
+
+    async def update(self, user_id: str, changes: dict) -> bool:
+        return await self.storage.run(self.storage.update, users, (users.c.id == str(user_id),), changes) is not None
+
+
+class SQLSuggestionRepository(SuggestionRepository):
+    def __init__(self, storage: SQLStorage):
+        self.storage = storage
+
+    async def insert_many(self, records: List[dict]) -> List[str]:
+        return await self.storage.run(self.storage.insert, suggestions, [_new_id(record) for record in records])
+
+    async def list_for_document(self, document_id: str, user_id: str, include_dismissed: bool = False) -> List[dict]:
+        statement = select(suggestions).where(
+            suggestions.c.document_id == document_id, suggestions.c.user_id == user_id
+        ).order_by(suggestions.c.created_at.desc())
+        if not include_dismissed:
+            statement = statement.where(suggestions.c.is_dismissed.is_(False))
+        return await self.storage.run(self.storage.select, statement)
+
+    async def mark(self, suggestion_id: str, user_id: str, flag: str) -> Optional[dict]:
+        where = (suggestions.c.id == str(suggestion_id), suggestions.c.user_id == user_id)
+        return await self.storage.run(self.storage.update, suggestions, where, {flag: True}, unless=flag)
+
+    async def count_by_type(self, user_id: str, document_id: Optional[str] = None) -> Dict[str, int]:
+        statement = select(suggestions.c.type, func.count()).where(suggestions.c.user_id == user_id)
+        if document_id:
+            statement = statement.where(suggestions.c.document_id == document_id)
+        return dict(await self.storage.run(self.storage.scalars, statement.group_by(suggestions.c.type)))
+
+    async def reviewed(self, user_id: Optional[str] = None):
+        statement = select(suggestions).where(suggestions.c.is_applied.is_(True) | suggestions.c.is_dismissed.is_(True))
+        if user_id:
+            statement = statement.where(suggestions.c.user_id == user_id)
+        async for record in self.storage.scan(statement, ("user_id", "created_at", "is_applied", "is_dismissed")):
+            yield record
+
+    async def scan(self, user_id: Optional[str] = None, fields: Iterable[str] = ("explanation",)):
+        statement = select(suggestions)
+        if user_id:
+            statement = statement.where(suggestions.c.user_id == user_id)
+        async for record in self.storage.scan(statement, tuple(fields)):
+            yield record
+
+    async def update(self, suggestion_id: str, changes: dict) -> bool:
+        where = (suggestions.c.id == str(suggestion_id),)
+        return await self.storage.run(self.storage.update, suggestions, where, changes) is not None
+
+
+class SQLCommentRepository(CommentRepository):
+    def __init__(self, storage: SQLStorage):
+        self.storage = storage
+
+    async def insert(self, record: dict) -> str:
+        return (await self.storage.run(self.storage.insert, comments, [_new_id(record)]))[0]
+
+    async def get(self, comment_id: str) -> Optional[dict]:
+        found = await self.storage.run(self.storage.select, select(comments).where(comments.c.id == str(comment_id)))
+        return found[0] if found else None
+
+    async def list_for_document(self, document_id: str) -> List[dict]:
+        statement = select(comments).where(comments.c.document_id == document_id).order_by(comments.c.created_at.desc())
+        return await self.storage.run(self.storage.select, statement)
+
+    async def update(self, comment_id: str, changes: dict, user_id: Optional[str] = None) -> bool:
+        where = [comments.c.id == str(comment_id)]
+        if user_id:
+            where.append(comments.c.user_id == user_id)
+        return await self.storage.run(self.storage.update, comments, where, changes) is not None
+
+    async def delete(self, comment_id: str, user_id: str) -> bool:
+        where = (comments.c.id == str(comment_id), comments.c.user_id == user_id)
+        return await self.storage.run(self.storage.delete, comments, where) > 0
+
+
+class SQLChunkStore(ChunkStore):
+    def __init__(self, storage: SQLStorage):
+        self.storage = storage
+
+    def _insert(self, rows):
+        with self.storage.engine.begin() as conn:
+            conn.execute(document_chunks.insert(), rows)
+
+    async def put_many(self, document_id: str, chunks):
+        rows = [
+            {"id": chunk_id, "document_id": document_id,
+             "text": payload if isinstance(payload, str) else None,
+             "data": None if isinstance(payload, str) else payload}
+            for chunk_id, payload in chunks
+        ]
+        await self.storage.run(self._insert, rows)
+
+    async def get_many(self, chunk_ids):
+        statement = select(document_chunks.c.id, document_chunks.c.text, document_chunks.c.data).where(
+            document_chunks.c.id.in_(list(chunk_ids))
+        )
+        rows = await self.storage.run(self.storage.scalars, statement)
+        return {chunk_id: text if text is not None else data for chunk_id, text, data in rows}
+
+    async def delete_many(self, chunk_ids):
+        await self.storage.run(self.storage.delete, document_chunks, (document_chunks.c.id.in_(list(chunk_ids)),))
+
+
+class SQLDictionaryStore(DictionaryStore):
+    def __init__(self, storage: SQLStorage):
+        self.storage = storage
+
+    def _save(self, dict_id: int, data: bytes):
+        with self.storage.engine.begin() as conn:
+            if conn.execute(select(content_dictionaries.c.id).where(content_dictionaries.c.id == dict_id)).first():
+                return
+            conn.execute(content_dictionaries.insert(), {"id": dict_id, "data": data, "created_at": datetime.utcnow()})
+
+    async def load(self):
+        statement = select(content_dictionaries.c.id, content_dictionaries.c.data).order_by(content_dictionaries.c.created_at)
+        return [(dict_id, data) for dict_id, data in await self.storage.run(self.storage.scalars, statement)]
+
+    async def save(self, dict_id: int, data: bytes):
+        await self.storage.run(self._save, dict_id, data)
@@ -1,12 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from pydantic import BaseModel
-from app.models.analytics import DocumentAnalytics, ReadabilityAnalysis, WritingStats, UserStats
+from app.models.analytics import DocumentAnalytics, ReadabilityAnalysis, WritingStats, UserStats, KeywordExtraction
 from app.models.user import User
 from app.services.ai_service import ai_service
-from app.services.document_service import document_service
-from app.database import get_database
-from app.dependencies import get_current_active_user
+from app.services.plagiarism_service import plagiarism_service
+from app.services.keyword_service import keyword_service
+from app.services.scheduler import scheduler, BACKGROUND, BULK
+from app.services.rollup_service import rollup_service
+from app.services.conditional import (
+    conditional_json, corpus_window, document_parts, if_none_match, not_modified, strong_etag, tag_response
+)
+import app.services.document_service as ds_module
+from app.repositories import repositories
+from app.dependencies import get_admin_user, get_current_active_user
 from datetime import datetime
+from typing import Optional
 import logging
 
 logger = logging.getLogger(__name__)
@@ -16,49 +24,65 @@ router = APIRouter(prefix="/analytics", tags=["analytics"])
 class AnalyticsRequest(BaseModel):
     content: str
 
+def _analyze_content(content: str):
+    """CPU-bound analyzers for one document, run as a single background job"""
+    return (
+        ai_service.analyze_readability(content),
+        ai_service.analyze_tone(content),
+        ai_service.calculate_writing_stats(content),
+    )
+
+async def _owned_document(document_id: str, user_id: str, include_content: bool = True):
+    document = await ds_module.document_service.get_document(document_id, user_id, include_content=include_content)
+    if not document:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Document not found"
+        )
+    return document
+
 @router.get("/document/{document_id}", response_model=DocumentAnalytics)
 async def get_document_analytics(
     document_id: str,
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_active_user)
 ):
     """Get comprehensive analytics for a document"""
     # Verify document ownership
-    document = await document_service.get_document(document_id, current_user.id)
-    if not document:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Document not found"
-        )
+    meta = await _owned_document(document_id, current_user.id, include_content=False)
+
+    # Get suggestions count by type
+    suggestions_count = await repositories.suggestions.count_by_type(current_user.id, document_id)
+
+    # The plagiarism score also depends on other users' documents, revalidated per time window
+    tag = strong_etag("analytics", document_parts(meta), suggestions_count, corpus_window())
+    if if_none_match(request, tag):
+        return not_modified(request, tag)
+    document = await _owned_document(document_id, current_user.id)
     
     try:
         # Generate analytics
-        readability = ai_service.analyze_readability(document.content)
-        tone = ai_service.analyze_tone(document.content)
-        stats = ai_service.calculate_writing_stats(document.content)
-        plagiarism_score = ai_service.check_plagiarism(document.content)
-        
-        # Get suggestions count by type
-        db = await get_database()
-        suggestions_pipeline = [
-            {"$match": {"document_id": document_id, "user_id": current_user.id}},
-            {"$group": {"_id": "$type", "count": {"$sum": 1}}}
-        ]
-        
-        suggestions_count = {}
-        async for result in db["suggestions"].aggregate(suggestions_pipeline):
-            suggestions_count[result["_id"]] = result["count"]
+        readability, tone, stats = await scheduler.run(BACKGROUND, _analyze_content, document.content)
+        plagiarism = await scheduler.run(
+            BACKGROUND, plagiarism_service.check, document.content,
+            user_id=current_user.id, exclude_document_id=document_id
+        )
         
         analytics = DocumentAnalytics(
             document_id=document_id,
             readability=readability,
             tone=tone,
             stats=stats,
-            plagiarism_score=plagiarism_score,
+            plagiarism_score=plagiarism.plagiarism_score,
             suggestions_count=suggestions_count,
             generated_at=datetime.utcnow()
         )
         
+        tag_response(response, strong_etag("analytics", document_parts(document), suggestions_count, corpus_window()))
         return analytics
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error generating document analytics: {e}")
         raise HTTPException(
@@ -69,18 +93,23 @@ async def get_document_analytics(
 @router.get("/document/{document_id}/readability", response_model=ReadabilityAnalysis)
 async def get_readability_analysis(
     document_id: str,
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_active_user)
 ):
     """Get readability analysis for a document"""
-    document = await document_service.get_document(document_id, current_user.id)
-    if not document:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Document not found"
-        )
+    meta = await _owned_document(document_id, current_user.id, include_content=False)
+    tag = strong_etag("readability", document_parts(meta))
+    if if_none_match(request, tag):
+        return not_modified(request, tag)
+    document = await _owned_document(document_id, current_user.id)
     
     try:
-        return ai_service.analyze_readability(document.content)
+        readability = await scheduler.run(BACKGROUND, ai_service.analyze_readability, document.content)
+        tag_response(response, strong_etag("readability", document_parts(document)))
+        return readability
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error analyzing readability: {e}")
         raise HTTPException(
@@ -88,40 +117,27 @@ async def get_readability_analysis(
             detail="Failed to analyze readability"
         )
 
-@router.get("/document/{document_id}/keywords")
+@router.get("/document/{document_id}/keywords", response_model=KeywordExtraction)
 async def extract_keywords(
     document_id: str,
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_active_user)
 ):
-    """Extract keywords from a document"""
-    document = await document_service.get_document(document_id, current_user.id)
-    if not document:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Document not found"
-        )
+    """Extract keywords (BM25 against the user's corpus), key phrases and entities from a document"""
+    await _owned_document(document_id, current_user.id, include_content=False)
+    # BM25 weights depend on every document of the user
+    tag = strong_etag("keywords", document_id, await ds_module.document_service.document_versions(current_user.id))
+    if if_none_match(request, tag):
+        return not_modified(request, tag)
+    document = await _owned_document(document_id, current_user.id)
     
     try:
-        # Simple keyword extraction (in a real app, use more sophisticated methods)
-        words = document.content.lower().split()
-        word_freq = {}
-        
-        # Filter out common words
-        stop_words = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'are', 'was', 'were', 'be', 'been', 'being', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should', 'may', 'might', 'must', 'can', 'this', 'that', 'these', 'those'}
-        
-        for word in words:
-            word = word.strip('.,!?";()[]{}')
-            if len(word) > 3 and word not in stop_words:
-                word_freq[word] = word_freq.get(word, 0) + 1
-        
-        # Get top keywords
-        keywords = sorted(word_freq.items(), key=lambda x: x[1], reverse=True)[:20]
-        
-        return {
-            "keywords": [{"word": word, "frequency": freq} for word, freq in keywords],
-            "entities": [],  # Placeholder for named entity recognition
-            "topics": []     # Placeholder for topic modeling
-        }
+        keywords = await scheduler.run(BACKGROUND, keyword_service.extract, document.content, current_user.id)
+        tag_response(response, tag)
+        return keywords
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error extracting keywords: {e}")
         raise HTTPException(
@@ -131,50 +147,37 @@ async def extract_keywords(
 
 @router.get("/user/stats", response_model=UserStats)
 async def get_user_stats(
+    request: Request,
     current_user: User = Depends(get_current_active_user)
 ):
     """Get user writing statistics"""
     try:
-        db = await get_database()
-        
-        # Get user documents
-        documents = await document_service.get_user_documents(current_user.id)
-        
-        total_documents = len(documents)
-        total_words = sum(doc.word_count for doc in documents)
+        # Totals without loading every document
+        totals = await repositories.documents.totals(current_user.id)
         
-        # Calculate average writing score (simplified)
-        avg_score = 75.0  # Placeholder
+        # Average writing score and productivity trend come from pre-aggregated rollups
+        avg_score = await rollup_service.avg_writing_score(current_user.id)
+        productivity_trend = await rollup_service.productivity_trend(current_user.id, days=7)
         
         # Most used writing goal
-        writing_goals = [doc.writing_goal for doc in documents]
-        most_used_goal = max(set(writing_goals), key=writing_goals.count) if writing_goals else "professional"
-        
-        # Productivity trend (last 7 days)
-        productivity_trend = []  # Placeholder
+        goals = await repositories.documents.count_by(current_user.id, "writing_goal")
+        most_used_goal = (max(goals, key=goals.get) if goals else None) or "professional"
         
         # Improvement areas based on suggestions
-        suggestions_pipeline = [
-            {"$match": {"user_id": current_user.id}},
-            {"$group": {"_id": "$type", "count": {"$sum": 1}}},
-            {"$sort": {"count": -1}},
-            {"$limit": 3}
-        ]
-        
-        improvement_areas = []
-        async for result in db["suggestions"].aggregate(suggestions_pipeline):
-            improvement_areas.append(result["_id"])
+        by_type = await repositories.suggestions.count_by_type(current_user.id)
+        improvement_areas = sorted(by_type, key=by_type.get, reverse=True)[:3]
         
         user_stats = UserStats(
-            total_documents=total_documents,
-            total_words_written=total_words,
-            avg_writing_score=avg_score,
+            total_documents=totals["documents"],
+            total_words_written=totals["words"],
+            avg_writing_score=avg_score or 0.0,
             most_used_writing_goal=most_used_goal,
             productivity_trend=productivity_trend,
             improvement_areas=improvement_areas
         )
         
-        return user_stats
+        # Cheap aggregates; tagged by body so unchanged stats are not re-sent
+        return conditional_json(request, user_stats)
     except Exception as e:
         logger.error(f"Error getting user stats: {e}")
         raise HTTPException(
@@ -182,6 +185,18 @@ async def get_user_stats(
             detail="Failed to get user statistics"
         )
 
+@router.post("/rollups/backfill")
+async def backfill_rollups(
+    user_id: Optional[str] = None,
+    current_user: User = Depends(get_admin_user)
+):
+    """Fill activity rollups missing for stored documents and suggestions (one user, or all when omitted)"""
+    processed = await scheduler.run(
+        BULK, rollup_service.backfill, user_id,
+        readability=lambda content: ai_service.analyze_readability(content).overall_score
+    )
+    return {"message": "Rollups backfilled", "documents_processed": processed}
+
 @router.post("/document/{document_id}/compare")
 async def compare_document_versions(
     document_id: str,
@@ -8,6 +8,9 @@ from app.services.user_service import user_service
 from app.dependencies import get_current_active_user
 from app.services.auth import create_access_token
 from app.models.user import UserCreate, Token, TokenData, User
+import logging
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter( tags=["authentication"])
 
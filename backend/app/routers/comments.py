@@ -2,10 +2,10 @@ from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status
 from app.models.comment import Comment, CommentCreate, CommentUpdate, CommentInDB
 from app.models.user import User
-from app.services.document_service import document_service
-from app.database import get_database
+import app.services.document_service as ds_module
+from app.repositories import repositories
+from app.services.events import COMMENT, CREATED, DELETED, UPDATED, event_bus
 from app.dependencies import get_current_active_user
-from bson import ObjectId
 from datetime import datetime
 import logging
 
@@ -20,15 +20,13 @@ async def create_comment(
 ):
     """Create a new comment"""
     # Verify document ownership or access
-    document = await document_service.get_document(comment.document_id, current_user.id)
+    document = await ds_module.document_service.get_document(comment.document_id, current_user.id, include_content=False)
     if not document:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Document not found"
         )
     
-    db = await get_database()
-    
     comment_data = CommentInDB(
         **comment.dict(),
         user_id=current_user.id,
@@ -38,10 +36,13 @@ async def create_comment(
         updated_at=datetime.utcnow()
     )
     
-    result = await db["comments"].insert_one(comment_data.dict(by_alias=True))
+    comment_id = await repositories.comments.insert(comment_data.dict(by_alias=True))
+    await event_bus.publish(
+        COMMENT, CREATED, id=comment_id, user_id=current_user.id, document_id=comment.document_id
+    )
     
     # Retrieve the created comment
-    created_comment = await db["comments"].find_one({"_id": result.inserted_id})
+    created_comment = await repositories.comments.get(comment_id)
     return Comment.from_db(CommentInDB(**created_comment))
 
 @router.get("/document/{document_id}", response_model=List[Comment])
@@ -51,21 +52,17 @@ async def get_document_comments(
 ):
     """Get all comments for a document"""
     # Verify document ownership or access
-    document = await document_service.get_document(document_id, current_user.id)
+    document = await ds_module.document_service.get_document(document_id, current_user.id, include_content=False)
     if not document:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Document not found"
         )
     
-    db = await get_database()
-    cursor = db["comments"].find({"document_id": document_id}).sort("created_at", -1)
-    
-    comments = []
-    async for comment_doc in cursor:
-        comments.append(Comment.from_db(CommentInDB(**comment_doc)))
-    
-    return comments
+    return [
+        Comment.from_db(CommentInDB(**comment_doc))
+        for comment_doc in await repositories.comments.list_for_document(document_id)
+    ]
 
 @router.put("/{comment_id}", response_model=Comment)
 async def update_comment(
@@ -74,28 +71,24 @@ async def update_comment(
     current_user: User = Depends(get_current_active_user)
 ):
     """Update a comment"""
-    db = await get_database()
-    
     try:
         update_data = {k: v for k, v in comment_update.dict().items() if v is not None}
         update_data["updated_at"] = datetime.utcnow()
         
-        result = await db["comments"].update_one(
-            {
-                "_id": ObjectId(comment_id),
-                "user_id": current_user.id
-            },
-            {"$set": update_data}
-        )
-        
-        if result.modified_count == 0:
+        if not await repositories.comments.update(comment_id, update_data, user_id=current_user.id):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Comment not found"
             )
         
-        updated_comment = await db["comments"].find_one({"_id": ObjectId(comment_id)})
+        updated_comment = await repositories.comments.get(comment_id)
+        await event_bus.publish(
+            COMMENT, UPDATED, id=comment_id, user_id=current_user.id,
+            document_id=updated_comment["document_id"], fields=update_data
+        )
         return Comment.from_db(CommentInDB(**updated_comment))
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error updating comment: {e}")
         raise HTTPException(
@@ -109,21 +102,21 @@ async def delete_comment(
     current_user: User = Depends(get_current_active_user)
 ):
     """Delete a comment"""
-    db = await get_database()
-    
     try:
-        result = await db["comments"].delete_one({
-            "_id": ObjectId(comment_id),
-            "user_id": current_user.id
-        })
-        
-        if result.deleted_count == 0:
+        # Read first: subscribers are keyed by document
+        existing = await repositories.comments.get(comment_id)
+        if not existing or not await repositories.comments.delete(comment_id, current_user.id):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Comment not found"
             )
         
+        await event_bus.publish(
+            COMMENT, DELETED, id=comment_id, user_id=current_user.id, document_id=existing["document_id"]
+        )
         return {"message": "Comment deleted successfully"}
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error deleting comment: {e}")
         raise HTTPException(
@@ -137,21 +130,22 @@ async def resolve_comment(
     current_user: User = Depends(get_current_active_user)
 ):
     """Resolve a comment"""
-    db = await get_database()
-    
     try:
-        result = await db["comments"].update_one(
-            {"_id": ObjectId(comment_id)},
-            {"$set": {"resolved": True, "updated_at": datetime.utcnow()}}
-        )
-        
-        if result.modified_count == 0:
+        update_data = {"resolved": True, "updated_at": datetime.utcnow()}
+        if not await repositories.comments.update(comment_id, update_data):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Comment not found"
             )
         
+        resolved = await repositories.comments.get(comment_id)
+        await event_bus.publish(
+            COMMENT, UPDATED, id=comment_id, user_id=current_user.id,
+            document_id=resolved["document_id"] if resolved else None, fields=update_data
+        )
         return {"message": "Comment resolved successfully"}
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error resolving comment: {e}")
         raise HTTPException(
@@ -1,8 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from app.models.document import Document, DocumentCreate
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from app.models.document import Document, DocumentContentRange, DocumentCreate, DocumentUpdate, SimilarDocument
+from app.services.similarity_service import similarity_service
 from app.services import document_service as ds_module
+from app.services.conditional import document_parts, if_none_match, not_modified, strong_etag, tag_response
 from app.dependencies import get_current_user
 from app.models.user import User
+from app.repositories.base import WriteConflict
 
 router = APIRouter()
 
@@ -13,12 +17,71 @@ async def create_document(document: DocumentCreate, current_user: User = Depends
     return await ds_module.document_service.create_document(document, current_user.id)
 
 @router.get("/documents/", response_model=list[Document])
-async def get_my_documents(current_user: User = Depends(get_current_user)):
-    return await ds_module.document_service.get_documents_by_user(current_user.id)
+async def get_my_documents(request: Request, response: Response, current_user: User = Depends(get_current_user)):
+    # Revalidated from versions alone; bodies are loaded only when something changed
+    tag = strong_etag("documents", await ds_module.document_service.document_versions(current_user.id))
+    if if_none_match(request, tag):
+        return not_modified(request, tag)
+    docs = await ds_module.document_service.get_documents_by_user(current_user.id)
+    tag_response(response, tag)
+    return docs
 
 @router.get("/documents/{doc_id}", response_model=Document)
-async def get_document(doc_id: str, current_user: User = Depends(get_current_user)):
+async def get_document(doc_id: str, request: Request, response: Response, current_user: User = Depends(get_current_user)):
+    meta = await ds_module.document_service.get_document(doc_id, include_content=False)
+    if not meta or meta.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Document not found")
+    tag = strong_etag("document", document_parts(meta))
+    if if_none_match(request, tag):
+        return not_modified(request, tag)
+    doc = await ds_module.document_service.get_document(doc_id, current_user.id)
+    if not doc:
+        raise HTTPException(status_code=404, detail="Document not found")
+    tag_response(response, strong_etag("document", document_parts(doc)))
+    return doc
+
+@router.get("/documents/{doc_id}/content", response_model=DocumentContentRange)
+async def get_document_content(
+    doc_id: str,
+    request: Request,
+    response: Response,
+    start: int = Query(0, ge=0),
+    end: Optional[int] = Query(None, ge=0),
+    current_user: User = Depends(get_current_user)
+):
+    """A character range of the document body (the whole body by default)"""
+    meta = await ds_module.document_service.get_document(doc_id, current_user.id, include_content=False)
+    if not meta:
+        raise HTTPException(status_code=404, detail="Document not found")
+    tag = strong_etag("content", document_parts(meta), start, end)
+    if if_none_match(request, tag):
+        return not_modified(request, tag)
+    content = await ds_module.document_service.read_content(doc_id, current_user.id, start, end)
+    if content is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+    tag_response(response, tag)
+    return content
+
+@router.put("/documents/{doc_id}", response_model=Document)
+async def update_document(doc_id: str, update: DocumentUpdate, current_user: User = Depends(get_current_user)):
+    try:
+        doc = await ds_module.document_service.update_document(doc_id, current_user.id, update)
+    except WriteConflict:
+        raise HTTPException(status_code=409, detail="Document is being edited elsewhere; retry")
+    if not doc:
+        raise HTTPException(status_code=404, detail="Document not found")
+    return doc
+
+@router.get("/documents/{doc_id}/similar", response_model=list[SimilarDocument])
+async def get_similar_documents(doc_id: str, limit: int = 10, current_user: User = Depends(get_current_user)):
     doc = await ds_module.document_service.get_document(doc_id)
     if not doc or doc.user_id != current_user.id:
         raise HTTPException(status_code=404, detail="Document not found")
-    return doc
+    matches = await similarity_service.similar(current_user.id, doc_id, doc.content, k=min(limit, 50))
+    if not matches:
+        return []
+    found = {d.id: d for d in await ds_module.document_service.get_documents_by_ids([m[0] for m in matches], current_user.id)}
+    return [
+        SimilarDocument(id=match_id, title=found[match_id].title, score=round(score, 4))
+        for match_id, score in matches if match_id in found
+    ]
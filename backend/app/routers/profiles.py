@@ -0,0 +1,83 @@
+from collections import Counter
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+from app.models.user import User
+from app.services import profiling
+from app.database import get_database
+from app.dependencies import get_admin_user
+from bson import ObjectId
+
+router = APIRouter(prefix="/profiles", tags=["profiles"])
+
+SUMMARY_FIELDS = {"folded": 0}
+
+
+def _public(doc: dict) -> dict:
+    doc["id"] = str(doc.pop("_id"))
+    return doc
+
+
+def _folded_response(text: str, filename: str) -> PlainTextResponse:
+    # Folded stacks: render with flamegraph.pl / inferno-flamegraph, or open in speedscope
+    return PlainTextResponse(text, headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
+
+@router.get("/")
+async def list_profiles(
+    route: Optional[str] = None,
+    min_duration_ms: float = 0,
+    limit: int = Query(50, ge=1, le=200),
+    current_user: User = Depends(get_admin_user)
+):
+    """Most recent request profiles, optionally for one route template, slowest-first within the limit"""
+    db = await get_database()
+    query = {"duration_ms": {"$gte": min_duration_ms}}
+    if route:
+        query["route"] = route
+    cursor = db[profiling.COLLECTION].find(query, {**SUMMARY_FIELDS, "top_functions": 0}).sort("created_at", -1).limit(limit)
+    profiles = [_public(doc) async for doc in cursor]
+    return sorted(profiles, key=lambda p: p["duration_ms"], reverse=True)
+
+
+@router.get("/flamegraph")
+async def route_flamegraph(
+    route: str,
+    limit: int = Query(100, ge=1, le=1000),
+    current_user: User = Depends(get_admin_user)
+):
+    """Folded stacks merged across the most recent profiles of a route (useful with sampled profiling)"""
+    db = await get_database()
+    cursor = db[profiling.COLLECTION].find({"route": route}, {"folded": 1}).sort("created_at", -1).limit(limit)
+    stacks = Counter()
+    async for doc in cursor:
+        for line in doc.get("folded", "").splitlines():
+            stack, _, count = line.rpartition(" ")
+            stacks[stack] += int(count)
+    if not stacks:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No profiles for this route")
+    return _folded_response(profiling.folded(stacks), "route.folded")
+
+
+@router.get("/{profile_id}")
+async def get_profile(profile_id: str, current_user: User = Depends(get_admin_user)):
+    """Profile metadata, tags and the top functions by self time"""
+    if not ObjectId.is_valid(profile_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    db = await get_database()
+    doc = await db[profiling.COLLECTION].find_one({"_id": ObjectId(profile_id)}, SUMMARY_FIELDS)
+    if not doc:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    return _public(doc)
+
+
+@router.get("/{profile_id}/flamegraph")
+async def get_profile_flamegraph(profile_id: str, current_user: User = Depends(get_admin_user)):
+    """Folded stacks for one request"""
+    if not ObjectId.is_valid(profile_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    db = await get_database()
+    doc = await db[profiling.COLLECTION].find_one({"_id": ObjectId(profile_id)}, {"folded": 1})
+    if not doc:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    return _folded_response(doc.get("folded", ""), f"profile-{profile_id}.folded")
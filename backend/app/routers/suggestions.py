@@ -1,13 +1,20 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from pydantic import BaseModel
 from app.models.suggestion import Suggestion, SuggestionUpdate, SuggestionInDB
 from app.models.user import User
+from app.models.analytics import PlagiarismReport
 from app.services.ai_service import ai_service
+from app.services.plagiarism_service import plagiarism_service
+from app.services.scheduler import scheduler, INTERACTIVE
+from app.services.rollup_service import rollup_service
+from app.services.feedback_service import feedback_service
+from app.services import profiling
+from app.services.conditional import conditional_json
+from app.services.events import CREATED, SUGGESTION, UPDATED, event_bus
 import app.services.document_service as ds_module
-from app.database import get_database
-from app.dependencies import get_current_active_user
-from bson import ObjectId
+from app.repositories import repositories
+from app.dependencies import get_current_active_user, rate_limited
 from datetime import datetime
 import logging
 
@@ -19,18 +26,19 @@ class SuggestionRequest(BaseModel):
     document_id: str
     content: str
     writing_goal: str = "professional"
-    language: str = "en-US"
+    language: Optional[str] = None  # defaults to the document's language, else detected
 
 class ToneAnalysisRequest(BaseModel):
     content: str
 
 class PlagiarismCheckRequest(BaseModel):
     content: str
+    document_id: Optional[str] = None  # the stored document the text comes from, so it does not match itself
 
 @router.post("/suggestions", response_model=List[Suggestion])
 async def generate_suggestions(
     request: SuggestionRequest,
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(rate_limited("ai"))
 ):
     """Generate AI suggestions for a document"""
     # # Verify document ownership
@@ -42,33 +50,41 @@ async def generate_suggestions(
     #     )
     
     try:
+        profiling.tag(document_chars=len(request.content))
         # Verify document ownership if document exists
+        language = request.language
         if request.document_id != "temp":
-            document = await document_service.get_document(request.document_id, current_user.id)
+            document = await ds_module.document_service.get_document(
+                request.document_id, current_user.id, include_content=False
+            )
             if not document:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail="Document not found"
                 )
+            language = language or document.language
         
         # Generate suggestions
-        suggestions = await ai_service.generate_suggestions(
+        suggestions = await scheduler.run(
+            INTERACTIVE,
+            ai_service.generate_suggestions,
             content=request.content,
             document_id=request.document_id,
             user_id=current_user.id,
             writing_goal=request.writing_goal,
-            language=request.language
+            language=language,
+            subscription_tier=current_user.subscription_tier
         )
         
         # Store suggestions in database (only for real documents)
         if request.document_id != "temp" and suggestions:
-            db = await get_database()
             suggestion_docs = []
             for suggestion in suggestions:
                 suggestion_in_db = SuggestionInDB(
                     document_id=suggestion.document_id,
                     user_id=suggestion.user_id,
                     type=suggestion.type,
+                    rule_id=suggestion.rule_id,
                     text=suggestion.text,
                     suggestion=suggestion.suggestion,
                     explanation=suggestion.explanation,
@@ -81,9 +97,15 @@ async def generate_suggestions(
                 )
                 suggestion_docs.append(suggestion_in_db.dict(by_alias=True))
             
-            await db["suggestions"].insert_many(suggestion_docs)
+            await repositories.suggestions.insert_many(suggestion_docs)
+            await feedback_service.record_shown(current_user.id, [s.rule_id for s in suggestions])
+            await event_bus.publish(SUGGESTION, CREATED, user_id=current_user.id, document_id=request.document_id)
+            # Return the stored ids so apply/dismiss can find them
+            suggestions = [Suggestion.from_db(SuggestionInDB(**{**doc, "_id": str(doc["_id"])})) for doc in suggestion_docs]
         
         return suggestions
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error generating suggestions: {e}")
         raise HTTPException(
@@ -94,32 +116,23 @@ async def generate_suggestions(
 @router.get("/suggestions/{document_id}", response_model=List[Suggestion])
 async def get_document_suggestions(
     document_id: str,
+    request: Request,
     current_user: User = Depends(get_current_active_user)
 ):
     """Get all suggestions for a document"""
     # Verify document ownership
-    document = await ds_module.document_service.get_document(document_id)
+    document = await ds_module.document_service.get_document(document_id, include_content=False)
     if not document:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Document not found"
         )
     
-    db = await get_database()
-    cursor = db["suggestions"].find({
-        "document_id": document_id,
-        "user_id": current_user.id,
-        "is_dismissed": False
-    }).sort("created_at", -1)
-    
-    suggestions = []
-    async for suggestion_doc in cursor:
-        # Convert from database format to response format
-        suggestion_in_db = SuggestionInDB(**suggestion_doc)
-        suggestion = Suggestion.from_db(suggestion_in_db)
-        suggestions.append(suggestion)
-    
-    return suggestions
+    # Polled by the editor; tagged by body so an unchanged list is not re-sent
+    return conditional_json(request, [
+        Suggestion.from_db(SuggestionInDB(**suggestion_doc))
+        for suggestion_doc in await repositories.suggestions.list_for_document(document_id, current_user.id)
+    ])
 
 @router.put("/suggestions/{suggestion_id}/apply")
 async def apply_suggestion(
@@ -127,22 +140,19 @@ async def apply_suggestion(
     current_user: User = Depends(get_current_active_user)
 ):
     """Apply a suggestion"""
-    db = await get_database()
-    print('inside this api')
-    result = await db["suggestions"].update_one(
-        {
-            "_id": ObjectId(suggestion_id),
-            "user_id": current_user.id
-        },
-        {"$set": {"is_applied": True}}
-    )
-    # print('result = ',result)
-    if result.modified_count == 0:
+    suggestion = await repositories.suggestions.mark(suggestion_id, current_user.id, "is_applied")
+    if suggestion is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Suggestion not found"
         )
     
+    await feedback_service.record_applied(current_user.id, suggestion.get("rule_id", ""))
+    await rollup_service.record(current_user.id, suggestions_applied=1)
+    await event_bus.publish(
+        SUGGESTION, UPDATED, id=suggestion_id, user_id=current_user.id,
+        document_id=suggestion.get("document_id"), fields=("is_applied",)
+    )
     return {"message": "Suggestion applied successfully"}
 
 @router.put("/suggestions/{suggestion_id}/dismiss")
@@ -151,33 +161,33 @@ async def dismiss_suggestion(
     current_user: User = Depends(get_current_active_user)
 ):
     """Dismiss a suggestion"""
-    db = await get_database()
-    
-    result = await db["suggestions"].update_one(
-        {
-            "_id": ObjectId(suggestion_id),
-            "user_id": current_user.id
-        },
-        {"$set": {"is_dismissed": True}}
-    )
+    suggestion = await repositories.suggestions.mark(suggestion_id, current_user.id, "is_dismissed")
     
-    if result.modified_count == 0:
+    if suggestion is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Suggestion not found"
         )
     
+    await feedback_service.record_dismissed(current_user.id, suggestion.get("rule_id", ""))
+    await rollup_service.record(current_user.id, suggestions_dismissed=1)
+    await event_bus.publish(
+        SUGGESTION, UPDATED, id=suggestion_id, user_id=current_user.id,
+        document_id=suggestion.get("document_id"), fields=("is_dismissed",)
+    )
     return {"message": "Suggestion dismissed successfully"}
 
 @router.post("/tone-analysis")
 async def analyze_tone(
     request: ToneAnalysisRequest,
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(rate_limited("ai"))
 ):
     """Analyze the tone of text"""
     try:
-        tone_analysis = ai_service.analyze_tone(request.content)
+        tone_analysis = await scheduler.run(INTERACTIVE, ai_service.analyze_tone, request.content)
         return tone_analysis
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error analyzing tone: {e}")
         raise HTTPException(
@@ -185,18 +195,19 @@ async def analyze_tone(
             detail="Failed to analyze tone"
         )
 
-@router.post("/plagiarism-check")
+@router.post("/plagiarism-check", response_model=PlagiarismReport)
 async def check_plagiarism(
     request: PlagiarismCheckRequest,
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(rate_limited("ai"))
 ):
     """Check text for plagiarism"""
     try:
-        plagiarism_score = ai_service.check_plagiarism(request.content)
-        return {
-            "plagiarism_score": plagiarism_score,
-            "status": "original" if plagiarism_score < 5 else "similarities_found"
-        }
+        return await scheduler.run(
+            INTERACTIVE, plagiarism_service.check, request.content,
+            user_id=current_user.id, exclude_document_id=request.document_id
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error checking plagiarism: {e}")
         raise HTTPException(
@@ -207,22 +218,27 @@ async def check_plagiarism(
 @router.post("/vocabulary-enhancement")
 async def enhance_vocabulary(
     request: ToneAnalysisRequest,  # Reuse the same request model
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(rate_limited("ai"))
 ):
     """Get vocabulary enhancement suggestions"""
     try:
         # Generate vocabulary-specific suggestions
-        suggestions = await ai_service.generate_suggestions(
+        suggestions = await scheduler.run(
+            INTERACTIVE,
+            ai_service.generate_suggestions,
             content=request.content,
             document_id="temp",  # Temporary ID for vocabulary suggestions
             user_id=current_user.id,
             writing_goal="vocabulary",
-            language="en-US"
+            language=None,  # detect from the content
+            subscription_tier=current_user.subscription_tier
         )
         
         # Filter only vocabulary suggestions
         vocab_suggestions = [s for s in suggestions if s.type == "vocabulary"]
         return vocab_suggestions
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error enhancing vocabulary: {e}")
         raise HTTPException(
@@ -1,64 +1,103 @@
 import re
-import nltk
+import json
+import asyncio
+import threading
+from collections import Counter
 import textstat
-from groq import Groq
 from typing import List, Dict, Any, Optional
 from app.config import settings
 from app.models.suggestion import Suggestion, SuggestionCreate, SuggestionPosition
 from app.models.analytics import ToneAnalysis, ReadabilityAnalysis, WritingStats
+from app.services.llm_cache import llm_cache, prompt_fingerprint
+from app.services.text_segmentation import chunk_text, sentence_spans
+from app.services.languages import get_pack
+from app.services.rate_limiter import LLMBudgetExhausted, llm_budget, estimate_tokens
+from app.services.tone_analyzer import tone_analyzer
+from app.services.feedback_service import feedback_service
+from app.services.metrics import suggestion_stage_seconds
+from app.services.llm_parsing import (
+    SUGGESTION_JSON_SCHEMA, SUGGESTION_TYPES, SuggestionStreamParser, TextIndex,
+    parse_suggestion_items, parse_text_items
+)
 from datetime import datetime
 import logging
 
-# Optional Groq import
-try:
-    from groq import Groq
-    GROQ_AVAILABLE = True
-except ImportError:
-    GROQ_AVAILABLE = False
-    logger.warning("Groq package not available. AI suggestions will use basic algorithms only.")
 logger = logging.getLogger(__name__)
 
-# ------------------------------
-# NLTK Setup
-# ------------------------------
-def ensure_nltk_data():
-    for pkg in ['punkt', 'stopwords']:
-        try:
-            nltk.data.find(f'tokenizers/{pkg}' if pkg == 'punkt' else f'corpora/{pkg}')
-        except LookupError:
-            nltk.download(pkg)
-
-# Download required NLTK data
-# try:
-#     nltk.data.find('tokenizers/punkt')
-# except LookupError:
-#     try:
-#         nltk.download('punkt')
-#     except Exception as e:
-#         logger.warning(f"Failed to download NLTK punkt: {e}")
-
-# try:
-#     nltk.data.find('corpora/stopwords')
-# except LookupError:
-#     try:
-#         nltk.download('stopwords')
-#     except Exception as e:
-#         logger.warning(f"Failed to download NLTK stopwords: {e}")
+LLM_MAX_SUGGESTIONS = 5  # per chunk
+LLM_MAX_TOKENS = 1000  # reply cap per chunk call
+MAX_SUGGESTIONS = 20
+# Per-checker caps, applied after ranking so the best matches survive
+RULE_GROUP_LIMITS = {"style": 5, "clarity": 5, "vocabulary": 5}
+
+CLARITY_RULES = frozenset({
+    'clarity.long_sentence', 'clarity.nested_clauses', 'clarity.nominalizations', 'clarity.uniform_length'
+})
+LONG_SENTENCE_WORDS = 25
+NESTED_CLAUSE_LIMIT = 3
+NOMINALIZATION_LIMIT = 3
+UNIFORM_WINDOW = 5  # consecutive sentences
+UNIFORM_MIN_WORDS = 8
+UNIFORM_MAX_CV = 0.15  # stdev / mean of sentence length
+
+
+class RuleMatch:
+    """A checker hit: offsets plus shared rule metadata, no model or timestamp per match.
+
+    Only the matches that survive ranking are turned into Suggestion models.
+    `suggestion` and `text` default to the matched span when None.
+    """
+
+    __slots__ = ("rule_id", "type", "start", "end", "suggestion", "explanation", "severity", "confidence", "text")
+
+    def __init__(self, rule_id, type, start, end, suggestion, explanation, severity, confidence, text=None):
+        self.rule_id = rule_id
+        self.type = type
+        self.start = start
+        self.end = end
+        self.suggestion = suggestion
+        self.explanation = explanation
+        self.severity = severity
+        self.confidence = confidence
+        self.text = text
 
 # ------------------------------
 # AI Service Class
 # ------------------------------
 class AIService:
     def __init__(self):
-        ensure_nltk_data()
-        self.groq_client = None
-        if settings.groq_api_key and settings.groq_api_key.strip():
-        # if GROQ_AVAILABLE and settings.groq_api_key:
-            try:
-                self.groq_client = Groq(api_key=settings.groq_api_key)
-                logger.info("Groq client initialized successfully")
-            except Exception as e:
-                logger.error(f"Failed to initialize Groq client: {e}")
+        # Nothing here touches the network or loads NLP data; both happen on first use
+        self._groq_client = None
+        self._groq_initialized = False
+        self._groq_lock = threading.Lock()
+        # Caps concurrent Groq calls across all requests handled by this worker
+        self._llm_semaphore = asyncio.Semaphore(settings.llm_max_concurrency)
+
+    @property
+    def groq_client(self):
+        """Groq client, created on first use (None without an API key or the groq package)"""
+        if not self._groq_initialized:
+            with self._groq_lock:
+                if not self._groq_initialized:
+                    self._groq_client = self._create_groq_client()
+                    self._groq_initialized = True
+        return self._groq_client
+
+    def _create_groq_client(self):
+        if not (settings.groq_api_key and settings.groq_api_key.strip()):
+            return None
+        try:
+            from groq import Groq
+        except ImportError:
+            logger.warning("Groq package not available. AI suggestions will use basic algorithms only.")
+            return None
+        try:
+            client = Groq(api_key=settings.groq_api_key)
+            logger.info("Groq client initialized successfully")
+            return client
+        except Exception as e:
+            logger.error(f"Failed to initialize Groq client: {e}")
+            return None
 
     async def generate_suggestions(
         self, 
@@ -66,399 +105,339 @@ class AIService:
         document_id: str, 
         user_id: str,
         writing_goal: str = "professional",
-        language: str = "en-US"
+        language: str = "en-US",
+        subscription_tier: str = "free"
     ) -> List[Suggestion]:
-        suggestions = []
-        suggestions.extend(self._check_grammar(content, document_id, user_id))
-        suggestions.extend(self._check_style(content, document_id, user_id, writing_goal))
-        suggestions.extend(self._check_clarity(content, document_id, user_id))
-        suggestions.extend(self._check_vocabulary(content, document_id, user_id))
-
-        if self.groq_client:
-        
-        # Basic suggestions (always available)
-        # grammar_suggestions = self._check_grammar(content, document_id, user_id)
-        # suggestions.extend(grammar_suggestions)
-        
-        # style_suggestions = self._check_style(content, document_id, user_id, writing_goal)
-        # suggestions.extend(style_suggestions)
-        
-        # clarity_suggestions = self._check_clarity(content, document_id, user_id)
-        # suggestions.extend(clarity_suggestions)
-        
-        # vocab_suggestions = self._check_vocabulary(content, document_id, user_id)
-        # suggestions.extend(vocab_suggestions)
-        
-        # # Use Groq for advanced suggestions if available
-        # if self.groq_client and content.strip():
+        # Rules this user keeps dismissing are skipped before any matching is done
+        with suggestion_stage_seconds.time(stage="feedback_weights"):
+            rule_weights = await feedback_service.weights(user_id)
+        suppressed = rule_weights.suppressed
+        # Declared language (or detected, when undeclared) selects a lazily loaded rule pack
+        with suggestion_stage_seconds.time(stage="language_pack"):
+            pack = get_pack(language, content)
+        matches = []
+        with suggestion_stage_seconds.time(stage="grammar"):
+            matches.extend(self._check_grammar(content, pack, suppressed))
+        with suggestion_stage_seconds.time(stage="style"):
+            matches.extend(self._check_style(content, pack, writing_goal, suppressed))
+        with suggestion_stage_seconds.time(stage="clarity"):
+            matches.extend(self._check_clarity(content, pack, suppressed))
+        with suggestion_stage_seconds.time(stage="vocabulary"):
+            matches.extend(self._check_vocabulary(content, pack, suppressed))
+
+        # Suppressed LLM suggestion types are left out of the prompt rather than discarded after the call
+        llm_types = tuple(t for t in SUGGESTION_TYPES if f"llm.{t}" not in suppressed)
+        if not llm_types:
+            logger.debug(f"All LLM suggestion types suppressed for user {user_id}; skipping the LLM stage")
+        # Out of daily LLM budget: degrade to rule-based suggestions only
+        elif self.groq_client and await llm_budget.remaining(user_id, subscription_tier) <= 0:
+            logger.info(f"LLM token budget exhausted for user {user_id}; returning rule-based suggestions")
+        elif self.groq_client:
             try:
-                ai_suggestions = await self._get_groq_suggestions(content, document_id, user_id, writing_goal)
-                suggestions.extend(ai_suggestions)
+                with suggestion_stage_seconds.time(stage="llm"):
+                    matches.extend(await self._get_groq_suggestions(
+                        content, document_id, user_id, writing_goal, pack, subscription_tier, llm_types
+                    ))
             except Exception as e:
                 logger.error(f"Groq API error: {e}")
 
-        return suggestions[:20]
+        with suggestion_stage_seconds.time(stage="rank"):
+            created_at = datetime.utcnow()
+            return [
+                self._to_suggestion(match, content, document_id, user_id, created_at)
+                for match in self._rank(matches, rule_weights)
+            ]
 
-    def _check_grammar(self, content, document_id, user_id):
-        patterns = [
-            (r'\b(there|their|they\'re)\b', 'Check there/their/they\'re usage'),
-            (r'\b(your|you\'re)\b', 'Check your/you\'re usage'),
-            (r'\b(its|it\'s)\b', 'Check its/it\'s usage'),
-            (r'\s{2,}', 'Multiple spaces found'),
-            (r'[.!?]{2,}', 'Multiple punctuation marks')
-        ]
-        suggestions = []
-        for i, (pattern, explanation) in enumerate(patterns):
-            for match in re.finditer(pattern, content, re.IGNORECASE):
-                suggestions.append(Suggestion(
-                    id=f"grammar_{i}_{match.start()}",
-                    document_id=document_id,
-                    user_id=user_id,
-                    type="grammar",
-                    text=match.group(),
-                    suggestion=match.group().strip(),
-                    explanation=explanation,
-                    position=SuggestionPosition(start=match.start(), end=match.end()),
-                    severity="warning",
-                    confidence=75.0,
-                    is_applied=False,
-                    is_dismissed=False,
-                    created_at=datetime.utcnow()
-                ))
-        return suggestions
+    def _rank(self, matches, rule_weights):
+        """Order by confidence scaled by acceptance history, then apply per-checker and total caps"""
+        ranked = sorted(matches, key=lambda m: m.confidence * rule_weights.weight(m.rule_id), reverse=True)
+        kept = []
+        per_group = Counter()
+        for match in ranked:
+            if match.rule_id in rule_weights.suppressed:
+                continue
+            group = match.rule_id.split(".", 1)[0]
+            if per_group[group] >= RULE_GROUP_LIMITS.get(group, MAX_SUGGESTIONS):
+                continue
+            per_group[group] += 1
+            kept.append(match)
+            if len(kept) >= MAX_SUGGESTIONS:
+                break
+        return kept
 
-    def _check_style(self, content, document_id, user_id, writing_goal):
-    #             )
-    #             suggestions.append(suggestion)
-        
-    #     return suggestions[:5]  # Limit grammar suggestions
-    
-    # def _check_style(self, content: str, document_id: str, user_id: str, writing_goal: str) -> List[Suggestion]:
-    #     """Style checking based on writing goal"""
-        suggestions = []
-        passive_patterns = [r'\b(was|were|is|are|been|being)\s+\w+ed\b', r'\b(was|were|is|are|been|being)\s+\w+en\b']
-        for pattern in passive_patterns:
-            for match in re.finditer(pattern, content, re.IGNORECASE):
-                suggestions.append(Suggestion(
-                    id=f"style_passive_{match.start()}",
-                    document_id=document_id,
-                    user_id=user_id,
-                    type="style",
-                    text=match.group(),
-                    suggestion="Consider active voice",
-                    explanation="Active voice is often more engaging and direct",
-                    position=SuggestionPosition(start=match.start(), end=match.end()),
-                    severity="info",
-                    confidence=60.0,
-                    is_applied=False,
-                    is_dismissed=False,
-                    created_at=datetime.utcnow()
-                ))
-        return suggestions[:5]
-
-    def _check_clarity(self, content, document_id, user_id):
-    #             )
-    #             suggestions.append(suggestion)
-        
-    #     return suggestions[:3]  # Limit style suggestions
-    
-    # def _check_clarity(self, content: str, document_id: str, user_id: str) -> List[Suggestion]:
-    #     """Clarity checking"""
-        suggestions = []
-        sentences = nltk.sent_tokenize(content, language="english")
-        for i, sentence in enumerate(sentences):
-            if len(sentence.split()) > 25:
-                start = content.find(sentence)
-                suggestions.append(Suggestion(
-                    id=f"clarity_long_{i}",
-                    document_id=document_id,
-                    user_id=user_id,
-                    type="clarity",
-                    text=sentence[:50] + "..." if len(sentence) > 50 else sentence,
-                    suggestion="Consider breaking into shorter sentences",
-                    explanation=f"This sentence has {len(sentence.split())} words.",
-                    position=SuggestionPosition(start=start, end=start + len(sentence)),
-                    severity="info",
-                    confidence=70.0,
-                    is_applied=False,
-                    is_dismissed=False,
-                    created_at=datetime.utcnow()
+    def _to_suggestion(self, match, content, document_id, user_id, created_at):
+        text = match.text if match.text is not None else content[match.start:match.end]
+        return Suggestion(
+            id=f"{match.rule_id}_{match.start}",
+            document_id=document_id,
+            user_id=user_id,
+            type=match.type,
+            rule_id=match.rule_id,
+            text=text,
+            suggestion=match.suggestion if match.suggestion is not None else text.strip(),
+            explanation=match.explanation,
+            position=SuggestionPosition(start=match.start, end=match.end),
+            severity=match.severity,
+            confidence=match.confidence,
+            is_applied=False,
+            is_dismissed=False,
+            created_at=created_at
+        )
+
+    def _check_grammar(self, content, pack, suppressed=frozenset()):
+        matches = []
+        for rule_id, pattern, explanation in pack.grammar_rules:
+            if rule_id in suppressed:
+                continue
+            for match in pattern.finditer(content):
+                matches.append(RuleMatch(rule_id, "grammar", match.start(), match.end(), None, explanation, "warning", 75.0))
+        return matches
+
+    def _check_style(self, content, pack, writing_goal, suppressed=frozenset()):
+        matches = []
+        if 'style.passive_voice' in suppressed:
+            return matches
+        for pattern in pack.passive_patterns:
+            for match in pattern.finditer(content):
+                matches.append(RuleMatch(
+                    "style.passive_voice", "style", match.start(), match.end(),
+                    "Consider active voice", "Active voice is often more engaging and direct", "info", 60.0
                 ))
-        return suggestions[:3]
+        return matches
 
-    def _check_vocabulary(self, content, document_id, user_id):
-        suggestions = []
-        replacements = {
-            'very good': 'excellent',
-            'very bad': 'terrible',
-            'very big': 'enormous',
-            'very small': 'tiny',
-            'a lot of': 'many',
-            'thing': 'item/matter/subject'
-        }
-        for original, replacement in replacements.items():
-            pattern = r'\b' + re.escape(original) + r'\b'
-            for match in re.finditer(pattern, content, re.IGNORECASE):
-                suggestions.append(Suggestion(
-                    id=f"vocab_{hash(original)}_{match.start()}",
-                    document_id=document_id,
-                    user_id=user_id,
-                    type="vocabulary",
-                    text=match.group(),
-                    suggestion=replacement,
-                    explanation=f"Consider using '{replacement}'",
-                    position=SuggestionPosition(start=match.start(), end=match.end()),
-                    severity="info",
-                    confidence=80.0,
-                    is_applied=False,
-                    is_dismissed=False,
-                    created_at=datetime.utcnow()
+    def _check_clarity(self, content, pack, suppressed=frozenset()):
+        matches = []
+        if CLARITY_RULES <= suppressed:
+            return matches
+        # Sentence offsets come straight from the segmenter, so every rule is one linear pass
+        spans = pack.sentence_spans(content)
+        lengths = []
+        for start, end in spans:
+            sentence = content[start:end]
+            word_count = len(sentence.split())
+            lengths.append(word_count)
+            excerpt = sentence[:50] + "..." if len(sentence) > 50 else sentence
+            if word_count > LONG_SENTENCE_WORDS and 'clarity.long_sentence' not in suppressed:
+                matches.append(RuleMatch(
+                    "clarity.long_sentence", "clarity", start, end,
+                    "Consider breaking into shorter sentences", f"This sentence has {word_count} words.", "info", 70.0,
+                    text=excerpt
                 ))
-        return suggestions[:5]
+            if pack.subordinators and 'clarity.nested_clauses' not in suppressed:
+                clauses = len(pack.subordinators.findall(sentence))
+                if clauses >= NESTED_CLAUSE_LIMIT:
+                    matches.append(RuleMatch(
+                        "clarity.nested_clauses", "clarity", start, end,
+                        "Split the subordinate clauses into separate sentences",
+                        f"This sentence nests {clauses} subordinate clauses, which makes it hard to follow.", "info", 65.0,
+                        text=excerpt
+                    ))
+            if pack.nominalization and 'clarity.nominalizations' not in suppressed:
+                nouns = pack.nominalization.findall(sentence)
+                if len(nouns) >= NOMINALIZATION_LIMIT:
+                    matches.append(RuleMatch(
+                        "clarity.nominalizations", "clarity", start, end,
+                        "Rewrite with verbs instead of abstract nouns",
+                        f"Nouns such as '{nouns[0]}' hide the action; the verb form is usually clearer.", "info", 55.0,
+                        text=excerpt
+                    ))
+        if 'clarity.uniform_length' not in suppressed:
+            matches.extend(self._uniform_length_runs(content, spans, lengths))
+        return matches
 
-    async def _get_groq_suggestions(self, content, document_id, user_id, writing_goal):
+    def _uniform_length_runs(self, content, spans, lengths):
+        """Runs of consecutive sentences with nearly the same length read as monotonous"""
+        matches = []
+        i = 0
+        while i + UNIFORM_WINDOW <= len(lengths):
+            window = lengths[i:i + UNIFORM_WINDOW]
+            mean = sum(window) / UNIFORM_WINDOW
+            if mean >= UNIFORM_MIN_WORDS:
+                stdev = (sum((n - mean) ** 2 for n in window) / UNIFORM_WINDOW) ** 0.5
+                if stdev / mean < UNIFORM_MAX_CV:
+                    start, end = spans[i][0], spans[i + UNIFORM_WINDOW - 1][1]
+                    excerpt = content[start:start + 50] + "..." if end - start > 50 else content[start:end]
+                    matches.append(RuleMatch(
+                        "clarity.uniform_length", "clarity", start, end,
+                        "Vary sentence length", f"{UNIFORM_WINDOW} sentences in a row have about {round(mean)} words each.",
+                        "info", 50.0, text=excerpt
+                    ))
+                    i += UNIFORM_WINDOW
+                    continue
+            i += 1
+        return matches
+
+    def _check_vocabulary(self, content, pack, suppressed=frozenset()):
+        matches = []
+        for rule_id, pattern, replacement, explanation in pack.vocabulary_rules:
+            if rule_id in suppressed:
+                continue
+            for match in pattern.finditer(content):
+                matches.append(RuleMatch(rule_id, "vocabulary", match.start(), match.end(), replacement, explanation, "info", 80.0))
+        return matches
+
+    async def _get_groq_suggestions(self, content, document_id, user_id, writing_goal, pack, subscription_tier="free",
+                                    types=SUGGESTION_TYPES):
         if not self.groq_client:
             return []
-        prompt = f"""
+        # Analyze the whole document in boundary-aligned chunks instead of only the first window
+        chunks = chunk_text(content, settings.llm_chunk_chars)
+        if len(chunks) > settings.llm_max_chunks:
+            logger.warning(f"Document {document_id} has {len(chunks)} chunks; analyzing first {settings.llm_max_chunks}")
+            chunks = chunks[:settings.llm_max_chunks]
+        # One case-folded index per request, shared by every span lookup
+        index = TextIndex(content)
+        results = await asyncio.gather(
+            *(self._analyze_chunk(chunk, index, user_id, writing_goal, pack.name, subscription_tier, types)
+              for chunk in chunks),
+            return_exceptions=True
+        )
+        suggestions = []
+        skipped = 0
+        for chunk, result in zip(chunks, results):
+            if isinstance(result, LLMBudgetExhausted):
+                skipped += 1
+                continue
+            if isinstance(result, Exception):
+                logger.error(f"Groq chunk analysis failed at offset {chunk.start}: {result}")
+                continue
+            suggestions.extend(result)
+        if skipped:
+            logger.info(f"LLM token budget exhausted for user {user_id}; skipped {skipped} of {len(chunks)} chunks")
+        return suggestions
+
+    def _build_prompt(self, text, writing_goal, language_name, types=SUGGESTION_TYPES):
+        # Only narrowed when the user suppressed some types, so everyone else shares cache entries
+        scope = "" if set(types) >= set(SUGGESTION_TYPES) else f"Only suggest these types: {', '.join(types)}."
+        if settings.llm_structured_output:
+            return f"""
+        You are an expert writing assistant. Analyze the following text for writing improvements based on the goal: {writing_goal}.
+        The text is written in {language_name}; write every suggestion and explanation in {language_name}.
+        Respond with only a JSON object that matches this JSON schema:
+        {json.dumps(SUGGESTION_JSON_SCHEMA)}
+        Provide up to {LLM_MAX_SUGGESTIONS} suggestions in the order they appear in the text.
+        Copy each "issue" verbatim from the text.
+        {scope}
+        Text: {text}
+        """
+        return f"""
         You are an expert writing assistant. Analyze the following text for writing improvements based on the goal: {writing_goal}.
-        Provide up to 5 actionable suggestions in this format:
+        The text is written in {language_name}; write every suggestion and explanation in {language_name}.
+        Provide up to {LLM_MAX_SUGGESTIONS} actionable suggestions in this format:
         - Type:
         - Issue:
         - Suggestion:
         - Explanation:
-        Text: {content[:2000]}
+        {scope}
+        Text: {text}
         """
-        response = self.groq_client.chat.completions.create(
+
+    async def _analyze_chunk(self, chunk, index, user_id, writing_goal, language_name, subscription_tier="free",
+                             types=SUGGESTION_TYPES):
+        prompt = self._build_prompt(chunk.text, writing_goal, language_name, types)
+        model = settings.groq_model_name or "llama3-8b-8192"
+        # Key depends only on the chunk text + goal, so unchanged chunks of an edited document hit the cache
+        key = prompt_fingerprint(model, prompt, max_tokens=LLM_MAX_TOKENS, temperature=0.2)
+
+        async def compute():
+            async with self._llm_semaphore:
+                # Only upstream calls count against the budget; cache hits are free. Reserved once a
+                # call slot is free, so queued chunks do not hold allowance they are not using yet
+                reserved = estimate_tokens(prompt) + LLM_MAX_TOKENS
+                await llm_budget.reserve(user_id, subscription_tier, reserved)
+                spent = 0
+                try:
+                    with suggestion_stage_seconds.time(stage="llm_call"):
+                        ai_text = await self._complete_groq(prompt, model)
+                    spent = estimate_tokens(prompt) + estimate_tokens(ai_text)
+                finally:
+                    await llm_budget.settle(user_id, reserved, spent)
+            return ai_text
+
+        while True:
+            try:
+                ai_text = await llm_cache.get_or_compute(key, compute)
+                break
+            except LLMBudgetExhausted as e:
+                if e.user_id == user_id:
+                    raise
+                # Joined another user's identical call and their allowance ran out; ours decides, so retry
+        with suggestion_stage_seconds.time(stage="llm_parse"):
+            return self._parse_groq_response(ai_text, index, chunk)
+
+    async def _complete_groq(self, prompt, model):
+        # The Groq client is synchronous; keep it off the event loop
+        if settings.llm_structured_output:
+            return await asyncio.to_thread(self._stream_groq, prompt, model)
+        response = await asyncio.to_thread(
+            self.groq_client.chat.completions.create,
             messages=[{"role": "user", "content": prompt}],
-            model="llama3-8b-8192",
-            max_tokens=1000,
+            model=model,
+            max_tokens=LLM_MAX_TOKENS,
             temperature=0.2
         )
-        return self._parse_groq_response(response.choices[0].message.content, document_id, user_id, content)
+        return response.choices[0].message.content or ""
 
-    def _parse_groq_response(self, ai_text, document_id, user_id, content):
-        suggestions = []
-        lines = ai_text.split('\n')
-        current = {}
-        for line in lines:
-            if line.startswith('- Type:'):
-                if current: suggestions.append(self._create_suggestion_from_parsed(current, document_id, user_id, content))
-                current = {'type': line.split(':',1)[1].strip()}
-            elif line.startswith('- Issue:'):
-                current['issue'] = line.split(':',1)[1].strip()
-            elif line.startswith('- Suggestion:'):
-                current['suggestion'] = line.split(':',1)[1].strip()
-            elif line.startswith('- Explanation:'):
-                current['explanation'] = line.split(':',1)[1].strip()
-        if current:
-            suggestions.append(self._create_suggestion_from_parsed(current, document_id, user_id, content))
-        return [s for s in suggestions if s]
-
-    def _create_suggestion_from_parsed(self, parsed, document_id, user_id, content):
-        if not all(k in parsed for k in ('type', 'issue', 'suggestion', 'explanation')):
+    def _stream_groq(self, prompt, model):
+        """Stream a structured reply, stopping as soon as enough suggestions are complete"""
+        parser = SuggestionStreamParser()
+        parts = []
+        found = 0
+        stream = self.groq_client.chat.completions.create(
+            messages=[{"role": "user", "content": prompt}],
+            model=model,
+            max_tokens=LLM_MAX_TOKENS,
+            temperature=0.2,
+            stream=True
+        )
+        try:
+            for event in stream:
+                if not event.choices:
+                    continue
+                delta = event.choices[0].delta.content or ""
+                parts.append(delta)
+                found += len(parser.feed(delta))
+                if found >= LLM_MAX_SUGGESTIONS:
+                    break
+        finally:
+            close = getattr(stream, "close", None)
+            if close:
+                close()
+        return "".join(parts)
+
+    def _parse_groq_response(self, ai_text, index, chunk):
+        items = parse_suggestion_items(ai_text)[:LLM_MAX_SUGGESTIONS]
+        if not items:
+            # Models occasionally ignore the schema; fall back to the line format
+            items = parse_text_items(ai_text)
+        matches = []
+        cursor = chunk.start
+        for item in items:
+            match = self._match_from_parsed(item, index, chunk, cursor)
+            if match:
+                matches.append(match)
+                cursor = match.end
+        return matches
+
+    def _match_from_parsed(self, parsed, index, chunk, near):
+        issue_text = parsed['issue'].strip().strip('"[]')
+        # Resolve within this chunk, preferring the occurrence after the previous suggestion
+        span = index.find(issue_text, near=near, lo=chunk.start, hi=chunk.end)
+        if span is None:
+            logger.debug(f"Dropping Groq suggestion with unresolvable span: {issue_text[:50]!r}")
             return None
-        issue_text = parsed['issue'].strip('"[]')
-        start = content.lower().find(issue_text.lower())
-        end = start + len(issue_text) if start >= 0 else min(50, len(content))
-        if start < 0: start = 0
-        severity = {'grammar': 'error', 'style': 'warning', 'clarity': 'info', 'tone': 'info', 'vocabulary': 'info'}.get(parsed['type'], 'info')
-        return Suggestion(
-            id=f"groq_{parsed['type']}_{start}_{hash(parsed['issue'])}",
-            document_id=document_id,
-            user_id=user_id,
-            type=parsed['type'],
-            text=issue_text,
-            suggestion=parsed['suggestion'],
-            explanation=parsed['explanation'],
-            position=SuggestionPosition(start=start, end=end),
-            severity=severity,
-            confidence=90.0,
-            is_applied=False,
-            is_dismissed=False,
-            created_at=datetime.utcnow()
+        start, end = span
+        suggestion_type = parsed['type'].strip().lower()
+        if suggestion_type not in SUGGESTION_TYPES:
+            suggestion_type = 'style'
+        severity = {'grammar': 'error', 'style': 'warning', 'clarity': 'info', 'tone': 'info', 'vocabulary': 'info'}.get(suggestion_type, 'info')
+        return RuleMatch(
+            f"llm.{suggestion_type}", suggestion_type, start, end,
+            parsed['suggestion'], parsed['explanation'], severity, 90.0
         )
 
-#                 )
-#                 suggestions.append(suggestion)
-        
-#         return suggestions[:3]  # Limit vocabulary suggestions
-    
-#     async def _get_groq_suggestions(
-#         self, 
-#         content: str, 
-#         document_id: str, 
-#         user_id: str, 
-#         writing_goal: str
-#     ) -> List[Suggestion]:
-#         """Get advanced suggestions using Groq API"""
-#         if not self.groq_client:
-#             return []
-        
-#         try:
-#             # Limit content length for API efficiency
-#             content_preview = content[:1500] if len(content) > 1500 else content
-            
-#             prompt = f"""
-# You are an expert writing assistant. Analyze the following text for writing improvements based on the goal: {writing_goal}.
-
-# Provide specific, actionable suggestions in these categories:
-# 1. Grammar errors and corrections
-# 2. Style improvements for {writing_goal} writing
-# 3. Clarity and readability enhancements
-# 4. Tone adjustments
-# 5. Word choice and vocabulary improvements
-
-# Text to analyze:
-# "{content_preview}"
-
-# Format each suggestion as:
-# - Type: [grammar/style/clarity/tone/vocabulary]
-# - Issue: [specific text with issue]
-# - Suggestion: [specific improvement]
-# - Explanation: [why this improves the text]
-
-# Provide up to 3 most important suggestions.
-# """
-            
-#             response = self.groq_client.chat.completions.create(
-#                 messages=[{"role": "user", "content": prompt}],
-#                 model="llama3-8b-8192",
-#                 max_tokens=800,
-#                 temperature=0.2
-#             )
-            
-#             ai_text = response.choices[0].message.content
-            
-#             # Parse the AI response and create structured suggestions
-#             suggestions = self._parse_groq_response(ai_text, document_id, user_id, content)
-            
-#             return suggestions
-            
-#         except Exception as e:
-#             logger.error(f"Groq API error: {e}")
-#             return []
-    
-#     def _parse_groq_response(self, ai_text: str, document_id: str, user_id: str, content: str) -> List[Suggestion]:
-#         """Parse Groq response into structured suggestions"""
-#         suggestions = []
-        
-#         try:
-#             # Split response into individual suggestions
-#             lines = ai_text.split('\n')
-#             current_suggestion = {}
-            
-#             for line in lines:
-#                 line = line.strip()
-#                 if line.startswith('- Type:'):
-#                     if current_suggestion and len(current_suggestion) >= 4:
-#                         # Process previous suggestion
-#                         suggestion = self._create_suggestion_from_parsed(
-#                             current_suggestion, document_id, user_id, content
-#                         )
-#                         if suggestion:
-#                             suggestions.append(suggestion)
-                    
-#                     current_suggestion = {'type': line.replace('- Type:', '').strip().lower()}
-#                 elif line.startswith('- Issue:'):
-#                     current_suggestion['issue'] = line.replace('- Issue:', '').strip()
-#                 elif line.startswith('- Suggestion:'):
-#                     current_suggestion['suggestion'] = line.replace('- Suggestion:', '').strip()
-#                 elif line.startswith('- Explanation:'):
-#                     current_suggestion['explanation'] = line.replace('- Explanation:', '').strip()
-            
-#             # Process last suggestion
-#             if current_suggestion and len(current_suggestion) >= 4:
-#                 suggestion = self._create_suggestion_from_parsed(
-#                     current_suggestion, document_id, user_id, content
-#                 )
-#                 if suggestion:
-#                     suggestions.append(suggestion)
-                    
-#         except Exception as e:
-#             logger.error(f"Error parsing Groq response: {e}")
-#             # Fallback: create a general suggestion
-#             suggestion = Suggestion(
-#                 id=f"ai_general_{hash(content[:100])}",
-#                 document_id=document_id,
-#                 user_id=user_id,
-#                 type="style",
-#                 text=content[:100] + "..." if len(content) > 100 else content,
-#                 suggestion="AI-powered improvement available",
-#                 explanation=ai_text[:200] + "..." if len(ai_text) > 200 else ai_text,
-#                 position=SuggestionPosition(start=0, end=min(100, len(content))),
-#                 severity="info",
-#                 confidence=85.0,
-#                 is_applied=False,
-#                 is_dismissed=False,
-#                 created_at=datetime.utcnow()
-#             )
-#             suggestions.append(suggestion)
-        
-#         return suggestions
-    
-#     def _create_suggestion_from_parsed(self, parsed: dict, document_id: str, user_id: str, content: str) -> Optional[Suggestion]:
-#         """Create a Suggestion object from parsed data"""
-#         try:
-#             if not all(key in parsed for key in ['type', 'issue', 'suggestion', 'explanation']):
-#                 return None
-            
-#             # Find position of the issue in content
-#             issue_text = parsed['issue'].strip('"[]')
-#             start_pos = content.lower().find(issue_text.lower())
-            
-#             if start_pos == -1:
-#                 # If exact match not found, use beginning of content
-#                 start_pos = 0
-#                 end_pos = min(50, len(content))
-#             else:
-#                 end_pos = start_pos + len(issue_text)
-            
-#             # Determine severity based on type
-#             severity_map = {
-#                 'grammar': 'error',
-#                 'style': 'warning',
-#                 'clarity': 'info',
-#                 'tone': 'info',
-#                 'vocabulary': 'info'
-#             }
-            
-#             suggestion = Suggestion(
-#                 id=f"groq_{parsed['type']}_{start_pos}_{hash(parsed['issue'])}",
-#                 document_id=document_id,
-#                 user_id=user_id,
-#                 type=parsed['type'] if parsed['type'] in ['grammar', 'style', 'clarity', 'tone', 'vocabulary'] else 'style',
-#                 text=issue_text,
-#                 suggestion=parsed['suggestion'],
-#                 explanation=parsed['explanation'],
-#                 position=SuggestionPosition(start=start_pos, end=end_pos),
-#                 severity=severity_map.get(parsed['type'], 'info'),
-#                 confidence=90.0,  # High confidence for AI suggestions
-#                 is_applied=False,
-#                 is_dismissed=False,
-#                 created_at=datetime.utcnow()
-#             )
-            
-#             return suggestion
-            
-#         except Exception as e:
-#             logger.error(f"Error creating suggestion from parsed data: {e}")
-#             return None
-    
     def analyze_tone(self, content: str) -> ToneAnalysis:
-        formal_words = ['therefore', 'furthermore', 'consequently', 'moreover']
-        confident_words = ['will', 'definitely', 'certainly']
-        optimistic_words = ['excellent', 'great', 'wonderful']
-        analytical_words = ['analyze', 'evaluate', 'assess']
-        word_count = len(content.split())
-        scale = max(word_count / 100, 1)
-        return ToneAnalysis(
-            formal=min(sum(w in content.lower() for w in formal_words)/scale*100, 100),
-            confident=min(sum(w in content.lower() for w in confident_words)/scale*100, 100),
-            optimistic=min(sum(w in content.lower() for w in optimistic_words)/scale*100, 100),
-            analytical=min(sum(w in content.lower() for w in analytical_words)/scale*100, 100),
-            friendly=70.0,
-            assertive=65.0
-        )
+        return tone_analyzer.analyze(content)
 
     def analyze_readability(self, content: str) -> ReadabilityAnalysis:
         if not content.strip():
@@ -495,7 +474,7 @@ class AIService:
         if not content.strip():
             return WritingStats(**{k: 0 for k in WritingStats.__annotations__})
         words = content.split()
-        sentences = nltk.sent_tokenize(content)
+        sentences = sentence_spans(content)
         paragraphs = [p for p in content.split('\n\n') if p.strip()]
         word_count = len(words)
         sentence_count = len(sentences)
@@ -517,11 +496,6 @@ class AIService:
             reading_time=max(1, word_count // 200)
         )
 
-    def check_plagiarism(self, content: str) -> float:
-        phrases = ["lorem ipsum", "the quick brown fox", "to be or not to be", "it was the best of times"]
-        score = sum(10 for phrase in phrases if phrase in content.lower())
-        return min(score, 100)
-
 
 # Global instance
 ai_service = AIService()
@@ -0,0 +1,152 @@
+"""Response compression.
+
+Text-like responses of at least RESPONSE_COMPRESSION_MIN_BYTES are
+compressed with brotli when the client accepts it and the brotli package
+is installed, and with gzip otherwise. Smaller bodies are sent as-is:
+below about a kilobyte the saving is smaller than the CPU cost.
+
+ETags of text-like responses get the negotiated coding appended whether or
+not the body ended up compressed, so they match the 304 that
+conditional.not_modified sends for the same Accept-Encoding.
+"""
+import asyncio
+import gzip
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from app.config import settings
+
+try:
+    import brotli
+except ImportError:  # optional; gzip only
+    brotli = None
+
+# Bodies this large are compressed off the event loop
+OFFLOAD_BYTES = 256 * 1024
+
+
+def encoded_etag(tag: str, encoding: str) -> str:
+    if not tag.startswith('"'):
+        return tag  # weak tags are already encoding-independent
+    return f'{tag[:-1]}-{encoding}"'
+
+
+def _accepted(accept_encoding: str) -> set:
+    accepted = set()
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """The coding to use for a request's Accept-Encoding, or None"""
+    accepted = _accepted(accept_encoding)
+    if brotli is not None and ("br" in accepted or "*" in accepted):
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+
+def _compressible(content_type: str) -> bool:
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return media_type.startswith("text/") or any(kind in media_type for kind in ("json", "xml", "javascript"))
+
+
+def _compress(encoding: str, body: bytes) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.response_brotli_quality)
+    return gzip.compress(body, compresslevel=settings.response_gzip_level, mtime=0)
+
+
+class _StreamCompressor:
+    def __init__(self, encoding: str):
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=settings.response_brotli_quality)
+            self.process, self._finish = self._compressor.process, self._compressor.finish
+        else:
+            self._compressor = zlib.compressobj(settings.response_gzip_level, zlib.DEFLATED, 31)  # gzip container
+            self.process, self._finish = self._compressor.compress, self._compressor.flush
+
+    def finish(self) -> bytes:
+        return self._finish()
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing response bodies per Accept-Encoding"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.response_compression:
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        stream: Optional[_StreamCompressor] = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start, stream, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+            body, more_body = message.get("body", b""), message.get("more_body", False)
+
+            if stream is not None:
+                chunk = stream.process(body) + (b"" if more_body else stream.finish())
+                await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+                return
+
+            headers = MutableHeaders(raw=start["headers"])
+            eligible = (
+                start["status"] not in (204, 304) and "content-encoding" not in headers
+                and _compressible(headers.get("content-type", ""))
+            )
+            if eligible:
+                headers.add_vary_header("Accept-Encoding")
+                if "etag" in headers:
+                    headers["ETag"] = encoded_etag(headers["etag"], encoding)
+            if not eligible or (not more_body and len(body) < settings.response_compression_min_bytes):
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+
+            headers["Content-Encoding"] = encoding
+            if more_body:
+                # Streaming response: compress chunk by chunk, length unknown
+                del headers["Content-Length"]
+                stream = _StreamCompressor(encoding)
+                await send(start)
+                await send({"type": "http.response.body", "body": stream.process(body), "more_body": True})
+                return
+            if len(body) >= OFFLOAD_BYTES:
+                compressed = await asyncio.to_thread(_compress, encoding, body)
+            else:
+                compressed = _compress(encoding, body)
+            headers["Content-Length"] = str(len(compressed))
+            await send(start)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_wrapper)
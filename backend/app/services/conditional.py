@@ -0,0 +1,89 @@
+"""Strong ETags and If-None-Match handling for polled GET endpoints.
+
+Tags are computed before the expensive part of a request, from document
+`version`/`updated_at` and other cheap inputs (suggestion counts, the
+user's corpus), so a matching If-None-Match is answered with 304 without
+loading bodies or running the analyzers. Responses carry
+`Cache-Control: private, no-cache`, so clients revalidate on every poll.
+
+When a content coding is negotiated the tag gets it appended
+("<tag>-gzip"), as each encoding is a different representation; 304s
+repeat the suffix the 200 carried, and it is ignored when comparing.
+"""
+import hashlib
+import json
+import time
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.config import settings
+from app.services.compression import encoded_etag, negotiate
+
+CACHE_CONTROL = "private, no-cache"
+ENCODING_SUFFIXES = ("-gzip", "-br")
+
+
+def strong_etag(*parts) -> str:
+    payload = json.dumps(jsonable_encoder(parts), sort_keys=True, separators=(",", ":"))
+    return '"' + hashlib.blake2b(payload.encode(), digest_size=16).hexdigest() + '"'
+
+
+def document_parts(doc) -> tuple:
+    """What a document's representation depends on: a Document model or a raw record"""
+    if isinstance(doc, dict):
+        return doc["_id"], doc.get("version", 1), doc.get("updated_at")
+    return doc.id, doc.version, doc.updated_at
+
+
+def corpus_window() -> int:
+    """Shared by all workers; bounds how long results that depend on other users' documents are revalidated as unchanged"""
+    return int(time.time() // max(settings.analytics_etag_max_age_seconds, 1))
+
+
+def _opaque(tag: str) -> str:
+    tag = tag.strip()
+    if tag.startswith("W/"):
+        tag = tag[2:]
+    for suffix in ENCODING_SUFFIXES:
+        if tag.endswith(suffix + '"'):
+            return tag[:-len(suffix) - 1] + '"'
+    return tag
+
+
+def if_none_match(request: Request, tag: str) -> bool:
+    """Whether the client already has the representation tagged `tag` (weak comparison, RFC 9110 13.1.2)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(_opaque(candidate) == tag for candidate in header.split(","))
+
+
+def not_modified(request: Request, tag: str) -> Response:
+    """304 carrying the tag the 200 for this request would have: suffixed when a coding is negotiated"""
+    encoding = negotiate(request.headers.get("accept-encoding", "")) if settings.response_compression else None
+    if encoding is not None:
+        tag = encoded_etag(tag, encoding)
+    return Response(status_code=304, headers={"ETag": tag, "Cache-Control": CACHE_CONTROL})
+
+
+def tag_response(response: Response, tag: str):
+    response.headers["ETag"] = tag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+
+
+def conditional_json(request: Request, content) -> Response:
+    """JSON response tagged with a hash of its body, or 304 when the client has that body.
+
+    For responses without cheap inputs to derive a tag from: the handler
+    still runs, but unchanged results are not sent again.
+    """
+    response = JSONResponse(jsonable_encoder(content))
+    tag = '"' + hashlib.blake2b(response.body, digest_size=16).hexdigest() + '"'
+    if if_none_match(request, tag):
+        return not_modified(request, tag)
+    tag_response(response, tag)
+    return response
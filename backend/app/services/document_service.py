@@ -1,47 +1,99 @@
-from bson import ObjectId
-from app.models.document import Document, DocumentInDB
-from app.database import get_database
+import asyncio
+from datetime import datetime
+from app.models.document import Document, DocumentContentRange, DocumentInDB, DocumentUpdate
+from app.repositories.base import DocumentRepository
 from app.services.ai_service import ai_service
+from app.services.plagiarism_service import plagiarism_service
+from app.services.keyword_service import keyword_service
+from app.services.similarity_service import similarity_service
+from app.services.rollup_service import rollup_service
+from app.services import profiling
+from app.services.conditional import document_parts
+from app.services.events import CREATED, DOCUMENT, UPDATED, event_bus
 
 class DocumentService:
-    def __init__(self, db_collection):
-        self.collection = db_collection
+    def __init__(self, repository: DocumentRepository):
+        self.repository = repository
 
     async def create_document(self, document: Document, user_id: str):
         stats = ai_service.calculate_writing_stats(document.content)
         doc_data = document.dict()
         doc_data["user_id"] = user_id
+        # Stored, not left to the model defaults: ETags, rollups and version checks depend on them
+        doc_data["created_at"] = doc_data["updated_at"] = datetime.utcnow()
+        doc_data["version"] = 1
         doc_data.update(stats)
-        created = await self.collection.insert_one(doc_data)
-        created_doc = await self.collection.find_one({"_id": created.inserted_id})
-        if "_id" in created_doc:
-            created_doc["_id"] = str(created_doc["_id"])
+        doc_id = await self.repository.insert(doc_data)
+        await plagiarism_service.index_document(doc_id, user_id, document.content)
+        await keyword_service.add_document(user_id, document.content)
+        await similarity_service.add_document(user_id, doc_id, document.content)
+        await self._record_save(user_id, document.content, stats.word_count)
+        await event_bus.publish(DOCUMENT, CREATED, id=doc_id, user_id=user_id, document_id=doc_id)
+        created_doc = await self.repository.get(doc_id)
         return Document.from_db(DocumentInDB(**created_doc))
 
     async def get_documents_by_user(self, user_id: str):
-        cursor = self.collection.find({"user_id": user_id})
-        documents = []
-        async for doc in cursor:
-            doc["_id"] = str(doc["_id"])
-            documents.append(Document.from_db(DocumentInDB(**doc)))
-        return documents
-
-    async def get_document(self, doc_id: str, user_id: str = None):
-        try:
-            obj_id = ObjectId(doc_id)
-        except Exception:
-            return None
+        return [Document.from_db(DocumentInDB(**doc)) for doc in await self.repository.list_by_user(user_id)]
+
+    async def document_versions(self, user_id: str) -> list:
+        """(id, version, updated_at) of each of the user's documents, without loading bodies"""
+        return sorted([document_parts(record) async for record in self.repository.scan(user_id, fields=("version", "updated_at"))])
 
-        query = {"_id": obj_id}
-        if user_id:
-            query["user_id"] = user_id
+    async def get_documents_by_ids(self, doc_ids: list, user_id: str):
+        return [Document.from_db(DocumentInDB(**doc)) for doc in await self.repository.get_many(doc_ids, user_id)]
 
-        doc = await self.collection.find_one(query)
+    async def get_document(self, doc_id: str, user_id: str = None, include_content: bool = True):
+        """The document; include_content=False skips the body (content is then empty) for ownership/metadata checks"""
+        doc = await self.repository.get(doc_id, user_id, content=include_content)
         if not doc:
             return None
-        doc["_id"] = str(doc["_id"])
+        profiling.tag(document_id=doc_id, document_chars=doc.get("content_length", len(doc.get("content", ""))))
         return Document.from_db(DocumentInDB(**doc))
 
+    async def read_content(self, doc_id: str, user_id: str, start: int = 0, end: int = None):
+        """A character range of the body, without loading the rest of a chunked document"""
+        found = await self.repository.read_range(doc_id, start, end, user_id)
+        if found is None:
+            return None
+        text, length = found
+        return DocumentContentRange(
+            document_id=doc_id, start=min(start, length), end=min(start, length) + len(text), length=length, content=text
+        )
+
+    async def update_document(self, doc_id: str, user_id: str, update: DocumentUpdate):
+        existing = await self.get_document(doc_id, user_id)
+        if not existing:
+            return None
+        changes = {k: v for k, v in update.dict().items() if v is not None}
+        content_changed = "content" in changes and changes["content"] != existing.content
+        if content_changed:
+            stats = ai_service.calculate_writing_stats(changes["content"])
+            changes.update(stats)
+        changes["updated_at"] = datetime.utcnow()
+        await self.repository.update(doc_id, user_id, changes)
+        if content_changed:
+            await plagiarism_service.index_document(doc_id, user_id, changes["content"])
+            await keyword_service.update_document(user_id, existing.content, changes["content"])
+            await similarity_service.add_document(user_id, doc_id, changes["content"])
+            await self._record_save(user_id, changes["content"], stats.word_count - existing.word_count)
+        await event_bus.publish(
+            DOCUMENT, UPDATED, id=doc_id, user_id=user_id, document_id=doc_id,
+            fields=[field for field in changes if field != "content" or content_changed]
+        )
+        return await self.get_document(doc_id, user_id)
+
+    async def _record_save(self, user_id: str, content: str, word_delta: int):
+        readability = None
+        if content.strip():
+            readability = (await asyncio.to_thread(ai_service.analyze_readability, content)).overall_score
+        await rollup_service.record(
+            user_id,
+            words_added=max(word_delta, 0),
+            words_removed=max(-word_delta, 0),
+            saves=1,
+            readability=readability
+        )
+
 
 # Shared service instance — will be initialized in main.py
 document_service: DocumentService = None
@@ -0,0 +1,209 @@
+"""Change events for documents, users, suggestions and comments.
+
+Services and routers publish an Event after each write, once the write and
+its direct side effects (search indexes, counters) are done. Caches,
+materialized stats and search indexes subscribe to drop or refresh what the
+write made stale. EVENT_BUS_BACKEND selects how far events travel:
+
+- local (default): subscribers in this process only
+- mongo: events are also appended to the change_events collection, which
+  every worker follows with a change stream, so each worker also sees the
+  writes served by the others. Change streams need a replica set (a
+  single-node one is enough); on a standalone server, or without MongoDB,
+  the bus logs a warning and stays local.
+
+change_events is an outbox rather than a change stream on the data
+collections: an event is only written after the side effects subscribers
+read back (e.g. the persisted plagiarism signature), it records the worker
+that published it, and it names the changed fields without a lookup.
+Entries expire after EVENTS_TTL_SECONDS.
+
+Subscribers that the publishing worker already keeps in step by calling
+them directly subscribe with local=False and only see other workers'
+events. If a worker's stream falls further behind than the collection
+keeps, each kind gets a RESET event and subscribers drop what they cache.
+"""
+import asyncio
+import logging
+import uuid
+from datetime import datetime
+from typing import Awaitable, Callable, FrozenSet, Iterable, List, NamedTuple, Optional, Tuple
+
+from pymongo import ASCENDING
+from pymongo.errors import OperationFailure, PyMongoError
+
+from app.config import settings
+from app.database import db
+from app.repositories.memory import MemoryDatabase
+from app.services.metrics import events_dispatched
+
+logger = logging.getLogger(__name__)
+
+DOCUMENT = "document"
+USER = "user"
+SUGGESTION = "suggestion"
+COMMENT = "comment"
+KINDS = (DOCUMENT, USER, SUGGESTION, COMMENT)
+
+CREATED = "created"
+UPDATED = "updated"
+DELETED = "deleted"
+RESET = "reset"  # events may have been missed; drop everything cached for this kind
+
+BACKENDS = ("local", "mongo")
+COLLECTION = "change_events"
+RETRY_SECONDS = 5.0
+# Server error codes
+NOT_A_REPLICA_SET = 40573
+HISTORY_LOST = 286
+
+
+class Event(NamedTuple):
+    kind: str
+    action: str
+    id: Optional[str] = None  # None for a batch, e.g. all suggestions generated in one request
+    user_id: Optional[str] = None
+    document_id: Optional[str] = None
+    fields: Tuple[str, ...] = ()  # changed fields of an update
+    origin: str = ""  # worker that published it
+    at: Optional[datetime] = None
+
+
+Handler = Callable[[Event], Awaitable[None]]
+
+
+class EventBus:
+    """Delivers events to this process's subscribers and, with the mongo backend, to other workers'"""
+
+    def __init__(self):
+        self.worker_id = uuid.uuid4().hex
+        self._subscribers: List[Tuple[Handler, FrozenSet[str], bool]] = []
+        self._collection = None
+        self._watcher: Optional[asyncio.Task] = None
+        self._resume_token = None
+
+    @property
+    def shared(self) -> bool:
+        """Whether events reach other workers"""
+        return self._collection is not None
+
+    def subscribe(self, handler: Handler, kinds: Iterable[str] = KINDS, local: bool = True) -> Callable[[], None]:
+        """Call `handler` for events of `kinds`; local=False skips this worker's own. Returns an unsubscribe function.
+
+        Handlers run inline in the publishing request and should only
+        invalidate or update in-memory state; failures are logged, not raised.
+        """
+        entry = (handler, frozenset(kinds), local)
+        self._subscribers.append(entry)
+
+        def unsubscribe():
+            if entry in self._subscribers:
+                self._subscribers.remove(entry)
+        return unsubscribe
+
+    async def publish(self, kind: str, action: str, id: Optional[str] = None, user_id: Optional[str] = None,
+                      document_id: Optional[str] = None, fields: Iterable[str] = ()) -> Event:
+        event = Event(kind, action, id, user_id, document_id, tuple(sorted(fields)), self.worker_id, datetime.utcnow())
+        await self._dispatch(event)
+        if self._collection is not None:
+            try:
+                await self._collection.insert_one({**event._asdict(), "fields": list(event.fields)})
+            except PyMongoError as e:
+                # The write itself succeeded; other workers catch up when their caches expire
+                logger.warning(f"Failed to share {kind} {action} event: {e}")
+        return event
+
+    async def _dispatch(self, event: Event):
+        remote = event.origin != self.worker_id
+        events_dispatched.inc(kind=event.kind, source="remote" if remote else "local")
+        for handler, kinds, local in list(self._subscribers):
+            if event.kind not in kinds or (not local and not remote):
+                continue
+            try:
+                await handler(event)
+            except Exception as e:
+                logger.error(f"Event handler {handler.__qualname__} failed on {event.kind} {event.action}: {e}")
+
+    async def _reset(self):
+        for kind in KINDS:
+            await self._dispatch(Event(kind, RESET, at=datetime.utcnow()))
+
+    # ------------------------------
+    # Mongo backend
+    # ------------------------------
+    def _watch(self):
+        pipeline = [{"$match": {"operationType": "insert", "fullDocument.origin": {"$ne": self.worker_id}}}]
+        return self._collection.watch(pipeline, resume_after=self._resume_token)
+
+    async def start(self):
+        """Start following other workers' events when EVENT_BUS_BACKEND=mongo"""
+        backend = settings.event_bus_backend
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown EVENT_BUS_BACKEND {backend!r}; expected one of {', '.join(BACKENDS)}")
+        if backend == "local" or self._watcher is not None:
+            return
+        if db.database is None or isinstance(db.database, MemoryDatabase):
+            logger.warning("EVENT_BUS_BACKEND=mongo needs STORAGE_BACKEND=mongo; events stay in this process")
+            return
+        collection = db.database[COLLECTION]
+        stream = None
+        try:
+            await collection.create_index([("at", ASCENDING)], expireAfterSeconds=settings.events_ttl_seconds)
+            self._collection = collection
+            stream = self._watch()
+            change = await stream.try_next()  # opens the stream; fails here on a standalone server
+        except PyMongoError as e:
+            self._collection = None
+            if stream is not None:
+                await stream.close()
+            if isinstance(e, OperationFailure) and e.code == NOT_A_REPLICA_SET:
+                logger.warning("MongoDB is not a replica set, so change streams are unavailable; events stay in this process")
+            else:
+                logger.warning(f"Could not follow {COLLECTION}; events stay in this process: {e}")
+            return
+        self._resume_token = stream.resume_token
+        if change is not None:
+            await self._dispatch(self._event(change))
+        self._watcher = asyncio.create_task(self._follow(stream))
+        logger.info(f"Event bus: sharing events through {COLLECTION} (worker {self.worker_id})")
+
+    @staticmethod
+    def _event(change) -> Event:
+        record = dict(change["fullDocument"])
+        record.pop("_id", None)
+        return Event(**{**record, "fields": tuple(record.get("fields") or ())})
+
+    async def _follow(self, stream):
+        while True:
+            try:
+                async with stream:
+                    async for change in stream:
+                        self._resume_token = stream.resume_token
+                        await self._dispatch(self._event(change))
+            except asyncio.CancelledError:
+                raise
+            except PyMongoError as e:
+                self._resume_token = stream.resume_token or self._resume_token
+                if isinstance(e, OperationFailure) and e.code == HISTORY_LOST:
+                    logger.warning(f"Missed events older than {COLLECTION} keeps; resetting subscribers")
+                    self._resume_token = None
+                else:
+                    logger.warning(f"Event stream interrupted, reconnecting in {RETRY_SECONDS:.0f}s: {e}")
+            await asyncio.sleep(RETRY_SECONDS)
+            if self._resume_token is None:
+                await self._reset()  # nothing to resume from; whatever happened meanwhile is unknown
+            stream = self._watch()
+
+    async def stop(self):
+        if self._watcher is not None:
+            self._watcher.cancel()
+            try:
+                await self._watcher
+            except asyncio.CancelledError:
+                pass
+            self._watcher = None
+        self._collection = None
+
+
+# Global instance
+event_bus = EventBus()
@@ -0,0 +1,151 @@
+import asyncio
+import time
+from collections import Counter, OrderedDict
+from typing import Dict, Iterable, Set
+
+from pymongo import UpdateOne
+
+from app.database import get_database
+from app.services.events import RESET, SUGGESTION, Event, event_bus
+from app.services.metrics import cache_requests
+
+GLOBAL = "*"  # user_id of the all-users aggregate
+
+
+class RuleStats:
+    """shown/applied/dismissed counters for one rule"""
+
+    __slots__ = ("shown", "applied", "dismissed")
+
+    def __init__(self, shown: int = 0, applied: int = 0, dismissed: int = 0):
+        self.shown = shown
+        self.applied = applied
+        self.dismissed = dismissed
+
+
+class RuleWeights:
+    """Ranking multipliers and suppressions for one user"""
+
+    __slots__ = ("weights", "suppressed")
+
+    def __init__(self, weights: Dict[str, float], suppressed: Set[str]):
+        self.weights = weights
+        self.suppressed = suppressed
+
+    def weight(self, rule_id: str) -> float:
+        return self.weights.get(rule_id, 1.0)
+
+
+class FeedbackService:
+    """Per-rule suggestion acceptance statistics.
+
+    Counters live in the suggestion_feedback collection, one document per
+    (user, rule) plus an all-users aggregate per rule, and are only ever
+    updated with $inc. A user's acceptance rate for a rule is smoothed
+    towards the global rate for that rule, so new users inherit what other
+    writers found useful and their own history takes over as it grows.
+    """
+
+    PRIOR_STRENGTH = 4.0  # global rate counts as this many pseudo-reactions
+    SUPPRESS_MIN_DISMISSED = 5
+    SUPPRESS_MAX_RATE = 0.1
+    MAX_CACHED_USERS = 1000
+    CACHE_TTL_SECONDS = 300  # picks up counters written by other workers
+
+    def __init__(self):
+        self.collection_name = "suggestion_feedback"
+        self._stats: "OrderedDict[str, Dict[str, RuleStats]]" = OrderedDict()
+        self._loaded_at: Dict[str, float] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def _remember(self, user_id: str, stats: Dict[str, RuleStats]):
+        self._stats[user_id] = stats
+        self._stats.move_to_end(user_id)
+        self._loaded_at[user_id] = time.monotonic()
+        while len(self._stats) > self.MAX_CACHED_USERS:
+            evicted, _ = self._stats.popitem(last=False)
+            self._loaded_at.pop(evicted, None)
+            self._locks.pop(evicted, None)
+
+    def _cached(self, user_id: str):
+        if user_id in self._stats and time.monotonic() - self._loaded_at[user_id] < self.CACHE_TTL_SECONDS:
+            self._stats.move_to_end(user_id)
+            return self._stats[user_id]
+        return None
+
+    async def _load(self, user_id: str) -> Dict[str, RuleStats]:
+        cached = self._cached(user_id)
+        if cached is not None:
+            cache_requests.inc(cache="feedback_stats", result="hit")
+            return cached
+        cache_requests.inc(cache="feedback_stats", result="miss")
+        async with self._locks.setdefault(user_id, asyncio.Lock()):
+            cached = self._cached(user_id)
+            if cached is not None:
+                return cached
+            db = await get_database()
+            stats = {}
+            async for entry in db[self.collection_name].find({"user_id": user_id}):
+                stats[entry["rule_id"]] = RuleStats(
+                    entry.get("shown", 0), entry.get("applied", 0), entry.get("dismissed", 0)
+                )
+            self._remember(user_id, stats)
+            return stats
+
+    async def _increment(self, user_id: str, counts: Counter, field: str):
+        if not counts:
+            return
+        db = await get_database()
+        await db[self.collection_name].bulk_write([
+            UpdateOne(
+                {"_id": f"{owner}:{rule_id}"},
+                {"$inc": {field: count}, "$setOnInsert": {"user_id": owner, "rule_id": rule_id}},
+                upsert=True
+            )
+            for owner in (user_id, GLOBAL) for rule_id, count in counts.items()
+        ], ordered=False)
+        for owner in (user_id, GLOBAL):
+            cached = self._stats.get(owner)
+            if cached is not None:
+                for rule_id, count in counts.items():
+                    stats = cached.setdefault(rule_id, RuleStats())
+                    setattr(stats, field, getattr(stats, field) + count)
+
+    async def record_shown(self, user_id: str, rule_ids: Iterable[str]):
+        await self._increment(user_id, Counter(r for r in rule_ids if r), "shown")
+
+    async def record_applied(self, user_id: str, rule_id: str):
+        if rule_id:
+            await self._increment(user_id, Counter([rule_id]), "applied")
+
+    async def record_dismissed(self, user_id: str, rule_id: str):
+        if rule_id:
+            await self._increment(user_id, Counter([rule_id]), "dismissed")
+
+    async def on_suggestion_event(self, event: Event):
+        """Suggestions were shown, applied or dismissed on another worker; reload the counters it changed"""
+        owners = list(self._stats) if event.action == RESET else (event.user_id, GLOBAL)
+        for owner in owners:
+            self._stats.pop(owner, None)
+            self._loaded_at.pop(owner, None)
+
+    async def weights(self, user_id: str) -> RuleWeights:
+        """Multipliers around 1.0 (neutral) for ranking, plus rules to skip entirely"""
+        user_stats = await self._load(user_id)
+        global_stats = await self._load(GLOBAL)
+        weights = {}
+        suppressed = set()
+        for rule_id in set(user_stats) | set(global_stats):
+            g = global_stats.get(rule_id, RuleStats())
+            u = user_stats.get(rule_id, RuleStats())
+            global_rate = (g.applied + 1) / (g.applied + g.dismissed + 2)
+            rate = (u.applied + self.PRIOR_STRENGTH * global_rate) / (u.applied + u.dismissed + self.PRIOR_STRENGTH)
+            weights[rule_id] = 2 * rate  # 0.5 acceptance is neutral
+            if u.dismissed >= self.SUPPRESS_MIN_DISMISSED and u.applied / (u.applied + u.dismissed) <= self.SUPPRESS_MAX_RATE:
+                suppressed.add(rule_id)
+        return RuleWeights(weights, suppressed)
+
+
+# Global feedback service instance
+feedback_service = FeedbackService()
+event_bus.subscribe(feedback_service.on_suggestion_event, kinds=(SUGGESTION,), local=False)
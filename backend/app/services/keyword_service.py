@@ -0,0 +1,239 @@
+import asyncio
+import logging
+import re
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+from pymongo import UpdateOne
+
+from app.database import get_database
+from app.repositories import repositories
+from app.models.analytics import KeywordExtraction
+from app.services.events import CREATED, DOCUMENT, RESET, Event, event_bus
+from app.services.metrics import cache_requests
+
+logger = logging.getLogger(__name__)
+
+# Built once at import instead of on every request
+STOP_WORDS = frozenset("""
+a about above after again against all also am an and any are aren't as at be because been before being
+below between both but by can can't cannot could couldn't did didn't do does doesn't doing don't down during
+each either else even ever every few for from further get gets got had hadn't has hasn't have haven't having
+he he'd he'll he's her here here's hers herself him himself his how how's however i i'd i'll i'm i've if in
+into is isn't it it's its itself just let's like made make many may me might more most much must mustn't my
+myself never no nor not now of off often on once one only or other ought our ours ourselves out over own
+rather really said same say says shall shan't she she'd she'll she's should shouldn't since so some still
+such than that that's the their theirs them themselves then there there's these they they'd they'll they're
+they've this those though through thus to too under until up upon us very was wasn't we we'd we'll we're
+we've well were weren't what what's when when's where where's whether which while who who's whom why why's
+will with within without won't would wouldn't yet you you'd you'll you're you've your yours yourself
+yourselves
+""".split())
+
+_TERM = re.compile(r"[a-z][a-z'-]*[a-z]")
+_PHRASE_DELIMITERS = re.compile(r"[.,;:!?()\[\]{}\"\n—–]+")
+_CAPITALIZED = re.compile(r"\b[A-Z][a-zA-Z]+(?:[ \t]+[A-Z][a-zA-Z]+)*")
+
+
+def tokenize_terms(text: str) -> List[str]:
+    return [t for t in _TERM.findall(text.lower()) if len(t) > 2 and t not in STOP_WORDS]
+
+
+class CorpusStats:
+    """Document-frequency table for one user's corpus; terms no document contains are dropped"""
+
+    def __init__(self, doc_count: int = 0, total_terms: int = 0, df: Optional[Dict[str, int]] = None):
+        self.doc_count = doc_count
+        self.total_terms = total_terms
+        self.df = df or {}
+
+    def add(self, terms: List[str]):
+        self.doc_count += 1
+        self.total_terms += len(terms)
+        for term in set(terms):
+            self.df[term] = self.df.get(term, 0) + 1
+
+    def replace(self, old_terms: List[str], new_terms: List[str]):
+        self.total_terms += len(new_terms) - len(old_terms)
+        old, new = set(old_terms), set(new_terms)
+        for term in new - old:
+            self.df[term] = self.df.get(term, 0) + 1
+        for term in old - new:
+            if self.df.get(term, 0) > 1:
+                self.df[term] -= 1
+            else:
+                self.df.pop(term, None)
+
+
+class KeywordService:
+    """BM25 keyword scoring, RAKE phrase extraction and simple entity spotting.
+
+    Document frequencies are kept per user in the keyword_stats collection and
+    updated incrementally on document save, so scoring never rescans the corpus.
+    """
+
+    K1 = 1.5
+    B = 0.75
+    MAX_CACHED_USERS = 1000
+
+    def __init__(self):
+        self.collection_name = "keyword_stats"
+        self._cache: "OrderedDict[str, CorpusStats]" = OrderedDict()
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    # ------------------------------
+    # Corpus statistics
+    # ------------------------------
+    def _remember(self, user_id: str, stats: CorpusStats):
+        self._cache[user_id] = stats
+        self._cache.move_to_end(user_id)
+        while len(self._cache) > self.MAX_CACHED_USERS:
+            evicted, _ = self._cache.popitem(last=False)
+            self._locks.pop(evicted, None)
+
+    async def get_stats(self, user_id: str) -> CorpusStats:
+        if user_id in self._cache:
+            self._cache.move_to_end(user_id)
+            cache_requests.inc(cache="keyword_stats", result="hit")
+            return self._cache[user_id]
+        cache_requests.inc(cache="keyword_stats", result="miss")
+        lock = self._locks.setdefault(user_id, asyncio.Lock())
+        async with lock:
+            if user_id in self._cache:
+                return self._cache[user_id]
+            db = await get_database()
+            entry = await db[self.collection_name].find_one({"_id": user_id})
+            if entry:
+                stats = CorpusStats(entry.get("doc_count", 0), entry.get("total_terms", 0), entry.get("df", {}))
+            else:
+                stats = await self.rebuild(user_id)
+            self._remember(user_id, stats)
+            return stats
+
+    async def rebuild(self, user_id: str) -> CorpusStats:
+        """Recompute a user's table from their documents (first use or repair)"""
+        db = await get_database()
+        stats = CorpusStats()
+        async for doc in repositories.documents.scan(user_id, fields=("content",)):
+            stats.add(tokenize_terms(doc.get("content", "")))
+        await db[self.collection_name].replace_one(
+            {"_id": user_id},
+            {"_id": user_id, "doc_count": stats.doc_count, "total_terms": stats.total_terms, "df": stats.df},
+            upsert=True
+        )
+        logger.info(f"Rebuilt keyword stats for user {user_id}: {stats.doc_count} documents")
+        return stats
+
+    async def add_document(self, user_id: str, content: str):
+        """Fold a newly saved document into the user's frequency table"""
+        terms = tokenize_terms(content)
+        increments = {f"df.{term}": 1 for term in set(terms)}
+        increments["doc_count"] = 1
+        increments["total_terms"] = len(terms)
+        db = await get_database()
+        # No upsert: a missing table is rebuilt from the whole corpus on first use
+        await db[self.collection_name].update_one({"_id": user_id}, {"$inc": increments})
+        if user_id in self._cache:
+            self._cache[user_id].add(terms)
+
+    async def update_document(self, user_id: str, old_content: str, new_content: str):
+        """Swap a re-saved document's terms in the user's frequency table"""
+        old_terms = tokenize_terms(old_content)
+        new_terms = tokenize_terms(new_content)
+        old, new = set(old_terms), set(new_terms)
+        increments = {f"df.{term}": 1 for term in new - old}
+        increments.update({f"df.{term}": -1 for term in old - new})
+        increments["total_terms"] = len(new_terms) - len(old_terms)
+        db = await get_database()
+        collection = db[self.collection_name]
+        await collection.update_one({"_id": user_id}, {"$inc": increments})
+        if old - new:
+            # Same rule as CorpusStats.replace: a term that reaches zero is removed, never left at or below it
+            await collection.bulk_write([
+                UpdateOne({"_id": user_id, f"df.{term}": {"$lte": 0}}, {"$unset": {f"df.{term}": ""}})
+                for term in old - new
+            ], ordered=False)
+        if user_id in self._cache:
+            self._cache[user_id].replace(old_terms, new_terms)
+
+    async def on_document_event(self, event: Event):
+        """Another worker changed a user's corpus; reload their table from the shared collection on next use"""
+        if event.action == RESET:
+            self._cache.clear()
+        elif event.action == CREATED or "content" in event.fields:
+            self._cache.pop(event.user_id, None)
+
+    # ------------------------------
+    # Extraction
+    # ------------------------------
+    def _bm25(self, terms: List[str], stats: CorpusStats, limit: int) -> List[Dict[str, float]]:
+        counts = Counter(terms)
+        if not counts:
+            return []
+        vocab = list(counts)
+        tf = np.fromiter(counts.values(), dtype=np.float64, count=len(vocab))
+        df = np.fromiter((stats.df.get(t, 0) for t in vocab), dtype=np.float64, count=len(vocab))
+        n_docs = max(stats.doc_count, 1)
+        avgdl = stats.total_terms / n_docs if stats.total_terms else len(terms)
+        idf = np.log1p((n_docs - df + 0.5) / (df + 0.5))
+        norm = self.K1 * (1 - self.B + self.B * len(terms) / max(avgdl, 1))
+        scores = idf * tf * (self.K1 + 1) / (tf + norm)
+        top = np.argsort(-scores, kind="stable")[:limit]
+        return [{vocab[i]: round(float(scores[i]), 4)} for i in top]
+
+    def _rake(self, text: str, limit: int) -> List[str]:
+        phrases = []
+        for fragment in _PHRASE_DELIMITERS.split(text.lower()):
+            phrase = []
+            for word in fragment.split():
+                word = word.strip("'-")
+                if not word or word in STOP_WORDS or not word.isalpha():
+                    if phrase:
+                        phrases.append(tuple(phrase))
+                    phrase = []
+                else:
+                    phrase.append(word)
+            if phrase:
+                phrases.append(tuple(phrase))
+        phrases = [p for p in phrases if len(p) <= 4]
+        freq: Counter = Counter()
+        degree: Counter = Counter()
+        for phrase in phrases:
+            for word in phrase:
+                freq[word] += 1
+                degree[word] += len(phrase)
+        scored = {p: sum(degree[w] / freq[w] for w in p) for p in set(phrases) if len(p) > 1}
+        ranked = sorted(scored.items(), key=lambda item: item[1], reverse=True)
+        return [" ".join(p) for p, _ in ranked[:limit]]
+
+    def _entities(self, text: str, limit: int) -> List[Dict[str, str]]:
+        found: "OrderedDict[str, str]" = OrderedDict()
+        for match in _CAPITALIZED.finditer(text):
+            candidate = match.group()
+            i = match.start() - 1
+            while i >= 0 and text[i] in " \t":
+                i -= 1
+            at_sentence_start = i < 0 or text[i] in ".!?\n\"'"
+            if " " not in candidate and (at_sentence_start or candidate.lower() in STOP_WORDS):
+                continue
+            found.setdefault(candidate, "PROPER_NOUN")
+            if len(found) >= limit:
+                break
+        return [{name: kind} for name, kind in found.items()]
+
+    def extract_with_stats(self, content: str, stats: CorpusStats, limit: int = 20) -> KeywordExtraction:
+        return KeywordExtraction(
+            keywords=self._bm25(tokenize_terms(content), stats, limit),
+            entities=self._entities(content, limit),
+            topics=self._rake(content, 10)
+        )
+
+    async def extract(self, content: str, user_id: str, limit: int = 20) -> KeywordExtraction:
+        stats = await self.get_stats(user_id)
+        return await asyncio.to_thread(self.extract_with_stats, content, stats, limit)
+
+
+# Global keyword service instance
+keyword_service = KeywordService()
+event_bus.subscribe(keyword_service.on_document_event, kinds=(DOCUMENT,), local=False)
@@ -0,0 +1,95 @@
+"""Language-aware analysis packs.
+
+Each pack lives in its own module and is imported the first time a
+document in that language is analyzed, then cached for the life of the
+process. Register additional languages with `register_language`.
+"""
+import importlib
+import logging
+import re
+import threading
+from collections import Counter
+from typing import Dict, List, Optional
+
+from app.services.languages.base import LanguagePack
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LANGUAGE = "en"
+UNDETERMINED = "und"
+
+_REGISTRY: Dict[str, str] = {
+    "en": "app.services.languages.en",
+    "es": "app.services.languages.es",
+    "fr": "app.services.languages.fr",
+    "de": "app.services.languages.de",
+    UNDETERMINED: "app.services.languages.generic",
+}
+_loaded: Dict[str, LanguagePack] = {}
+_lock = threading.Lock()
+
+# Function-word profiles for detection; tiny, so they are not part of the lazy packs
+_PROFILES = {
+    "en": frozenset("the and of to is in that it for was with as on are be this have not but".split()),
+    "es": frozenset("el la de que y en los se del las un por con no una su para es al lo".split()),
+    "fr": frozenset("le la de et les des est un une du en que qui dans pour pas au sur ne".split()),
+    "de": frozenset("der die und das ist nicht zu den mit sich des auf für ein eine dem im von".split()),
+}
+_WORD = re.compile(r"[^\W\d_]+")
+DETECT_SAMPLE_CHARS = 5000
+DETECT_MIN_HITS = 5
+
+
+def register_language(code: str, module_path: str):
+    """Map a language code to a module exposing a PACK attribute"""
+    _REGISTRY[code] = module_path
+
+
+def supported_languages() -> List[str]:
+    return sorted(c for c in _REGISTRY if c != UNDETERMINED)
+
+
+def loaded_languages() -> List[str]:
+    return sorted(_loaded)
+
+
+def normalize_language(language: Optional[str]) -> Optional[str]:
+    """'en-US' / 'pt_BR' / 'FR' -> 'en' / 'pt' / 'fr'; None or 'auto' -> None"""
+    if not language or language.lower() == "auto":
+        return None
+    return re.split(r"[-_]", language.strip().lower(), 1)[0] or None
+
+
+def detect_language(text: str) -> Optional[str]:
+    """Best profile match on a sample of the text, or None when nothing is convincing"""
+    words = Counter(_WORD.findall(text[:DETECT_SAMPLE_CHARS].lower()))
+    scores = {code: sum(words[w] for w in profile) for code, profile in _PROFILES.items()}
+    best = max(scores, key=scores.get)
+    return best if scores[best] >= DETECT_MIN_HITS else None
+
+
+def resolve_language(language: Optional[str], text: str = "") -> str:
+    """Declared language if supported; detected language when undeclared.
+
+    A declared language without a pack gets the language-neutral pack rather
+    than English rules.
+    """
+    code = normalize_language(language)
+    if code in _REGISTRY:
+        return code
+    if code is not None:
+        return UNDETERMINED
+    return detect_language(text) or DEFAULT_LANGUAGE
+
+
+def get_pack(language: Optional[str], text: str = "") -> LanguagePack:
+    code = resolve_language(language, text)
+    pack = _loaded.get(code)
+    if pack is None:
+        with _lock:
+            pack = _loaded.get(code)
+            if pack is None:
+                pack = importlib.import_module(_REGISTRY[code]).PACK
+                _loaded[code] = pack
+                logger.info(f"Loaded {pack.name} analysis pack")
+    return pack
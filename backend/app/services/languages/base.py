@@ -0,0 +1,51 @@
+import re
+from typing import List, Optional, Pattern, Tuple
+
+from app.services.text_segmentation import sentence_spans
+
+# Rules that hold in any language
+SPACING_RULES = [
+    ('grammar.multiple_spaces', re.compile(r'\s{2,}'), 'Multiple spaces found'),
+    ('grammar.repeated_punctuation', re.compile(r'[.!?]{2,}'), 'Multiple punctuation marks')
+]
+
+
+def vocabulary_rules(replacements, explanation: str) -> List[Tuple[str, Pattern, str, str]]:
+    """Compile {phrase: replacement} into (rule_id, pattern, replacement, explanation) tuples"""
+    return [
+        ('vocabulary.' + original.replace(' ', '_'), re.compile(r'\b' + re.escape(original) + r'\b', re.IGNORECASE),
+         replacement, explanation.format(replacement=replacement))
+        for original, replacement in replacements.items()
+    ]
+
+
+class LanguagePack:
+    """Tokenizer settings and rule tables for one language.
+
+    Every rule table is optional; the checkers skip what a pack does not
+    provide. `punkt_language` names the NLTK Punkt model, or None to use the
+    regex sentence splitter.
+    """
+
+    def __init__(
+        self,
+        code: str,
+        name: str,
+        punkt_language: Optional[str] = None,
+        grammar_rules: Optional[List[Tuple[str, Pattern, str]]] = None,
+        passive_patterns: Optional[List[Pattern]] = None,
+        vocabulary_rules: Optional[List[Tuple[str, Pattern, str, str]]] = None,
+        subordinators: Optional[Pattern] = None,
+        nominalization: Optional[Pattern] = None
+    ):
+        self.code = code
+        self.name = name
+        self.punkt_language = punkt_language
+        self.grammar_rules = grammar_rules if grammar_rules is not None else SPACING_RULES
+        self.passive_patterns = passive_patterns or []
+        self.vocabulary_rules = vocabulary_rules or []
+        self.subordinators = subordinators
+        self.nominalization = nominalization
+
+    def sentence_spans(self, text: str) -> List[Tuple[int, int]]:
+        return sentence_spans(text, self.punkt_language)
@@ -0,0 +1,28 @@
+import re
+
+from app.services.languages.base import SPACING_RULES, LanguagePack, vocabulary_rules
+
+PACK = LanguagePack(
+    code="de",
+    name="German",
+    punkt_language="german",
+    grammar_rules=[
+        ('grammar.das_dass', re.compile(r'\b(das|dass)\b', re.IGNORECASE), 'Check das/dass usage'),
+        ('grammar.seid_seit', re.compile(r'\b(seid|seit)\b', re.IGNORECASE), 'Check seid/seit usage'),
+    ] + SPACING_RULES,
+    passive_patterns=[
+        re.compile(r'\b(wird|werden|wurde|wurden|worden)\b(?:\s+\w+){0,4}?\s+ge\w+(?:t|en)\b', re.IGNORECASE)
+    ],
+    vocabulary_rules=vocabulary_rules({
+        'sehr gut': 'hervorragend',
+        'sehr schlecht': 'miserabel',
+        'sehr groß': 'riesig',
+        'sehr klein': 'winzig',
+        'ding': 'Gegenstand/Sache/Thema'
+    }, "Erwägen Sie '{replacement}'"),
+    subordinators=re.compile(
+        r'\b(?:welche|welcher|welches|welchen|weil|obwohl|während|wenn|falls|nachdem|bevor|damit|sodass)\b',
+        re.IGNORECASE
+    ),
+    nominalization=re.compile(r'\b\w{3,}(?:ung|heit|keit|tion|ität)(?:en)?\b', re.IGNORECASE)
+)
@@ -0,0 +1,32 @@
+import re
+
+from app.services.languages.base import SPACING_RULES, LanguagePack, vocabulary_rules
+
+PACK = LanguagePack(
+    code="en",
+    name="English",
+    punkt_language="english",
+    grammar_rules=[
+        ('grammar.there_their', re.compile(r'\b(there|their|they\'re)\b', re.IGNORECASE), 'Check there/their/they\'re usage'),
+        ('grammar.your_youre', re.compile(r'\b(your|you\'re)\b', re.IGNORECASE), 'Check your/you\'re usage'),
+        ('grammar.its_its', re.compile(r'\b(its|it\'s)\b', re.IGNORECASE), 'Check its/it\'s usage'),
+    ] + SPACING_RULES,
+    passive_patterns=[
+        re.compile(r'\b(was|were|is|are|been|being)\s+\w+ed\b', re.IGNORECASE),
+        re.compile(r'\b(was|were|is|are|been|being)\s+\w+en\b', re.IGNORECASE)
+    ],
+    vocabulary_rules=vocabulary_rules({
+        'very good': 'excellent',
+        'very bad': 'terrible',
+        'very big': 'enormous',
+        'very small': 'tiny',
+        'a lot of': 'many',
+        'thing': 'item/matter/subject'
+    }, "Consider using '{replacement}'"),
+    # Words that usually open a subordinate or relative clause ("that"/"since" are too often not)
+    subordinators=re.compile(
+        r'\b(?:which|who|whom|whose|because|although|though|whereas|unless|if|when|whenever|where|wherever|while)\b',
+        re.IGNORECASE
+    ),
+    nominalization=re.compile(r'\b[a-z]{4,}(?:tion|sion|ment|ance|ence|ity|ness)s?\b', re.IGNORECASE)
+)
@@ -0,0 +1,28 @@
+import re
+
+from app.services.languages.base import SPACING_RULES, LanguagePack, vocabulary_rules
+
+PACK = LanguagePack(
+    code="es",
+    name="Spanish",
+    punkt_language="spanish",
+    grammar_rules=[
+        ('grammar.haber_a_ver', re.compile(r'\b(haber|a ver)\b', re.IGNORECASE), 'Check haber/a ver usage'),
+        ('grammar.sino_si_no', re.compile(r'\b(sino|si no)\b', re.IGNORECASE), 'Check sino/si no usage'),
+    ] + SPACING_RULES,
+    passive_patterns=[
+        re.compile(r'\b(fue|fueron|es|son|era|eran|sido|siendo)\s+\w+(?:ado|ada|ido|ida)s?\b', re.IGNORECASE)
+    ],
+    vocabulary_rules=vocabulary_rules({
+        'muy bueno': 'excelente',
+        'muy malo': 'pésimo',
+        'muy grande': 'enorme',
+        'muy pequeño': 'diminuto',
+        'cosa': 'asunto/elemento/tema'
+    }, "Considere usar '{replacement}'"),
+    subordinators=re.compile(
+        r'\b(?:cual|cuales|quien|quienes|cuyo|cuya|porque|aunque|mientras|cuando|donde|si)\b',
+        re.IGNORECASE
+    ),
+    nominalization=re.compile(r'\b\w{4,}(?:ción|sión|miento|idad|encia|ancia)(?:es|s)?\b', re.IGNORECASE)
+)
@@ -0,0 +1,28 @@
+import re
+
+from app.services.languages.base import SPACING_RULES, LanguagePack, vocabulary_rules
+
+PACK = LanguagePack(
+    code="fr",
+    name="French",
+    punkt_language="french",
+    grammar_rules=[
+        ('grammar.a_a', re.compile(r'\b(a|à)\b', re.IGNORECASE), 'Check a/à usage'),
+        ('grammar.ou_ou', re.compile(r'\b(ou|où)\b', re.IGNORECASE), 'Check ou/où usage'),
+    ] + SPACING_RULES,
+    passive_patterns=[
+        re.compile(r'\b(est|sont|était|étaient|été|fut|furent)\s+\w{2,}(?:é|ée|és|ées|i|ie|is|ies|u|ue|us|ues)\b', re.IGNORECASE)
+    ],
+    vocabulary_rules=vocabulary_rules({
+        'très bon': 'excellent',
+        'très mauvais': 'exécrable',
+        'très grand': 'immense',
+        'très petit': 'minuscule',
+        'chose': 'élément/sujet/question'
+    }, "Envisagez « {replacement} »"),
+    subordinators=re.compile(
+        r'\b(?:qui|dont|lequel|laquelle|lesquels|lesquelles|parce|puisque|quoique|lorsque|quand|où|si)\b',
+        re.IGNORECASE
+    ),
+    nominalization=re.compile(r'\b\w{4,}(?:tion|sion|ment|ance|ence|ité)s?\b', re.IGNORECASE)
+)
@@ -0,0 +1,4 @@
+from app.services.languages.base import LanguagePack
+
+# Declared languages without a pack: only language-neutral rules, regex sentence splitting
+PACK = LanguagePack(code="und", name="the document's language")
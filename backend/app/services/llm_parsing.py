@@ -0,0 +1,185 @@
+import json
+import re
+from difflib import SequenceMatcher
+from typing import Any, Dict, List, Optional, Tuple
+
+SUGGESTION_TYPES = ('grammar', 'style', 'clarity', 'tone', 'vocabulary')
+
+# JSON schema the LLM is asked to follow in structured-output mode
+SUGGESTION_JSON_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "suggestions": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "type": {"type": "string", "enum": list(SUGGESTION_TYPES)},
+                    "issue": {"type": "string", "description": "exact text copied from the passage"},
+                    "suggestion": {"type": "string"},
+                    "explanation": {"type": "string"},
+                },
+                "required": ["type", "issue", "suggestion", "explanation"],
+            },
+        }
+    },
+    "required": ["suggestions"],
+}
+
+REQUIRED_FIELDS = ('type', 'issue', 'suggestion', 'explanation')
+
+
+# ------------------------------
+# Streaming JSON parser
+# ------------------------------
+class SuggestionStreamParser:
+    """Incrementally extracts complete suggestion objects from a streamed LLM reply.
+
+    Any JSON object that is an element of an array is emitted as soon as its
+    closing brace arrives, so `{"suggestions": [...]}`, a bare array, and
+    replies wrapped in prose or code fences are all handled.
+    """
+
+    def __init__(self):
+        self._stack: List[str] = []
+        self._starts: List[Optional[int]] = []
+        self._in_string = False
+        self._escape = False
+        self._text = ""
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        items = []
+        base = len(self._text)
+        self._text += chunk
+        for i, ch in enumerate(chunk, start=base):
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+            if ch == '"' and self._stack:
+                self._in_string = True
+            elif ch in '{[':
+                in_array = bool(self._stack) and self._stack[-1] == '['
+                self._stack.append(ch)
+                self._starts.append(i if ch == '{' and in_array else None)
+            elif ch in '}]' and self._stack:
+                self._stack.pop()
+                start = self._starts.pop()
+                if start is not None:
+                    item = self._decode(self._text[start:i + 1])
+                    if item is not None:
+                        items.append(item)
+        return items
+
+    @staticmethod
+    def _decode(raw: str) -> Optional[Dict[str, Any]]:
+        try:
+            value = json.loads(raw)
+        except ValueError:
+            return None
+        if not isinstance(value, dict) or not all(isinstance(value.get(k), str) for k in REQUIRED_FIELDS):
+            return None
+        return value
+
+
+def parse_suggestion_items(ai_text: str) -> List[Dict[str, Any]]:
+    """Parse a complete structured reply into suggestion dicts"""
+    return SuggestionStreamParser().feed(ai_text)
+
+
+def parse_text_items(ai_text: str) -> List[Dict[str, str]]:
+    """Parse the legacy '- Type: / - Issue: ...' free-text format"""
+    items = []
+    current: Dict[str, str] = {}
+    for line in ai_text.split('\n'):
+        line = line.strip()
+        for field in REQUIRED_FIELDS:
+            prefix = f"- {field.capitalize()}:"
+            if line.startswith(prefix):
+                if field == 'type' and current:
+                    items.append(current)
+                    current = {}
+                current[field] = line[len(prefix):].strip()
+                break
+    if current:
+        items.append(current)
+    return [item for item in items if all(k in item for k in REQUIRED_FIELDS)]
+
+
+# ------------------------------
+# Span resolution
+# ------------------------------
+def _fold(text: str) -> str:
+    """Case-fold without changing string length, so offsets stay valid"""
+    folded = text.casefold()
+    if len(folded) == len(text):
+        return folded
+    out = []
+    for ch in text:
+        f = ch.casefold()
+        if len(f) != 1:
+            f = ch.lower() if len(ch.lower()) == 1 else ch
+        out.append(f)
+    return "".join(out)
+
+
+_WORD = re.compile(r'\w+')
+
+
+class TextIndex:
+    """Case-folded view of a document, built once and shared by all span lookups"""
+
+    FUZZY_WINDOW = 1500
+    FUZZY_MIN_RATIO = 0.8
+
+    def __init__(self, text: str):
+        self.text = text
+        self.folded = _fold(text)
+
+    def find(self, needle: str, near: int = 0, lo: int = 0, hi: Optional[int] = None) -> Optional[Tuple[int, int]]:
+        """Locate needle within [lo, hi), preferring the occurrence at or just after `near`.
+
+        Tries an exact case-insensitive match, then a match ignoring whitespace
+        and punctuation differences, then a fuzzy match around `near`.
+        """
+        hi = len(self.text) if hi is None else hi
+        needle = needle.strip()
+        if not needle:
+            return None
+        folded_needle = _fold(needle)
+
+        spans = []
+        pos = self.folded.find(folded_needle, lo, hi)
+        while pos >= 0:
+            spans.append((pos, pos + len(needle)))
+            pos = self.folded.find(folded_needle, pos + 1, hi)
+        if not spans:
+            words = _WORD.findall(folded_needle)
+            if words:
+                pattern = re.compile(r'\W+'.join(re.escape(w) for w in words))
+                spans = [m.span() for m in pattern.finditer(self.folded, lo, hi)]
+        if spans:
+            return min(spans, key=lambda s: (s[0] < near, abs(s[0] - near)))
+        return self._fuzzy_find(folded_needle, near, lo, hi)
+
+    def _fuzzy_find(self, folded_needle: str, near: int, lo: int, hi: int) -> Optional[Tuple[int, int]]:
+        w_lo = max(lo, near - self.FUZZY_WINDOW)
+        w_hi = min(hi, near + self.FUZZY_WINDOW)
+        window = self.folded[w_lo:w_hi]
+        matcher = SequenceMatcher(None, window, folded_needle, autojunk=False)
+        block = matcher.find_longest_match(0, len(window), 0, len(folded_needle))
+        if block.size == 0:
+            return None
+        start = max(0, block.a - block.b)
+        end = min(len(window), start + len(folded_needle))
+        if SequenceMatcher(None, window[start:end], folded_needle, autojunk=False).ratio() < self.FUZZY_MIN_RATIO:
+            return None
+        while start < end and window[start].isspace():
+            start += 1
+        while end > start and window[end - 1].isspace():
+            end -= 1
+        return w_lo + start, w_lo + end
@@ -0,0 +1,397 @@
+"""Process-local metrics in the Prometheus text exposition format.
+
+Counters and histograms are recorded in memory and rendered on demand by
+the /metrics endpoint; values that already live elsewhere (cache and
+scheduler counters) are read at scrape time through collectors. In
+multi-worker mode every worker keeps its own registry, so each scrape
+reports the worker that served it.
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+from pymongo import monitoring
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = Tuple[str, ...]
+# (name, type, help, [(labels, value)])
+Family = Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        # Observations arrive from worker threads too (Mongo listener, to_thread jobs)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _labels(self, key: LabelValues, **extra) -> Dict[str, str]:
+        labels = dict(zip(self.labelnames, key))
+        labels.update(extra)
+        return labels
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def collect(self) -> Iterable[str]:
+        with self._lock:
+            values = list(self._values.items())
+        for key, value in values:
+            yield f"{self.name}{_format_labels(self._labels(key))} {_format_value(value)}"
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [per-bucket counts (non-cumulative) + overflow, sum]
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            entry[0][index] += 1
+            entry[1][0] += value
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def collect(self) -> Iterable[str]:
+        with self._lock:
+            values = [(key, list(counts), total[0]) for key, (counts, total) in self._values.items()]
+        for key, counts, total in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                labels = self._labels(key, le=_format_value(bound))
+                yield f"{self.name}_bucket{_format_labels(labels)} {cumulative}"
+            labels = _format_labels(self._labels(key))
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], Iterable[Family]]] = []
+
+    def _register(self, metric: _Metric) -> _Metric:
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def register_collector(self, collector: Callable[[], Iterable[Family]]):
+        """Add a callable that yields metric families read at scrape time"""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.collect())
+        for collector in self._collectors:
+            for name, metric_type, help, samples in collector():
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {metric_type}")
+                lines.extend(f"{name}{_format_labels(labels)} {_format_value(value)}" for labels, value in samples)
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_request_seconds = registry.histogram(
+    "writeflow_http_request_duration_seconds", "HTTP request latency by route template",
+    ("method", "route", "status")
+)
+suggestion_stage_seconds = registry.histogram(
+    "writeflow_suggestion_stage_duration_seconds", "Time spent in each stage of suggestion generation",
+    ("stage",)
+)
+mongo_command_seconds = registry.histogram(
+    "writeflow_mongo_command_duration_seconds", "MongoDB command latency as reported by the driver",
+    ("command", "outcome")
+)
+cache_requests = registry.counter(
+    "writeflow_cache_requests_total", "In-process cache lookups by cache and result",
+    ("cache", "result")
+)
+events_dispatched = registry.counter(
+    "writeflow_events_total", "Change events dispatched to subscribers by kind and source (this or another worker)",
+    ("kind", "source")
+)
+
+
+# ------------------------------
+# HTTP middleware
+# ------------------------------
+class MetricsMiddleware:
+    """ASGI middleware recording request latency per route template.
+
+    Labels use the matched route's path template (/api/documents/{doc_id})
+    rather than the raw path, so label cardinality stays bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status_code = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_code[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            http_request_seconds.observe(
+                time.perf_counter() - started,
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=status_code[0],
+            )
+
+
+# ------------------------------
+# MongoDB command listener
+# ------------------------------
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Driver-level timings for every command sent by the Motor client"""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        mongo_command_seconds.observe(event.duration_micros / 1e6, command=event.command_name, outcome="ok")
+
+    def failed(self, event):
+        mongo_command_seconds.observe(event.duration_micros / 1e6, command=event.command_name, outcome="error")
+
+
+class _PoolStats:
+    __slots__ = ("open", "in_use", "waiting", "max_in_use", "checkouts", "failures",
+                 "wait_seconds", "max_wait_seconds", "cleared")
+
+    def __init__(self):
+        self.open = 0
+        self.in_use = 0
+        self.waiting = 0
+        self.max_in_use = 0
+        self.checkouts = 0
+        self.failures: Dict[str, int] = {}
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.cleared = 0
+
+
+class MongoPoolMonitor(monitoring.ConnectionPoolListener):
+    """Connection pool occupancy and checkout wait times per server.
+
+    Saturation is connections in use over maxPoolSize; once it reaches 1,
+    further operations queue for a connection (`waiting`) and the time they
+    spend there shows up in the checkout wait histogram.
+    """
+
+    def __init__(self, max_pool_size: int = 100):
+        self.max_pool_size = max_pool_size
+        self._pools: Dict[str, _PoolStats] = {}
+        self._lock = threading.Lock()
+
+    def _pool(self, address) -> _PoolStats:
+        key = f"{address[0]}:{address[1]}" if isinstance(address, tuple) else str(address)
+        pool = self._pools.get(key)
+        if pool is None:
+            pool = self._pools[key] = _PoolStats()
+        return pool
+
+    def pool_created(self, event):
+        with self._lock:
+            self._pool(event.address)
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self._pool(event.address).cleared += 1
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        with self._lock:
+            self._pool(event.address).open += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            pool = self._pool(event.address)
+            pool.open = max(0, pool.open - 1)
+
+    def connection_check_out_started(self, event):
+        with self._lock:
+            self._pool(event.address).waiting += 1
+
+    def connection_check_out_failed(self, event):
+        mongo_pool_wait_seconds.observe(event.duration, outcome="failed")
+        with self._lock:
+            pool = self._pool(event.address)
+            pool.waiting = max(0, pool.waiting - 1)
+            pool.failures[event.reason] = pool.failures.get(event.reason, 0) + 1
+
+    def connection_checked_out(self, event):
+        mongo_pool_wait_seconds.observe(event.duration, outcome="ok")
+        with self._lock:
+            pool = self._pool(event.address)
+            pool.waiting = max(0, pool.waiting - 1)
+            pool.in_use += 1
+            pool.max_in_use = max(pool.max_in_use, pool.in_use)
+            pool.checkouts += 1
+            pool.wait_seconds += event.duration
+            pool.max_wait_seconds = max(pool.max_wait_seconds, event.duration)
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            pool = self._pool(event.address)
+            pool.in_use = max(0, pool.in_use - 1)
+
+    def snapshot(self) -> Dict[str, Dict[str, object]]:
+        with self._lock:
+            return {
+                address: {
+                    "open": pool.open,
+                    "in_use": pool.in_use,
+                    "waiting": pool.waiting,
+                    "max_pool_size": self.max_pool_size,
+                    "saturation": round(pool.in_use / self.max_pool_size, 3) if self.max_pool_size else 0.0,
+                    "max_in_use": pool.max_in_use,
+                    "checkouts": pool.checkouts,
+                    "checkout_failures": dict(pool.failures),
+                    "avg_wait_ms": round(pool.wait_seconds / pool.checkouts * 1000, 3) if pool.checkouts else 0.0,
+                    "max_wait_ms": round(pool.max_wait_seconds * 1000, 3),
+                    "cleared": pool.cleared,
+                }
+                for address, pool in self._pools.items()
+            }
+
+
+mongo_pool_wait_seconds = registry.histogram(
+    "writeflow_mongo_pool_checkout_wait_seconds", "Time spent waiting to check a connection out of the pool",
+    ("outcome",), buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 2.5, 5.0)
+)
+mongo_pool_monitor = MongoPoolMonitor()
+
+
+# ------------------------------
+# Collectors
+# ------------------------------
+def _collect_llm_cache() -> Iterable[Family]:
+    from app.services.llm_cache import llm_cache
+    stats = llm_cache.stats()
+    yield ("writeflow_llm_cache_requests_total", "counter", "LLM completion cache lookups by result", [
+        ({"result": "hit"}, stats["hits"]),
+        ({"result": "disk_hit"}, stats["disk_hits"]),
+        ({"result": "miss"}, stats["misses"]),
+        ({"result": "coalesced"}, stats["coalesced"]),
+    ])
+    yield ("writeflow_llm_cache_entries", "gauge", "Completions held in the in-memory LLM cache",
+           [({}, stats["memory_entries"])])
+
+
+def _collect_word_hash_cache() -> Iterable[Family]:
+    from app.services.plagiarism_service import _word_hash
+    info = _word_hash.cache_info()
+    yield ("writeflow_word_hash_cache_requests_total", "counter", "Plagiarism shingle word-hash cache lookups", [
+        ({"result": "hit"}, info.hits),
+        ({"result": "miss"}, info.misses),
+    ])
+
+
+def _collect_scheduler() -> Iterable[Family]:
+    from app.services.scheduler import scheduler
+    snapshot = scheduler.snapshot()
+    for field, metric_type in (("queued", "gauge"), ("running", "gauge"), ("completed", "counter"), ("rejected", "counter")):
+        samples = [({"priority": name}, values[field]) for name, values in snapshot.items() if field in values]
+        suffix = "_total" if metric_type == "counter" else ""
+        yield (f"writeflow_scheduler_{field}{suffix}", metric_type, f"Scheduler jobs {field} per priority class", samples)
+
+
+def _collect_mongo_pool() -> Iterable[Family]:
+    snapshot = mongo_pool_monitor.snapshot()
+    for field, metric_type in (("open", "gauge"), ("in_use", "gauge"), ("waiting", "gauge"),
+                               ("saturation", "gauge"), ("checkouts", "counter")):
+        suffix = "_total" if metric_type == "counter" else ""
+        yield (f"writeflow_mongo_pool_{field}{suffix}", metric_type, f"MongoDB connection pool {field.replace('_', ' ')}",
+               [({"address": address}, stats[field]) for address, stats in snapshot.items()])
+
+
+registry.register_collector(_collect_llm_cache)
+registry.register_collector(_collect_mongo_pool)
+registry.register_collector(_collect_word_hash_cache)
+registry.register_collector(_collect_scheduler)
@@ -0,0 +1,91 @@
+"""Offline NLTK resource bundle.
+
+Resources are downloaded once at build time into NLTK_DATA_DIR:
+
+    python -m app.services.nlp_resources
+
+At runtime nothing is ever downloaded; `preflight()` only checks that the
+bundle is present and reports what is missing.
+"""
+import logging
+import os
+import sys
+from typing import List
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_BUNDLE_DIR = "nltk_data"
+
+# NLTK package -> resource path checked at startup (punkt_tab covers every Punkt language)
+REQUIRED_RESOURCES = {
+    "punkt_tab": "tokenizers/punkt_tab/english/",
+}
+
+_configured = False
+
+
+def _resolve(path: str) -> str:
+    return path if os.path.isabs(path) else os.path.join(BACKEND_DIR, path)
+
+
+def bundle_dir() -> str:
+    from app.config import settings
+    return _resolve(settings.nltk_data_dir)
+
+
+def configure_data_path():
+    """Put the bundle first on NLTK's search path (idempotent, no I/O)"""
+    global _configured
+    if _configured:
+        return
+    import nltk
+    path = bundle_dir()
+    if path not in nltk.data.path:
+        nltk.data.path.insert(0, path)
+    _configured = True
+
+
+def missing_resources() -> List[str]:
+    configure_data_path()
+    import nltk
+    missing = []
+    for package, resource in REQUIRED_RESOURCES.items():
+        try:
+            nltk.data.find(resource)
+        except LookupError:
+            missing.append(package)
+    return missing
+
+
+def preflight(strict: bool = None) -> List[str]:
+    """Verify the bundle at startup; features degrade (regex sentence splitting) when resources are absent"""
+    if strict is None:
+        from app.config import settings
+        strict = settings.nlp_preflight_strict
+    missing = missing_resources()
+    if missing:
+        message = (
+            f"NLTK resources missing from {bundle_dir()}: {', '.join(missing)}. "
+            f"Build the bundle with `python -m app.services.nlp_resources`."
+        )
+        if strict:
+            raise RuntimeError(message)
+        logger.warning(message)
+    return missing
+
+
+def download_bundle(target: str = None):
+    import nltk
+    target = target or bundle_dir()
+    os.makedirs(target, exist_ok=True)
+    for package in REQUIRED_RESOURCES:
+        if not nltk.download(package, download_dir=target, quiet=True):
+            raise RuntimeError(f"Failed to download NLTK package {package!r}")
+    logger.info(f"NLTK bundle ready in {target}")
+
+
+if __name__ == "__main__":
+    # Runs at image build time, before any settings/secrets exist
+    logging.basicConfig(level=logging.INFO)
+    download_bundle(_resolve(sys.argv[1] if len(sys.argv) > 1 else os.getenv("NLTK_DATA_DIR", DEFAULT_BUNDLE_DIR)))
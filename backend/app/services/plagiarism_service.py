@@ -0,0 +1,231 @@
+import asyncio
+import hashlib
+import logging
+import re
+from collections import defaultdict
+from functools import lru_cache
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from app.database import get_database
+from app.repositories import repositories
+from app.models.analytics import PlagiarismMatch, PlagiarismReport
+from app.models.suggestion import SuggestionPosition
+from app.services.events import CREATED, DOCUMENT, RESET, Event, event_bus
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r'\w+')
+_SHINGLE_MULT = np.uint64(1099511628211)
+_MAX_HASH = np.iinfo(np.uint64).max
+
+
+@lru_cache(maxsize=200_000)
+def _word_hash(word: str) -> int:
+    return int.from_bytes(hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class PlagiarismService:
+    """Near-duplicate detection over the document corpus.
+
+    Each document gets a MinHash signature of its word shingles. Signatures
+    are banded into an LSH table so a query only looks at documents that
+    collide in at least one band; candidates are then confirmed by exact
+    shingle overlap, which also yields the matched spans.
+    """
+
+    SHINGLE_SIZE = 5
+    NUM_PERM = 128
+    BANDS = 64  # 2 rows per band: ~93% recall at Jaccard 0.2
+    MAX_CANDIDATES = 20
+    MIN_CONTAINMENT = 0.02
+    BLOCK = 4096
+
+    def __init__(self, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 2**63, size=self.NUM_PERM, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 2**63, size=self.NUM_PERM, dtype=np.uint64)
+        self._rows = self.NUM_PERM // self.BANDS
+        self._signatures: Dict[str, np.ndarray] = {}
+        self._buckets: Dict[Tuple[int, bytes], Set[str]] = defaultdict(set)
+        self._load_lock = asyncio.Lock()
+        self.loaded = False
+
+    # ------------------------------
+    # Shingling & signatures
+    # ------------------------------
+    def _shingles(self, text: str) -> Tuple[np.ndarray, List[Tuple[int, int]]]:
+        """Positional shingle hashes plus the character span of every word"""
+        spans = []
+        hashes = []
+        for match in _WORD.finditer(text):
+            spans.append(match.span())
+            hashes.append(_word_hash(match.group().casefold()))
+        n = len(hashes) - self.SHINGLE_SIZE + 1
+        if n <= 0:
+            return np.empty(0, dtype=np.uint64), spans
+        words = np.array(hashes, dtype=np.uint64)
+        shingles = np.zeros(n, dtype=np.uint64)
+        for j in range(self.SHINGLE_SIZE):
+            shingles = shingles * _SHINGLE_MULT + words[j:j + n]
+        return shingles, spans
+
+    def _signature(self, shingles: np.ndarray) -> np.ndarray:
+        unique = np.unique(shingles)
+        signature = np.full(self.NUM_PERM, _MAX_HASH, dtype=np.uint64)
+        for i in range(0, len(unique), self.BLOCK):
+            block = unique[i:i + self.BLOCK]
+            np.minimum(signature, (self._a[:, None] * block[None, :] + self._b[:, None]).min(axis=1), out=signature)
+        return signature
+
+    def _band_keys(self, signature: np.ndarray) -> List[Tuple[int, bytes]]:
+        bands = signature.reshape(self.BANDS, self._rows)
+        return [(i, band.tobytes()) for i, band in enumerate(bands)]
+
+    def signature_for(self, text: str) -> Optional[np.ndarray]:
+        shingles, _ = self._shingles(text)
+        return self._signature(shingles) if len(shingles) else None
+
+    # ------------------------------
+    # Index maintenance
+    # ------------------------------
+    def _add(self, doc_id: str, signature: np.ndarray):
+        self._remove(doc_id)
+        self._signatures[doc_id] = signature
+        for key in self._band_keys(signature):
+            self._buckets[key].add(doc_id)
+
+    def _remove(self, doc_id: str):
+        signature = self._signatures.pop(doc_id, None)
+        if signature is None:
+            return
+        for key in self._band_keys(signature):
+            bucket = self._buckets.get(key)
+            if bucket:
+                bucket.discard(doc_id)
+                if not bucket:
+                    del self._buckets[key]
+
+    async def index_document(self, doc_id: str, user_id: str, content: str):
+        """Incrementally (re)index one document and persist its signature"""
+        signature = await asyncio.to_thread(self.signature_for, content)
+        db = await get_database()
+        if signature is None:
+            self._remove(doc_id)
+            await db["plagiarism_signatures"].delete_one({"_id": doc_id})
+            return
+        self._add(doc_id, signature)
+        await db["plagiarism_signatures"].replace_one(
+            {"_id": doc_id},
+            {"_id": doc_id, "user_id": user_id, "signature": signature.astype("<u8").tobytes()},
+            upsert=True
+        )
+
+    async def remove_document(self, doc_id: str):
+        self._remove(doc_id)
+        db = await get_database()
+        await db["plagiarism_signatures"].delete_one({"_id": doc_id})
+
+    def _load_entry(self, entry: dict):
+        self._add(entry["_id"], np.frombuffer(entry["signature"], dtype="<u8").astype(np.uint64))
+
+    async def on_document_event(self, event: Event):
+        """Pick up signatures another worker persisted for documents it saved"""
+        if not self.loaded:
+            return  # load() reads them all
+        db = await get_database()
+        if event.action == RESET:
+            self._signatures.clear()
+            self._buckets.clear()
+            async for entry in db["plagiarism_signatures"].find({}):
+                self._load_entry(entry)
+        elif event.action == CREATED or "content" in event.fields:
+            entry = await db["plagiarism_signatures"].find_one({"_id": event.document_id})
+            if entry:
+                self._load_entry(entry)
+            else:
+                self._remove(event.document_id)
+
+    async def load(self):
+        """Load persisted signatures and index any documents that lack one"""
+        async with self._load_lock:
+            if self.loaded:
+                return
+            db = await get_database()
+            async for entry in db["plagiarism_signatures"].find({}):
+                self._load_entry(entry)
+            missing = 0
+            async for doc in repositories.documents.scan():
+                doc_id = doc["_id"]
+                if doc_id not in self._signatures:
+                    await self.index_document(doc_id, doc.get("user_id", ""), doc.get("content", ""))
+                    missing += 1
+            self.loaded = True
+            logger.info(f"Plagiarism index loaded: {len(self._signatures)} documents ({missing} newly indexed)")
+
+    # ------------------------------
+    # Queries
+    # ------------------------------
+    def _candidates(self, signature: np.ndarray, exclude: Optional[str]) -> List[str]:
+        found = set()
+        for key in self._band_keys(signature):
+            found.update(self._buckets.get(key, ()))
+        found.discard(exclude)
+        # Rank by estimated Jaccard so only the most promising are fetched
+        ranked = sorted(found, key=lambda d: np.count_nonzero(self._signatures[d] == signature), reverse=True)
+        return ranked[:self.MAX_CANDIDATES]
+
+    def _matched_spans(self, hit: np.ndarray, word_spans: List[Tuple[int, int]]) -> List[SuggestionPosition]:
+        covered = np.zeros(len(word_spans), dtype=bool)
+        for j in range(self.SHINGLE_SIZE):
+            covered[j:j + len(hit)] |= hit
+        edges = np.diff(np.concatenate(([0], covered.astype(np.int8), [0])))
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1) - 1
+        return [SuggestionPosition(start=word_spans[s][0], end=word_spans[e][1]) for s, e in zip(starts, ends)]
+
+    async def check(self, content: str, user_id: Optional[str] = None,
+                    exclude_document_id: Optional[str] = None) -> PlagiarismReport:
+        """Score `content` against the corpus, skipping `exclude_document_id` (the stored copy of the text).
+
+        The requester's own documents are listed as matches, so reused
+        passages still show up, but reusing one's own writing does not count
+        towards the score.
+        """
+        shingles, word_spans = await asyncio.to_thread(self._shingles, content)
+        if not len(shingles):
+            return PlagiarismReport(plagiarism_score=0.0, status="original", matches=[])
+        signature = await asyncio.to_thread(self._signature, shingles)
+        candidates = self._candidates(signature, exclude_document_id)
+
+        matches = []
+        covered = np.zeros(len(shingles), dtype=bool)
+        if candidates:
+            for doc in await repositories.documents.get_many(candidates):
+                doc_shingles, _ = await asyncio.to_thread(self._shingles, doc.get("content", ""))
+                hit = np.isin(shingles, doc_shingles)
+                containment = float(hit.mean())
+                if containment < self.MIN_CONTAINMENT:
+                    continue
+                own = bool(user_id) and doc.get("user_id") == user_id
+                if not own:
+                    covered |= hit
+                matches.append(PlagiarismMatch(
+                    # Only reveal the source document to its owner
+                    document_id=doc["_id"] if own else None,
+                    similarity=round(containment * 100, 2),
+                    matched_spans=self._matched_spans(hit, word_spans)
+                ))
+        matches.sort(key=lambda m: m.similarity, reverse=True)
+        score = round(float(covered.mean()) * 100, 2)
+        return PlagiarismReport(
+            plagiarism_score=score,
+            status="original" if score < 5 else "similarities_found",
+            matches=matches
+        )
+
+
+# Global instance
+plagiarism_service = PlagiarismService()
+event_bus.subscribe(plagiarism_service.on_document_event, kinds=(DOCUMENT,), local=False)
@@ -0,0 +1,261 @@
+"""Opt-in statistical profiling of individual requests.
+
+A request is profiled when an admin sends `X-Profile: 1` or when it falls
+in the configured random sample. While any profiled request is in flight,
+a sampler thread periodically captures Python stacks of the threads
+working for it: the event loop thread whenever that request's task is the
+one running, plus scheduler worker threads executing its jobs. Stacks are
+aggregated in the folded format ("root;caller;leaf count") used by
+flamegraph.pl, inferno and speedscope, and stored in the request_profiles
+collection together with route, document size and user tier.
+"""
+import asyncio
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+
+from bson import ObjectId
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "x-profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+COLLECTION = "request_profiles"
+MAX_STACK_DEPTH = 128
+TOP_FUNCTIONS = 25
+
+_current: ContextVar[Optional["ProfileSession"]] = ContextVar("profile_session", default=None)
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def admin_emails() -> Set[str]:
+    return {e.strip().lower() for e in settings.admin_emails.split(",") if e.strip()}
+
+
+def tag(**tags):
+    """Attach tags (document size, tier, ...) to the current request's profile; no-op when not profiling"""
+    session = _current.get()
+    if session is not None:
+        session.tags.update(tags)
+
+
+def propagate(func):
+    """Wrap func so the thread that runs it is sampled for the current profile, if any"""
+    session = _current.get()
+    if session is None:
+        return func
+
+    def run(*args, **kwargs):
+        thread_id = threading.get_ident()
+        session.threads.add(thread_id)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            session.threads.discard(thread_id)
+
+    return run
+
+
+def _frame_label(code) -> str:
+    filename = code.co_filename
+    if filename.startswith(_BACKEND_DIR):
+        filename = os.path.relpath(filename, _BACKEND_DIR)
+    else:
+        filename = os.path.basename(filename)
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+def _fold(frame) -> str:
+    labels = []
+    while frame is not None and len(labels) < MAX_STACK_DEPTH:
+        labels.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class ProfileSession:
+    """Samples collected for one request"""
+
+    def __init__(self, trigger: str, method: str, path: str):
+        self.id = ObjectId()
+        self.trigger = trigger
+        self.method = method
+        self.path = path
+        self.tags: Dict[str, object] = {}
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.threads: Set[int] = set()
+        self.loop = asyncio.get_running_loop()
+        self.task = asyncio.current_task()
+        self.loop_thread = threading.get_ident()
+        self.started = time.perf_counter()
+        self.started_at = datetime.utcnow()
+
+    def sample(self, frames):
+        # The loop thread runs every request; only count it while this request's task holds it
+        if asyncio.current_task(self.loop) is self.task:
+            frame = frames.get(self.loop_thread)
+            if frame is not None:
+                self.stacks[_fold(frame)] += 1
+                self.samples += 1
+        for thread_id in list(self.threads):
+            frame = frames.get(thread_id)
+            if frame is not None:
+                self.stacks[_fold(frame)] += 1
+                self.samples += 1
+
+    def to_document(self, route: str, status_code: int) -> dict:
+        duration = time.perf_counter() - self.started
+        return {
+            "_id": self.id,
+            "trigger": self.trigger,
+            "method": self.method,
+            "path": self.path,
+            "route": route,
+            "status": status_code,
+            "duration_ms": round(duration * 1000, 2),
+            "interval_ms": settings.profiling_interval_ms,
+            "samples": self.samples,
+            "tags": self.tags,
+            "top_functions": top_functions(self.stacks),
+            # Folded text rather than a mapping: stack labels contain '.' and '$'
+            "folded": folded(self.stacks),
+            "created_at": self.started_at,
+        }
+
+
+def folded(stacks: Counter) -> str:
+    return "\n".join(f"{stack} {count}" for stack, count in stacks.most_common())
+
+
+def top_functions(stacks: Counter, limit: int = TOP_FUNCTIONS) -> List[dict]:
+    """Functions ranked by self samples (leaf of the stack), with inclusive counts"""
+    self_counts = Counter()
+    total_counts = Counter()
+    for stack, count in stacks.items():
+        frames = stack.split(";")
+        self_counts[frames[-1]] += count
+        for label in set(frames):
+            total_counts[label] += count
+    return [
+        {"function": label, "self": count, "total": total_counts[label]}
+        for label, count in self_counts.most_common(limit)
+    ]
+
+
+class Sampler:
+    """Background thread that samples active sessions; runs only while any session is open"""
+
+    def __init__(self):
+        self._sessions: Set[ProfileSession] = set()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, session: ProfileSession):
+        with self._lock:
+            self._sessions.add(session)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+                self._thread.start()
+
+    def stop(self, session: ProfileSession):
+        with self._lock:
+            self._sessions.discard(session)
+
+    def _run(self):
+        interval = settings.profiling_interval_ms / 1000
+        while True:
+            with self._lock:
+                sessions = list(self._sessions)
+                if not sessions:
+                    self._thread = None
+                    return
+            frames = sys._current_frames()
+            now = time.perf_counter()
+            for session in sessions:
+                if now - session.started > settings.profiling_max_seconds:
+                    continue
+                try:
+                    session.sample(frames)
+                except Exception as e:  # never let a sampling glitch kill the thread
+                    logger.debug(f"Profile sample failed: {e}")
+            del frames
+            time.sleep(interval)
+
+
+sampler = Sampler()
+
+
+def _is_admin_request(headers: Dict[bytes, bytes]) -> bool:
+    authorization = headers.get(b"authorization", b"").decode("latin-1")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    from app.services.auth import verify_token
+    try:
+        return verify_token(token).lower() in admin_emails()
+    except Exception:
+        return False
+
+
+class ProfilingMiddleware:
+    """ASGI middleware that decides per request whether to profile, and stores the result"""
+
+    def __init__(self, app):
+        self.app = app
+
+    def _trigger(self, scope) -> Optional[str]:
+        headers = dict(scope["headers"])
+        if headers.get(PROFILE_HEADER.encode()) not in (None, b"", b"0") and _is_admin_request(headers):
+            return "header"
+        if settings.profiling_sample_rate > 0 and random.random() < settings.profiling_sample_rate:
+            return "sampled"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith("/api/profiles"):
+            await self.app(scope, receive, send)
+            return
+        trigger = self._trigger(scope)
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+
+        session = ProfileSession(trigger, scope["method"], scope["path"])
+        status_code = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_code[0] = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [
+                    (PROFILE_ID_HEADER.encode(), str(session.id).encode())
+                ]
+            await send(message)
+
+        token = _current.set(session)
+        sampler.start(session)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            sampler.stop(session)
+            _current.reset(token)
+            route = getattr(scope.get("route"), "path", "unmatched")
+            await _store(session.to_document(route, status_code[0]))
+
+
+async def _store(document: dict):
+    from app.database import get_database
+    try:
+        db = await get_database()
+        await db[COLLECTION].insert_one(document)
+    except Exception as e:
+        logger.warning(f"Could not store request profile {document['_id']}: {e}")
@@ -0,0 +1,174 @@
+import asyncio
+import logging
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, NamedTuple, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class TierLimits(NamedTuple):
+    requests_per_minute: float
+    burst: int
+    daily_llm_tokens: int
+
+
+TIER_LIMITS: Dict[str, TierLimits] = {
+    "free": TierLimits(requests_per_minute=30, burst=10, daily_llm_tokens=20_000),
+    "pro": TierLimits(requests_per_minute=120, burst=30, daily_llm_tokens=200_000),
+    "enterprise": TierLimits(requests_per_minute=600, burst=100, daily_llm_tokens=2_000_000),
+}
+
+
+def limits_for_tier(tier: str) -> TierLimits:
+    return TIER_LIMITS.get(tier or "free", TIER_LIMITS["free"])
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) for budgeting"""
+    return len(text) // 4 + 1
+
+
+# ------------------------------
+# Backends
+# ------------------------------
+class RateLimitBackend(ABC):
+    """Storage for token buckets and usage counters.
+
+    Implement this over a shared store (Redis, Mongo) to enforce limits
+    across workers; the in-memory backend only sees its own process.
+    """
+
+    @abstractmethod
+    async def consume(self, key: str, capacity: float, refill_per_second: float, cost: float = 1.0) -> float:
+        """Take `cost` tokens from the bucket. Returns 0 if allowed, else seconds until allowed."""
+
+    @abstractmethod
+    async def add_usage(self, key: str, amount: int, window_seconds: int) -> int:
+        """Add to the counter for the current window and return the new total"""
+
+    @abstractmethod
+    async def get_usage(self, key: str, window_seconds: int) -> int:
+        """Return the counter for the current window"""
+
+    @abstractmethod
+    async def reserve_usage(self, key: str, amount: int, limit: int, window_seconds: int) -> bool:
+        """Add to the current window's counter only if the total stays within `limit`; whether it was added"""
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    MAX_KEYS = 100_000
+
+    def __init__(self):
+        self._buckets: Dict[str, Tuple[float, float]] = {}  # key -> (tokens, updated_at)
+        self._usage: Dict[Tuple[str, int], int] = {}  # (key, window index) -> total
+        self._lock = asyncio.Lock()
+
+    async def consume(self, key: str, capacity: float, refill_per_second: float, cost: float = 1.0) -> float:
+        async with self._lock:
+            now = time.monotonic()
+            tokens, updated_at = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated_at) * refill_per_second)
+            if tokens >= cost:
+                self._buckets[key] = (tokens - cost, now)
+                retry_after = 0.0
+            else:
+                self._buckets[key] = (tokens, now)
+                retry_after = (cost - tokens) / refill_per_second if refill_per_second > 0 else float("inf")
+            if len(self._buckets) > self.MAX_KEYS:
+                self._prune_buckets(now, capacity, refill_per_second)
+            return retry_after
+
+    def _prune_buckets(self, now: float, capacity: float, refill_per_second: float):
+        # Buckets that have refilled completely carry no state worth keeping
+        idle = capacity / refill_per_second if refill_per_second > 0 else float("inf")
+        for key in [k for k, (_, updated_at) in self._buckets.items() if now - updated_at >= idle]:
+            del self._buckets[key]
+
+    async def add_usage(self, key: str, amount: int, window_seconds: int) -> int:
+        window = int(time.time() // window_seconds)
+        async with self._lock:
+            total = self._usage.get((key, window), 0) + amount
+            self._usage[(key, window)] = total
+            if len(self._usage) > self.MAX_KEYS:
+                for stale in [k for k in self._usage if k[1] < window]:
+                    del self._usage[stale]
+            return total
+
+    async def get_usage(self, key: str, window_seconds: int) -> int:
+        window = int(time.time() // window_seconds)
+        return self._usage.get((key, window), 0)
+
+    async def reserve_usage(self, key: str, amount: int, limit: int, window_seconds: int) -> bool:
+        window = int(time.time() // window_seconds)
+        async with self._lock:
+            total = self._usage.get((key, window), 0) + amount
+            if total > limit:
+                return False
+            self._usage[(key, window)] = total
+            return True
+
+
+# ------------------------------
+# Rate limiter & LLM budget
+# ------------------------------
+class RateLimiter:
+    """Per-user token bucket sized by subscription tier"""
+
+    def __init__(self, backend: RateLimitBackend):
+        self.backend = backend
+
+    async def hit(self, user_id: str, tier: str, scope: str = "api", cost: float = 1.0) -> float:
+        limits = limits_for_tier(tier)
+        return await self.backend.consume(
+            f"rl:{scope}:{user_id}",
+            capacity=limits.burst,
+            refill_per_second=limits.requests_per_minute / 60.0,
+            cost=cost,
+        )
+
+
+class LLMBudgetExhausted(Exception):
+    """An LLM call would exceed the user's daily token allowance"""
+
+    def __init__(self, user_id: str):
+        super().__init__(f"LLM token budget exhausted for user {user_id}")
+        self.user_id = user_id
+
+
+class LLMBudget:
+    """Tracks daily LLM token spend per user against the tier allowance.
+
+    Each upstream call reserves its worst case (prompt plus max reply) before
+    it is made and settles to the estimated actual spend afterwards, so a
+    request fanning out into many chunk calls cannot overshoot the allowance.
+    """
+
+    WINDOW_SECONDS = 86400
+
+    def __init__(self, backend: RateLimitBackend):
+        self.backend = backend
+
+    async def remaining(self, user_id: str, tier: str) -> int:
+        used = await self.backend.get_usage(f"llm:{user_id}", self.WINDOW_SECONDS)
+        return limits_for_tier(tier).daily_llm_tokens - used
+
+    async def record(self, user_id: str, tokens: int) -> int:
+        return await self.backend.add_usage(f"llm:{user_id}", tokens, self.WINDOW_SECONDS)
+
+    async def reserve(self, user_id: str, tier: str, tokens: int):
+        """Take `tokens` from today's allowance; raises LLMBudgetExhausted when they do not fit"""
+        limit = limits_for_tier(tier).daily_llm_tokens
+        if not await self.backend.reserve_usage(f"llm:{user_id}", tokens, limit, self.WINDOW_SECONDS):
+            raise LLMBudgetExhausted(user_id)
+
+    async def settle(self, user_id: str, reserved: int, spent: int):
+        """Return the unused part of a reservation (all of it when the call failed)"""
+        if spent != reserved:
+            await self.record(user_id, spent - reserved)
+
+
+# Global instances
+rate_limit_backend = InMemoryRateLimitBackend()
+rate_limiter = RateLimiter(rate_limit_backend)
+llm_budget = LLMBudget(rate_limit_backend)
@@ -0,0 +1,176 @@
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import UpdateOne
+
+from app.database import get_analytics_database, get_database
+from app.repositories import repositories
+
+logger = logging.getLogger(__name__)
+
+DAY = "day"
+WEEK = "week"
+COUNTERS = (
+    "words_added", "words_removed", "saves", "suggestions_applied", "suggestions_dismissed",
+    "readability_sum", "readability_count",
+)
+
+
+def created_at(record: dict) -> datetime:
+    """When a record was created; its ObjectId's timestamp for records saved before created_at was stored"""
+    if record.get("created_at"):
+        return record["created_at"]
+    try:
+        return ObjectId(record["_id"]).generation_time.replace(tzinfo=None)
+    except (InvalidId, TypeError):
+        return datetime.utcnow()
+
+
+def _increments(words_added: int = 0, words_removed: int = 0, saves: int = 0, suggestions_applied: int = 0,
+                suggestions_dismissed: int = 0, readability: Optional[float] = None) -> Dict[str, float]:
+    increments = {
+        "words_added": words_added,
+        "words_removed": words_removed,
+        "saves": saves,
+        "suggestions_applied": suggestions_applied,
+        "suggestions_dismissed": suggestions_dismissed,
+    }
+    if readability is not None:
+        increments["readability_sum"] = readability
+        increments["readability_count"] = 1
+    return {k: v for k, v in increments.items() if v}
+
+
+def bucket_start(at: datetime, period: str) -> str:
+    """ISO date of the bucket containing `at` (weeks start on Monday)"""
+    day = at.date()
+    if period == WEEK:
+        day -= timedelta(days=day.weekday())
+    return day.isoformat()
+
+
+class RollupService:
+    """Pre-aggregated daily/weekly writing activity per user.
+
+    Each save or suggestion action increments counters in one small bucket
+    document per period, so trend queries read a handful of buckets instead
+    of scanning documents and suggestions.
+    """
+
+    def __init__(self):
+        self.collection_name = "writing_rollups"
+
+    async def record(
+        self,
+        user_id: str,
+        at: Optional[datetime] = None,
+        words_added: int = 0,
+        words_removed: int = 0,
+        saves: int = 0,
+        suggestions_applied: int = 0,
+        suggestions_dismissed: int = 0,
+        readability: Optional[float] = None
+    ):
+        at = at or datetime.utcnow()
+        increments = _increments(
+            words_added, words_removed, saves, suggestions_applied, suggestions_dismissed, readability
+        )
+        if not increments:
+            return
+        db = await get_database()
+        for period in (DAY, WEEK):
+            bucket = bucket_start(at, period)
+            await db[self.collection_name].update_one(
+                {"_id": f"{user_id}:{period}:{bucket}"},
+                {"$inc": increments, "$setOnInsert": {"user_id": user_id, "period": period, "bucket": bucket}},
+                upsert=True
+            )
+
+    async def _buckets(self, user_id: str, period: str, since: str) -> List[Dict]:
+        db = await get_analytics_database()
+        cursor = db[self.collection_name].find(
+            {"user_id": user_id, "period": period, "bucket": {"$gte": since}}
+        ).sort("bucket", 1)
+        return [bucket async for bucket in cursor]
+
+    async def productivity_trend(self, user_id: str, days: int = 7) -> List[Dict[str, int]]:
+        """Net words written per day for the last `days` days, oldest first"""
+        today = datetime.utcnow()
+        since = bucket_start(today - timedelta(days=days - 1), DAY)
+        by_day = {
+            b["bucket"]: b.get("words_added", 0) - b.get("words_removed", 0)
+            for b in await self._buckets(user_id, DAY, since)
+        }
+        return [
+            {day: by_day.get(day, 0)}
+            for day in (bucket_start(today - timedelta(days=offset), DAY) for offset in range(days - 1, -1, -1))
+        ]
+
+    async def avg_writing_score(self, user_id: str, weeks: int = 4) -> Optional[float]:
+        """Mean readability score recorded on saves over the last `weeks` weeks"""
+        since = bucket_start(datetime.utcnow() - timedelta(weeks=weeks - 1), WEEK)
+        buckets = await self._buckets(user_id, WEEK, since)
+        total = sum(b.get("readability_sum", 0) for b in buckets)
+        count = sum(b.get("readability_count", 0) for b in buckets)
+        return round(total / count, 2) if count else None
+
+    async def backfill(self, user_id: Optional[str] = None, readability=None) -> int:
+        """Fill rollup buckets missing for activity stored before rollups existed.
+
+        Each document counts as one save of its current word count on its
+        creation date. `readability` is an optional callable(content) -> score.
+        Only buckets that do not exist yet are inserted (marked `backfilled`);
+        a period with any bucket, including one written by record(), is left
+        as it is, so live counters are never overwritten or deleted. The job
+        is re-runnable.
+        """
+        buckets: Dict[str, Dict[str, Dict]] = defaultdict(dict)  # user -> bucket id -> bucket
+
+        def add(owner: str, at: datetime, **counts):
+            increments = _increments(**counts)
+            if not increments:
+                return
+            for period in (DAY, WEEK):
+                bucket = bucket_start(at, period)
+                entry = buckets[owner].setdefault(
+                    f"{owner}:{period}:{bucket}",
+                    {"user_id": owner, "period": period, "bucket": bucket, "backfilled": True,
+                     **dict.fromkeys(COUNTERS, 0)}
+                )
+                for field, value in increments.items():
+                    entry[field] += value
+
+        processed = 0
+        async for doc in repositories.documents.scan(user_id, fields=("user_id", "content", "word_count", "created_at")):
+            content = doc.get("content", "")
+            score = None
+            if readability and content.strip():
+                score = await asyncio.to_thread(readability, content)
+            add(doc["user_id"], created_at(doc), words_added=doc.get("word_count", 0), saves=1, readability=score)
+            processed += 1
+        async for suggestion in repositories.suggestions.reviewed(user_id):
+            add(
+                suggestion["user_id"],
+                created_at(suggestion),
+                suggestions_applied=int(bool(suggestion.get("is_applied"))),
+                suggestions_dismissed=int(bool(suggestion.get("is_dismissed")))
+            )
+
+        db = await get_database()
+        collection = db[self.collection_name]
+        for user_buckets in buckets.values():
+            await collection.bulk_write([
+                UpdateOne({"_id": bucket_id}, {"$setOnInsert": entry}, upsert=True)
+                for bucket_id, entry in user_buckets.items()
+            ], ordered=False)
+        logger.info(f"Backfilled writing rollups from {processed} documents")
+        return processed
+
+
+# Global rollup service instance
+rollup_service = RollupService()
@@ -0,0 +1,153 @@
+import asyncio
+import functools
+import logging
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, NamedTuple
+
+from fastapi import HTTPException, status
+
+from app.config import settings
+from app.services import profiling
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = "interactive"  # typing-path calls: suggestions, tone checks
+BACKGROUND = "background"    # full-document analytics
+BULK = "bulk"                # batch sweeps, backfills
+
+
+class PriorityClass(NamedTuple):
+    rank: int  # lower runs first
+    max_concurrency: int
+    max_queue: int
+
+
+class SchedulerOverloaded(HTTPException):
+    def __init__(self, priority: str, status_code: int):
+        super().__init__(
+            status_code=status_code,
+            detail=f"Server busy, {priority} queue is full",
+            headers={"Retry-After": "1"},
+        )
+
+
+class PriorityScheduler:
+    """Admission control for analysis work with priority classes.
+
+    Each class has its own concurrency limit and queue bound. A job only
+    starts when no higher-priority job is waiting, so background analytics
+    yield to interactive requests. Synchronous (CPU-bound) jobs run on a
+    per-class thread pool, keeping them off the event loop.
+    """
+
+    def __init__(self, classes: Dict[str, PriorityClass], max_total_queue: int):
+        self.classes = classes
+        self.max_total_queue = max_total_queue
+        self._condition = asyncio.Condition()
+        self._executors: Dict[str, ThreadPoolExecutor] = {}
+        self._waiting = {name: 0 for name in classes}
+        # Arrival order per class; a job starts only from the head of its queue
+        self._queues = {name: deque() for name in classes}
+        self._running = {name: 0 for name in classes}
+        self._started = {name: 0 for name in classes}
+        self._completed = {name: 0 for name in classes}
+        self._rejected = {name: 0 for name in classes}
+        self._wait_seconds = {name: 0.0 for name in classes}
+
+    def _executor(self, priority: str) -> ThreadPoolExecutor:
+        if priority not in self._executors:
+            self._executors[priority] = ThreadPoolExecutor(
+                max_workers=self.classes[priority].max_concurrency,
+                thread_name_prefix=f"scheduler-{priority}",
+            )
+        return self._executors[priority]
+
+    def _can_start(self, priority: str) -> bool:
+        cls = self.classes[priority]
+        if self._running[priority] >= cls.max_concurrency:
+            return False
+        return not any(
+            self._waiting[other] for other, other_cls in self.classes.items() if other_cls.rank < cls.rank
+        )
+
+    async def _acquire(self, priority: str):
+        if self._waiting[priority] >= self.classes[priority].max_queue:
+            self._rejected[priority] += 1
+            raise SchedulerOverloaded(priority, status.HTTP_429_TOO_MANY_REQUESTS)
+        if sum(self._waiting.values()) >= self.max_total_queue:
+            self._rejected[priority] += 1
+            raise SchedulerOverloaded(priority, status.HTTP_503_SERVICE_UNAVAILABLE)
+
+        started = time.monotonic()
+        async with self._condition:
+            queue = self._queues[priority]
+            ticket = object()
+            queue.append(ticket)
+            self._waiting[priority] += 1
+            try:
+                # FIFO within a class: new arrivals cannot take a freed slot ahead of woken waiters
+                await self._condition.wait_for(lambda: queue[0] is ticket and self._can_start(priority))
+            except BaseException:
+                queue.remove(ticket)
+                self._waiting[priority] -= 1
+                self._condition.notify_all()
+                raise
+            queue.popleft()
+            self._waiting[priority] -= 1
+            self._running[priority] += 1
+            self._started[priority] += 1
+            # Lower classes may have been blocked only by this job waiting
+            self._condition.notify_all()
+        self._wait_seconds[priority] += time.monotonic() - started
+
+    async def _release(self, priority: str):
+        async with self._condition:
+            self._running[priority] -= 1
+            self._completed[priority] += 1
+            self._condition.notify_all()
+
+    async def run(self, priority: str, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run func under the given priority class; coroutines are awaited, sync callables go to a thread"""
+        await self._acquire(priority)
+        try:
+            if asyncio.iscoroutinefunction(func):
+                return await func(*args, **kwargs)
+            loop = asyncio.get_running_loop()
+            # Sampled as part of the calling request when it is being profiled
+            job = profiling.propagate(functools.partial(func, *args, **kwargs))
+            return await loop.run_in_executor(self._executor(priority), job)
+        finally:
+            await self._release(priority)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        metrics = {}
+        for name, cls in self.classes.items():
+            started = self._started[name]
+            metrics[name] = {
+                "queued": self._waiting[name],
+                "running": self._running[name],
+                "max_concurrency": cls.max_concurrency,
+                "max_queue": cls.max_queue,
+                "completed": self._completed[name],
+                "rejected": self._rejected[name],
+                "avg_wait_ms": round(self._wait_seconds[name] / started * 1000, 2) if started else 0.0,
+            }
+        return metrics
+
+    def shutdown(self):
+        for executor in self._executors.values():
+            executor.shutdown(wait=False)
+        self._executors.clear()
+
+
+# Global instance
+scheduler = PriorityScheduler(
+    classes={
+        INTERACTIVE: PriorityClass(0, settings.scheduler_interactive_concurrency, settings.scheduler_max_queue),
+        BACKGROUND: PriorityClass(1, settings.scheduler_background_concurrency, settings.scheduler_max_queue),
+        BULK: PriorityClass(2, settings.scheduler_bulk_concurrency, settings.scheduler_max_queue),
+    },
+    max_total_queue=settings.scheduler_max_total_queue,
+)
@@ -0,0 +1,270 @@
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import threading
+import zlib
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.config import settings
+from app.repositories import repositories
+from app.services.keyword_service import STOP_WORDS
+
+logger = logging.getLogger(__name__)
+
+DIM = 512
+RECORD = np.dtype([("id", "S24"), ("vector", "<f4", (DIM,))])
+
+_WORD = re.compile(r"[a-z0-9][a-z0-9'-]*")
+
+
+def embed(text: str) -> np.ndarray:
+    """Hashed unigram+bigram embedding, sublinear TF, L2-normalized"""
+    tokens = [t for t in _WORD.findall(text.lower()) if t not in STOP_WORDS]
+    if not tokens:
+        return np.zeros(DIM, dtype=np.float32)
+    features = Counter(tokens)
+    features.update(f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+    hashes = np.fromiter((zlib.crc32(f.encode("utf-8")) for f in features), dtype=np.uint32, count=len(features))
+    counts = np.fromiter(features.values(), dtype=np.float32, count=len(features))
+    signs = np.where(hashes & 0x80000000, -1.0, 1.0).astype(np.float32)
+    vector = np.bincount(hashes % DIM, weights=signs * np.log1p(counts), minlength=DIM).astype(np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class UserVectorIndex:
+    """Append-only, memory-mapped vector file for one user plus an IVF lookup table.
+
+    Each record is (document id, vector) written with a single append, so the
+    file is safe to share between workers; each process maps the file and
+    indexes only the records appended since it last looked. Re-embedding a
+    document appends a new record that supersedes the old one, unless its
+    vector is unchanged. A ".built" marker next to the file records that the
+    user's existing documents were backfilled.
+
+    Once superseded records outnumber live ones, the live records are
+    rewritten to a new file that replaces the old one; other processes
+    notice the new file and map it from the start. An append racing with
+    the rewrite can land in the replaced file, so the marker is dropped and
+    the next query backfills again, which only appends what is missing.
+
+    Small indexes are scanned exactly. Larger ones are partitioned with
+    spherical k-means; a query only scores the vectors in the lists of its
+    nearest centroids. Centroids are retrained when the index doubles.
+    """
+
+    EXACT_THRESHOLD = 2000  # below this, scanning every vector is cheaper than probing
+    NPROBE = 8
+    KMEANS_ITERATIONS = 8
+    COMPACT_MIN_RECORDS = 16  # below this, stale records cost less than rewriting the file
+
+    def __init__(self, path: str, seed: int = 7):
+        self.path = path
+        self.seed = seed
+        self._records: Optional[np.memmap] = None
+        self._count = 0
+        self._inode: Optional[int] = None
+        self._row_of: Dict[str, int] = {}
+        self._digests: Dict[str, bytes] = {}  # content digest of each document's latest record, appended here
+        self._centroids: Optional[np.ndarray] = None
+        self._lists: List[List[int]] = []
+        self._trained_count = 0
+        self._lock = threading.Lock()
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    @property
+    def _marker(self) -> str:
+        return self.path + ".built"
+
+    def backfilled(self) -> bool:
+        """Whether every document stored before the first append has been indexed"""
+        return os.path.exists(self._marker)
+
+    def mark_backfilled(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self._marker, "w"):
+            pass
+
+    def _vectors(self, start: int = 0, end: Optional[int] = None) -> np.ndarray:
+        return np.asarray(self._records["vector"][start:end])
+
+    def _train(self):
+        vectors = self._vectors()
+        nlist = max(8, int(np.sqrt(len(vectors))))
+        rng = np.random.default_rng(self.seed)
+        sample = vectors[rng.choice(len(vectors), size=min(len(vectors), nlist * 64), replace=False)]
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+        for _ in range(self.KMEANS_ITERATIONS):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            for c in range(nlist):
+                members = sample[assignment == c]
+                if len(members):
+                    centroid = members.sum(axis=0)
+                    norm = np.linalg.norm(centroid)
+                    centroids[c] = centroid / norm if norm else centroid
+        self._centroids = centroids
+        self._lists = [[] for _ in range(nlist)]
+        self._trained_count = 0
+        self._assign(0, len(vectors))
+        self._trained_count = len(vectors)
+
+    def _assign(self, start: int, end: int):
+        for offset, c in enumerate(np.argmax(self._vectors(start, end) @ self._centroids.T, axis=1)):
+            self._lists[c].append(start + offset)
+
+    def refresh(self):
+        with self._lock:
+            self._refresh()
+
+    def _reset(self):
+        self._records = None
+        self._count = 0
+        self._row_of = {}
+        self._centroids = None
+        self._lists = []
+        self._trained_count = 0
+
+    def _refresh(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            stat = None
+        inode = stat.st_ino if stat else None
+        count = stat.st_size // RECORD.itemsize if stat else 0
+        if inode != self._inode or count < self._count:
+            self._reset()  # compacted by this or another process
+            self._inode = inode
+        if count == self._count:
+            return
+        self._records = np.memmap(self.path, dtype=RECORD, mode="r", shape=(count,))
+        for offset, raw_id in enumerate(self._records["id"][self._count:count]):
+            self._row_of[raw_id.decode("ascii")] = self._count + offset
+        previous = self._count
+        self._count = count
+        if count > self.EXACT_THRESHOLD:
+            if self._centroids is None or count >= 2 * self._trained_count:
+                self._train()
+            else:
+                self._assign(previous, count)
+
+    def digest(self, doc_id: str) -> Optional[bytes]:
+        return self._digests.get(doc_id)
+
+    def add(self, doc_id: str, vector: np.ndarray, digest: Optional[bytes] = None) -> bool:
+        """Append `vector` for `doc_id` unless it already is the document's latest; whether it was appended"""
+        with self._lock:
+            self._refresh()
+            row = self._row_of.get(doc_id)
+            if row is not None and np.array_equal(self._records["vector"][row], vector):
+                appended = False
+            else:
+                self.append(doc_id, vector)
+                self._refresh()
+                appended = True
+            if digest is not None:
+                self._digests[doc_id] = digest
+            if self._count >= self.COMPACT_MIN_RECORDS and self._count - len(self._row_of) > len(self._row_of):
+                self._compact()
+            return appended
+
+    def _compact(self):
+        rows = sorted(self._row_of.values())
+        live = np.array(self._records[rows])
+        temporary = f"{self.path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as f:
+            f.write(live.tobytes())
+        os.replace(temporary, self.path)
+        if os.path.exists(self._marker):
+            os.remove(self._marker)
+        logger.info(f"Compacted {self.path}: {self._count} records to {len(rows)}")
+        self._refresh()
+
+    def append(self, doc_id: str, vector: np.ndarray):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        record = np.zeros(1, dtype=RECORD)
+        record["id"] = doc_id.encode("ascii")
+        record["vector"] = vector
+        with open(self.path, "ab") as f:
+            f.write(record.tobytes())
+
+    def query(self, vector: np.ndarray, k: int, exclude: Optional[str] = None) -> List[Tuple[str, float]]:
+        with self._lock:
+            self._refresh()
+            return self._query(vector, k, exclude)
+
+    def _query(self, vector: np.ndarray, k: int, exclude: Optional[str]) -> List[Tuple[str, float]]:
+        if not self._count:
+            return []
+        live = {row: doc_id for doc_id, row in self._row_of.items() if doc_id != exclude}
+        if self._centroids is not None and len(live) > self.EXACT_THRESHOLD:
+            probes = np.argsort(-(self._centroids @ vector))[:self.NPROBE]
+            rows = sorted(r for c in probes for r in self._lists[c] if r in live)
+            if len(rows) < k:
+                rows = sorted(live)
+        else:
+            rows = sorted(live)
+        if not rows:
+            return []
+        scores = np.asarray(self._records["vector"][rows]) @ vector
+        top = np.argsort(-scores)[:k]
+        return [(live[rows[i]], float(scores[i])) for i in top if scores[i] > 0]
+
+
+class SimilarityService:
+    """Per-user related-document search over local hashed embeddings"""
+
+    def __init__(self, index_dir: str):
+        self.index_dir = index_dir
+        self._indexes: Dict[str, UserVectorIndex] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def _index(self, user_id: str) -> UserVectorIndex:
+        if user_id not in self._indexes:
+            filename = re.sub(r"[^\w-]", "_", user_id) + ".vec"
+            self._indexes[user_id] = UserVectorIndex(os.path.join(self.index_dir, filename))
+        return self._indexes[user_id]
+
+    async def add_document(self, user_id: str, doc_id: str, content: str):
+        index = self._index(user_id)
+        digest = hashlib.blake2b(content.encode("utf-8"), digest_size=16).digest()
+        if index.digest(doc_id) == digest:
+            return  # unchanged since this process last indexed it
+        vector = await asyncio.to_thread(embed, content)
+        await asyncio.to_thread(index.add, doc_id, vector, digest)
+
+    async def ensure_index(self, user_id: str):
+        """Backfill a user's index from their stored documents on first use"""
+        index = self._index(user_id)
+        if index.backfilled():
+            return
+        async with self._locks.setdefault(user_id, asyncio.Lock()):
+            if index.backfilled():
+                return
+            # Saves append to the file before the first query, so its existence proves nothing;
+            # documents whose latest record is current are skipped
+            count = 0
+            async for doc in repositories.documents.scan(user_id, fields=("content",)):
+                await self.add_document(user_id, doc["_id"], doc.get("content", ""))
+                count += 1
+            await asyncio.to_thread(index.mark_backfilled)
+            logger.info(f"Built similarity index for user {user_id}: {count} documents")
+
+    async def similar(self, user_id: str, doc_id: str, content: str, k: int = 10) -> List[Tuple[str, float]]:
+        await self.ensure_index(user_id)
+        vector = await asyncio.to_thread(embed, content)
+        return await asyncio.to_thread(self._index(user_id).query, vector, k, doc_id)
+
+
+# Global instance
+similarity_service = SimilarityService(settings.similarity_index_dir)
@@ -0,0 +1,113 @@
+import logging
+import re
+import zlib
+from functools import lru_cache
+from typing import List, NamedTuple, Optional, Pattern, Tuple
+
+from app.services.nlp_resources import configure_data_path
+
+logger = logging.getLogger(__name__)
+
+_PARAGRAPH_BREAK = re.compile(r'\n\s*\n')
+_SENTENCE_BREAK = re.compile(r'(?<=[.!?])["\')\]]*\s+')
+
+
+class TextChunk(NamedTuple):
+    start: int  # global offset of the chunk in the source text
+    end: int
+    text: str
+
+
+def _split_spans(text: str, start: int, end: int, pattern: Pattern) -> List[Tuple[int, int]]:
+    """Split text[start:end] after each separator match, keeping separators attached"""
+    spans = []
+    pos = start
+    for match in pattern.finditer(text, start, end):
+        if match.end() > pos:
+            spans.append((pos, match.end()))
+            pos = match.end()
+    if pos < end:
+        spans.append((pos, end))
+    return spans
+
+
+@lru_cache(maxsize=None)
+def _punkt(language: str):
+    # NLTK is imported on first use so importing this module stays cheap
+    from nltk.tokenize.punkt import PunktTokenizer
+    configure_data_path()
+    try:
+        return PunktTokenizer(language)
+    except LookupError:
+        logger.warning(f"Punkt model for {language!r} not available; using regex sentence splitting")
+        return None
+
+
+def sentence_spans(text: str, language: Optional[str] = "english") -> List[Tuple[int, int]]:
+    """(start, end) offsets of each sentence in one pass, without searching for sentence text"""
+    tokenizer = _punkt(language) if language else None
+    if tokenizer is not None:
+        raw = tokenizer.span_tokenize(text)
+    else:
+        raw = _split_spans(text, 0, len(text), _SENTENCE_BREAK)
+    spans = []
+    for start, end in raw:
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        while start < end and text[start].isspace():
+            start += 1
+        if end > start:
+            spans.append((start, end))
+    return spans
+
+
+def _hard_split(text: str, start: int, end: int, max_chars: int) -> List[Tuple[int, int]]:
+    """Last resort for run-on text: cut at whitespace, or mid-word if there is none"""
+    spans = []
+    pos = start
+    while end - pos > max_chars:
+        cut = text.rfind(' ', pos + 1, pos + max_chars)
+        cut = cut + 1 if cut > pos else pos + max_chars
+        spans.append((pos, cut))
+        pos = cut
+    spans.append((pos, end))
+    return spans
+
+
+def segment_units(text: str, max_chars: int) -> List[Tuple[int, int]]:
+    """Contiguous spans covering text: paragraphs, or sentences for oversized paragraphs"""
+    units = []
+    for p_start, p_end in _split_spans(text, 0, len(text), _PARAGRAPH_BREAK):
+        if p_end - p_start <= max_chars:
+            units.append((p_start, p_end))
+            continue
+        for s_start, s_end in _split_spans(text, p_start, p_end, _SENTENCE_BREAK):
+            if s_end - s_start <= max_chars:
+                units.append((s_start, s_end))
+            else:
+                units.extend(_hard_split(text, s_start, s_end, max_chars))
+    return units
+
+
+def _is_cut_point(unit_text: str) -> bool:
+    # Content-defined boundary: an edit only moves chunk boundaries until the
+    # next cut point, so chunks after the edit keep their text (and cache key)
+    return zlib.crc32(unit_text.encode("utf-8")) & 3 == 0
+
+
+def chunk_text(text: str, max_chars: int = 2000) -> List[TextChunk]:
+    """Split text into chunks of at most max_chars on paragraph/sentence boundaries"""
+    units = segment_units(text, max_chars)
+    min_chars = max_chars // 2
+    chunks = []
+    chunk_start = None
+    for i, (u_start, u_end) in enumerate(units):
+        if chunk_start is None:
+            chunk_start = u_start
+        next_fits = i + 1 < len(units) and units[i + 1][1] - chunk_start <= max_chars
+        if not next_fits or (u_end - chunk_start >= min_chars and _is_cut_point(text[u_start:u_end])):
+            chunk = text[chunk_start:u_end]
+            if chunk.strip():
+                chunks.append(TextChunk(chunk_start, u_end, chunk))
+            chunk_start = None
+    return chunks
@@ -0,0 +1,124 @@
+import string
+from collections import Counter
+from typing import Dict, Sequence
+
+import numpy as np
+
+from app.models.analytics import ToneAnalysis
+
+DIMENSIONS = ("formal", "confident", "optimistic", "analytical", "friendly", "assertive")
+
+# Weighted lexicon: positive weights push a dimension up, negative weights pull it down
+LEXICON: Dict[str, Dict[str, float]] = {
+    "formal": {
+        "therefore": 1.0, "furthermore": 1.0, "consequently": 1.0, "moreover": 1.0, "hence": 1.0,
+        "thus": 0.8, "accordingly": 1.0, "nevertheless": 1.0, "notwithstanding": 1.0, "whereas": 0.8,
+        "herein": 1.0, "regarding": 0.6, "pursuant": 1.0, "additionally": 0.7, "subsequently": 0.8,
+        "shall": 0.6, "sincerely": 0.7, "kindly": 0.5,
+        "gonna": -1.0, "wanna": -1.0, "kinda": -1.0, "stuff": -0.6, "yeah": -1.0, "ok": -0.5,
+        "okay": -0.5, "hey": -0.8, "lol": -1.0, "awesome": -0.4, "don't": -0.3, "can't": -0.3,
+        "won't": -0.3, "it's": -0.3, "i'm": -0.3,
+    },
+    "confident": {
+        "will": 0.6, "definitely": 1.0, "certainly": 1.0, "clearly": 0.8, "undoubtedly": 1.0,
+        "confident": 1.0, "sure": 0.6, "proven": 0.8, "guarantee": 1.0, "absolutely": 0.9,
+        "ensure": 0.6, "always": 0.4,
+        "maybe": -0.8, "perhaps": -0.8, "possibly": -0.7, "might": -0.6, "unsure": -1.0,
+        "guess": -0.7, "hopefully": -0.5, "somewhat": -0.6, "seems": -0.5, "probably": -0.5,
+    },
+    "optimistic": {
+        "excellent": 1.0, "great": 0.8, "wonderful": 1.0, "positive": 0.8, "improve": 0.6,
+        "opportunity": 0.8, "success": 0.9, "successful": 0.9, "benefit": 0.7, "hope": 0.6,
+        "promising": 0.9, "bright": 0.6, "progress": 0.6, "thrilled": 1.0, "glad": 0.8, "happy": 0.8,
+        "fail": -0.8, "failure": -0.9, "problem": -0.5, "unfortunately": -0.9, "risk": -0.5,
+        "decline": -0.7, "worse": -0.8, "poor": -0.6, "difficult": -0.4,
+    },
+    "analytical": {
+        "analyze": 1.0, "analysis": 1.0, "evaluate": 1.0, "evaluation": 0.9, "assess": 1.0,
+        "assessment": 0.9, "data": 0.7, "evidence": 0.9, "measure": 0.7, "compare": 0.7,
+        "comparison": 0.7, "hypothesis": 1.0, "correlation": 1.0, "indicates": 0.8, "suggests": 0.5,
+        "result": 0.5, "results": 0.5, "method": 0.6, "percent": 0.6, "significant": 0.7,
+        "factor": 0.5, "metric": 0.8, "metrics": 0.8,
+    },
+    "friendly": {
+        "thanks": 1.0, "thank": 1.0, "please": 0.7, "appreciate": 1.0, "welcome": 0.8, "glad": 0.8,
+        "happy": 0.6, "hope": 0.5, "enjoy": 0.7, "together": 0.6, "help": 0.5, "feel": 0.4,
+        "we": 0.3, "you": 0.3, "hi": 0.8, "hello": 0.8, "cheers": 0.9, "love": 0.7,
+        "let's": 0.6, "you're": 0.3, "we're": 0.3,
+        "must": -0.4, "unacceptable": -1.0, "demand": -0.8,
+    },
+    "assertive": {
+        "must": 1.0, "need": 0.7, "require": 0.9, "required": 0.9, "insist": 1.0, "demand": 1.0,
+        "should": 0.6, "expect": 0.7, "never": 0.6, "immediately": 0.9, "essential": 0.8,
+        "critical": 0.7, "mandatory": 1.0, "cannot": 0.5, "will": 0.3,
+        "maybe": -0.6, "perhaps": -0.6, "sorry": -0.7, "just": -0.3, "might": -0.4,
+    },
+}
+
+# Hashed vocabulary: token -> row of the weight matrix (one row per lexicon word)
+VOCAB: Dict[str, int] = {}
+for _dimension in DIMENSIONS:
+    for _word in LEXICON[_dimension]:
+        VOCAB.setdefault(_word, len(VOCAB))
+WEIGHTS = np.zeros((len(VOCAB), len(DIMENSIONS)), dtype=np.float64)
+for _col, _dimension in enumerate(DIMENSIONS):
+    for _word, _weight in LEXICON[_dimension].items():
+        WEIGHTS[VOCAB[_word], _col] = _weight
+
+# Punctuation stripped from the ends of each distinct token
+_STRIP = string.punctuation + "“”—–"
+
+
+class ToneAnalyzer:
+    """Lexicon tone scoring over sparse token counts.
+
+    Text is split and counted once with C-level str operations; only the
+    distinct tokens are normalized and looked up in the vocabulary, and the
+    resulting sparse count vector is multiplied by the lexicon weight matrix
+    to score every dimension at once. Scores are weighted hits per 100 words
+    mapped onto 0-100.
+    """
+
+    SCALE = 2.0  # weighted hits per 100 words that give ~63
+
+    @staticmethod
+    def _sparse_counts(text: str):
+        text = text.lower()
+        if "’" in text or "‘" in text:
+            text = text.replace("’", "'").replace("‘", "'")
+        tokens = text.split()
+        rows: Dict[int, float] = {}
+        for token, count in Counter(tokens).items():
+            row = VOCAB.get(token)
+            if row is None:
+                row = VOCAB.get(token.strip(_STRIP))
+            if row is not None:
+                rows[row] = rows.get(row, 0) + count
+        return (
+            np.fromiter(rows.keys(), dtype=np.intp, count=len(rows)),
+            np.fromiter(rows.values(), dtype=np.float64, count=len(rows)),
+            len(tokens),
+        )
+
+    def _to_scores(self, raw: np.ndarray, word_counts: np.ndarray) -> np.ndarray:
+        density = raw / np.maximum(word_counts, 1)[:, None] * 100
+        return np.round(100 * (1 - np.exp(-np.maximum(density, 0) / self.SCALE)), 2)
+
+    def score_batch(self, texts: Sequence[str]) -> np.ndarray:
+        """Score many texts as one (len(texts) x 6) matrix"""
+        counts = np.zeros((len(texts), len(VOCAB)), dtype=np.float64)
+        word_counts = np.zeros(len(texts), dtype=np.float64)
+        for i, text in enumerate(texts):
+            rows, values, word_counts[i] = self._sparse_counts(text)
+            counts[i, rows] = values
+        return self._to_scores(counts @ WEIGHTS, word_counts)
+
+    def analyze(self, text: str) -> ToneAnalysis:
+        rows, values, word_count = self._sparse_counts(text)
+        raw = values @ WEIGHTS[rows]
+        scores = self._to_scores(raw[None, :], np.array([word_count], dtype=np.float64))[0]
+        return ToneAnalysis(**{dimension: float(score) for dimension, score in zip(DIMENSIONS, scores)})
+
+
+# Global instance
+tone_analyzer = ToneAnalyzer()
@@ -0,0 +1,55 @@
+"""Deterministic synthetic prose for benchmarks.
+
+Text is assembled from seeded sentence templates that trigger the rule
+checkers (passive voice, filler words, nominalizations, long and nested
+sentences) and the keyword extractor (named entities, repeated phrases),
+so every size exercises the same code paths in the same proportions.
+"""
+import random
+
+SIZES = {"1KB": 1_000, "10KB": 10_000, "100KB": 100_000, "1MB": 1_000_000}
+
+_SUBJECTS = ["The team", "Our editor", "The committee", "Maria Lopez", "The research group", "Acme Corporation",
+             "The new policy", "Every reviewer", "The quarterly report", "Professor James Walker"]
+_PROPER_SUBJECTS = {"Maria Lopez", "Acme Corporation", "Professor James Walker"}
+_VERBS = ["reviewed", "delivered", "explained", "questioned", "improved", "published", "analyzed", "summarized"]
+_OBJECTS = ["the draft proposal", "the budget forecast", "the customer survey", "the migration plan",
+            "the onboarding guide", "the product roadmap", "the security audit", "the market analysis"]
+_TEMPLATES = [
+    "{subject} {verb} {object} before the deadline.",
+    "{object_cap} was {verb} by {subject_lower} last week.",
+    "It is very important that {subject_lower} really {verb} {object} in order to make a decision.",
+    "The implementation of the recommendation required the utilization of additional resources and the "
+    "consideration of several alternatives.",
+    "{subject} {verb} {object}, which described the process that the department, which had grown quickly, "
+    "used when it {verb} {object} that {subject_lower} had prepared during the previous quarter.",
+    "Although {subject_lower} {verb} {object}, the results were basically the same as before.",
+    "In {city}, {subject_lower} {verb} {object} and shared the findings with {partner}.",
+    "{subject} {verb} {object}.",
+]
+_CITIES = ["Berlin", "Chicago", "Nairobi", "Osaka", "Lisbon", "Toronto"]
+_PARTNERS = ["Globex Industries", "the Northwind board", "Initech Labs", "the Springfield council"]
+
+
+def synthetic_text(size: int, seed: int = 42) -> str:
+    """At least `size` characters of prose, ending at a sentence boundary"""
+    rng = random.Random(seed)
+    parts = []
+    length = 0
+    while length < size:
+        subject = rng.choice(_SUBJECTS)
+        obj = rng.choice(_OBJECTS)
+        sentence = rng.choice(_TEMPLATES).format(
+            subject=subject, subject_lower=subject if subject in _PROPER_SUBJECTS else subject[0].lower() + subject[1:],
+            verb=rng.choice(_VERBS), object=obj, object_cap=obj[0].upper() + obj[1:],
+            city=rng.choice(_CITIES), partner=rng.choice(_PARTNERS),
+        )
+        separator = "\n\n" if rng.random() < 0.2 else " "
+        parts.append(sentence + separator)
+        length += len(sentence) + len(separator)
+    return "".join(parts).strip()
+
+
+def corpora(names=None, seed: int = 42):
+    """{size name: text} for the requested size names (all sizes by default)"""
+    return {name: synthetic_text(SIZES[name], seed) for name in (names or SIZES)}
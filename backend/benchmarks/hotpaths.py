@@ -0,0 +1,335 @@
+"""Benchmark suite for the analysis and API hot paths.
+
+Usage (from backend/):
+
+    python -m benchmarks.hotpaths [--sizes 1KB 10KB] [--only service|api] [--json]
+    python -m benchmarks.hotpaths --save-baseline       # write benchmarks/baseline.json
+    python -m benchmarks.hotpaths --compare             # diff against the baseline, exit 1 on regressions
+    python -m benchmarks.hotpaths --only api --storage sqlite   # same requests on another storage backend
+
+Service benchmarks time each analyzer in isolation on synthetic corpora
+from 1 KB to 1 MB. API benchmarks drive requests through the real routers,
+dependencies and middleware in-process, on the in-memory storage backend
+(or --storage sqlite, an in-memory SQLite database), and report throughput
+and latency under concurrency. Results
+are keyed by benchmark name so runs on the same machine can be compared
+with a stored baseline.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks.corpus import SIZES, corpora
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(BACKEND_DIR, "benchmarks", "baseline.json")
+
+# Placeholder settings so the app can be imported without a .env
+BENCH_ENV = {
+    "MONGODB_URL": "mongodb://localhost:27017",
+    "DATABASE_NAME": "writeflow_bench",
+    "SECRET_KEY": "bench",
+    "ALGORITHM": "HS256",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "30",
+}
+# Forced regardless of the environment so runs are comparable: no LLM calls, no disk cache
+FORCED_ENV = {
+    "GROQ_API_KEY": "",
+    "LLM_CACHE_PATH": "",
+}
+
+BENCH_EMAIL = "bench@example.com"
+BENCH_TIER = "benchmark"
+API_SIZES = ("1KB", "10KB")
+
+
+STORAGE_URLS = {"memory": "", "sqlite": "sqlite://"}
+
+
+def _configure_env(scratch_dir: str, storage: str = "memory"):
+    for key, value in BENCH_ENV.items():
+        os.environ.setdefault(key, value)
+    os.environ.update(FORCED_ENV)
+    os.environ["SIMILARITY_INDEX_DIR"] = os.path.join(scratch_dir, "similarity")
+    os.environ["STORAGE_BACKEND"] = storage
+    os.environ["STORAGE_URL"] = STORAGE_URLS[storage]
+
+
+def _summary(samples, size: int = 0):
+    median = statistics.median(samples)
+    result = {
+        "rounds": len(samples),
+        "median_ms": round(median * 1000, 3),
+        "min_ms": round(min(samples) * 1000, 3),
+        "mean_ms": round(statistics.fmean(samples) * 1000, 3),
+    }
+    if size:
+        result["mb_per_s"] = round(size / median / 1e6, 3) if median else 0.0
+    return result
+
+
+def _revision(text: str, n: int) -> str:
+    # A distinct input per round, as when a user keeps typing; content-keyed caches
+    # (textstat memoizes on the text) would otherwise turn every round after the first into a hit
+    return f"{text} Revision {n} was saved."
+
+
+async def _measure(func, text: str, min_time: float, min_rounds: int, max_rounds: int):
+    """Time func(text revision) repeatedly after one warm-up call; func may return an awaitable"""
+    result = func(_revision(text, 0))
+    if asyncio.iscoroutine(result):
+        await result
+    samples = []
+    deadline = time.perf_counter() + min_time
+    while len(samples) < max_rounds and (len(samples) < min_rounds or time.perf_counter() < deadline):
+        revision = _revision(text, len(samples) + 1)
+        started = time.perf_counter()
+        result = func(revision)
+        if asyncio.iscoroutine(result):
+            await result
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+# ------------------------------
+# Environment
+# ------------------------------
+async def _install_storage():
+    """Start the configured local storage backend and seed a benchmark user"""
+    from app.repositories import init_storage, repositories
+    from app.services import document_service as ds_module
+    from app.services.auth import create_access_token
+    from app.services.rate_limiter import TIER_LIMITS, TierLimits
+
+    await init_storage()
+    ds_module.document_service = ds_module.DocumentService(repositories.documents)
+    # Requests under test must not be throttled; the limiter itself still runs
+    TIER_LIMITS[BENCH_TIER] = TierLimits(requests_per_minute=1e9, burst=10**9, daily_llm_tokens=10**12)
+    now = datetime.utcnow()
+    user_id = await repositories.users.insert({
+        "email": BENCH_EMAIL, "hashed_password": "-", "full_name": "Benchmark", "is_active": True,
+        "subscription_tier": BENCH_TIER, "preferences": {}, "created_at": now, "updated_at": now,
+    })
+    return user_id, create_access_token({"sub": BENCH_EMAIL})
+
+
+# ------------------------------
+# Service benchmarks
+# ------------------------------
+async def run_service_benchmarks(texts, user_id, args):
+    from app.services.ai_service import ai_service
+    from app.services.keyword_service import keyword_service
+
+    cases = {
+        "generate_suggestions": lambda text: ai_service.generate_suggestions(text, "bench", user_id),
+        "analyze_readability": ai_service.analyze_readability,
+        "analyze_tone": ai_service.analyze_tone,
+        "calculate_writing_stats": ai_service.calculate_writing_stats,
+        "extract_keywords": lambda text: keyword_service.extract(text, user_id),
+    }
+    results = {}
+    for size_name, text in texts.items():
+        for case, func in cases.items():
+            samples = await _measure(func, text, args.min_time, args.min_rounds, args.max_rounds)
+            results[f"service/{case}/{size_name}"] = _summary(samples, len(text))
+            _progress(f"service/{case}/{size_name}", results[f"service/{case}/{size_name}"])
+    return results
+
+
+# ------------------------------
+# API benchmarks
+# ------------------------------
+async def _drive(client, make_request, concurrency: int, duration: float):
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker(worker_id: int):
+        nonlocal errors
+        i = 0
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            response = await make_request(client, worker_id, i)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+            i += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(w) for w in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 3),
+        "p99_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000, 3),
+    }
+
+
+async def run_api_benchmarks(texts, user_id, token, args):
+    import httpx
+    from app.main import app
+    from app.models.document import DocumentCreate
+    from app.services import document_service as ds_module
+
+    headers = {"Authorization": f"Bearer {token}"}
+    transport = httpx.ASGITransport(app=app)
+    results = {}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers) as client:
+        for size_name, text in texts.items():
+            document = await ds_module.document_service.create_document(
+                DocumentCreate(title=f"Bench {size_name}", content=text), user_id
+            )
+            doc_id = document.id
+            edits = [text, text + " The final section was reviewed by the editor."]
+            cases = {
+                "POST /api/ai/ai/suggestions": lambda c, w, i: c.post(
+                    "/api/ai/ai/suggestions", json={"document_id": doc_id, "content": text}),
+                "POST /api/ai/ai/tone-analysis": lambda c, w, i: c.post(
+                    "/api/ai/ai/tone-analysis", json={"content": text}),
+                "GET /api/analytics/analytics/document/{id}/readability": lambda c, w, i: c.get(
+                    f"/api/analytics/analytics/document/{doc_id}/readability"),
+                "GET /api/analytics/analytics/document/{id}/keywords": lambda c, w, i: c.get(
+                    f"/api/analytics/analytics/document/{doc_id}/keywords"),
+                "PUT /api/auth/documents/documents/{id}": lambda c, w, i: c.put(
+                    f"/api/auth/documents/documents/{doc_id}", json={"content": edits[(w + i) % 2]}),
+            }
+            for case, make_request in cases.items():
+                # Warm-up request, also surfaces misconfiguration before timing starts
+                response = await make_request(client, 0, 1)
+                if response.status_code >= 400:
+                    raise RuntimeError(f"{case} failed with {response.status_code}: {response.text[:200]}")
+                name = f"api/{case}/{size_name}"
+                results[name] = await _drive(client, make_request, args.concurrency, args.duration)
+                _progress(name, results[name])
+    return results
+
+
+# ------------------------------
+# Baseline comparison
+# ------------------------------
+def _primary(name: str, result: dict):
+    """(value, higher_is_better) used for comparisons"""
+    if name.startswith("api/"):
+        return result["rps"], True
+    return result["median_ms"], False
+
+
+def compare(results: dict, baseline: dict, threshold: float):
+    """Print per-benchmark change against the baseline; return the names that regressed"""
+    regressions = []
+    print(f"\n{'benchmark':<72} {'baseline':>12} {'current':>12} {'change':>9}")
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        current, higher_is_better = _primary(name, result)
+        previous, _ = _primary(name, baseline[name])
+        if not previous:
+            continue
+        change = (current - previous) / previous * 100
+        worse = -change if higher_is_better else change
+        flag = ""
+        if worse > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        elif -worse > threshold:
+            flag = "  improved"
+        unit = "req/s" if higher_is_better else "ms"
+        print(f"{name:<72} {previous:>8} {unit:<3} {current:>8} {unit:<3} {change:>+8.1f}%{flag}")
+    return regressions
+
+
+def _metadata(args):
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True
+        ).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "created_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "storage": args.storage,
+    }
+
+
+def _progress(name: str, result: dict):
+    print(f"  {name}: {json.dumps(result)}", file=sys.stderr)
+
+
+async def run(args):
+    texts = corpora(args.sizes)
+    from app.repositories import close_storage
+
+    user_id, token = await _install_storage()
+    results = {}
+    if args.only in (None, "service"):
+        results.update(await run_service_benchmarks(texts, user_id, args))
+    if args.only in (None, "api"):
+        api_texts = {name: text for name, text in texts.items() if name in args.api_sizes}
+        results.update(await run_api_benchmarks(api_texts, user_id, token, args))
+    await close_storage()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=list(SIZES))
+    parser.add_argument("--api-sizes", nargs="+", choices=list(SIZES), default=list(API_SIZES),
+                        help="corpus sizes used for API benchmarks")
+    parser.add_argument("--only", choices=["service", "api"])
+    parser.add_argument("--storage", choices=list(STORAGE_URLS), default="memory",
+                        help="storage backend behind the API benchmarks")
+    parser.add_argument("--min-time", type=float, default=1.0, help="seconds per service benchmark")
+    parser.add_argument("--min-rounds", type=int, default=3)
+    parser.add_argument("--max-rounds", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent API clients")
+    parser.add_argument("--duration", type=float, default=3.0, help="seconds per API benchmark")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="write results to the baseline file")
+    parser.add_argument("--compare", action="store_true", help="compare with the baseline file")
+    parser.add_argument("--threshold", type=float, default=10.0, help="percent change counted as a regression")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="writeflow-bench-") as scratch:
+        _configure_env(scratch, args.storage)
+        sys.path.insert(0, BACKEND_DIR)
+        results = asyncio.run(run(args))
+
+    report = {"meta": _metadata(args), "results": results}
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+    if args.json:
+        print(json.dumps(report, indent=2))
+    elif not args.compare:
+        for name, result in results.items():
+            print(f"{name:<72} {json.dumps(result)}")
+    if args.compare:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline["meta"].get("storage", "memory") != args.storage:
+            print(f"Note: baseline was recorded with --storage {baseline['meta'].get('storage', 'memory')}")
+        regressions = compare(results, baseline["results"], args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) regressed by more than {args.threshold}%")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Cold-start benchmark: time to import the app in a fresh interpreter.
+
+Usage (from backend/):
+
+    python -m benchmarks.startup [--runs 10] [--json]
+
+Each run is a new process, so module caches and lazily created clients
+start cold, as in a freshly scaled-up worker. Also reports the cost of the
+first suggestion request, which is where NLP resources and the LLM client
+are now initialized.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Placeholder settings so the app can be imported without a .env
+BENCH_ENV = {
+    "MONGODB_URL": "mongodb://localhost:27017",
+    "DATABASE_NAME": "writeflow_bench",
+    "SECRET_KEY": "bench",
+    "ALGORITHM": "HS256",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "30",
+}
+
+IMPORT_PROBE = """
+import time
+t = time.perf_counter()
+import app.main
+print(time.perf_counter() - t)
+"""
+
+FIRST_USE_PROBE = """
+import time
+from app.services.ai_service import ai_service
+content = "The report was written by the team. It is very good. " * 50
+t = time.perf_counter()
+ai_service.calculate_writing_stats(content)
+ai_service.groq_client
+print(time.perf_counter() - t)
+"""
+
+
+def _run(probe: str) -> float:
+    env = {**BENCH_ENV, **os.environ}
+    out = subprocess.run(
+        [sys.executable, "-c", probe], cwd=BACKEND_DIR, env=env,
+        capture_output=True, text=True, check=True
+    )
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def _summary(samples):
+    return {
+        "runs": len(samples),
+        "median_ms": round(statistics.median(samples) * 1000, 1),
+        "min_ms": round(min(samples) * 1000, 1),
+        "max_ms": round(max(samples) * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    results = {
+        "import_app": _summary([_run(IMPORT_PROBE) for _ in range(args.runs)]),
+        "first_use": _summary([_run(FIRST_USE_PROBE) for _ in range(args.runs)]),
+    }
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for name, stats in results.items():
+        print(f"{name:<12} median {stats['median_ms']:>8.1f} ms  (min {stats['min_ms']}, max {stats['max_ms']}, n={stats['runs']})")
+
+
+if __name__ == "__main__":
+    main()
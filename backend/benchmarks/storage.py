@@ -0,0 +1,184 @@
+"""Stored size against read latency for each content codec.
+
+Usage (from backend/):
+
+    python -m benchmarks.storage [--sizes 1KB 100KB] [--storage sqlite] [--json]
+
+For each codec (identity, plain zstd, zstd with a dictionary trained on a
+separate corpus) the same synthetic documents and suggestion explanations
+are stored on a fresh local backend. Document size is the BSON size of the
+record and its chunks, i.e. what MongoDB keeps in its cache before block
+compression; explanation size is the stored explanation payload. Latency
+covers a full read, a 1 KB range read, a metadata read and a save, so the
+cost of decoding is visible next to the savings.
+
+The synthetic corpus is built from a few templates and compresses far
+better than real prose; compare codecs with each other, not with
+production ratios.
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks.corpus import SIZES, corpora, synthetic_text
+from benchmarks.hotpaths import BACKEND_DIR, STORAGE_URLS, _configure_env, _summary
+
+CODECS = ("identity", "zstd", "zstd+dict")
+TRAINING_DOCUMENTS = 200
+RANGE_CHARS = 1000
+# Stand-ins for LLM explanations; rule explanations are mostly below CONTENT_CODEC_MIN_CHARS
+LLM_EXPLANATIONS = 200
+
+
+async def _time(make_call, min_time: float, min_rounds: int):
+    """Time make_call(n)() repeatedly after one warm-up call"""
+    await make_call(0)()
+    samples = []
+    deadline = time.perf_counter() + min_time
+    while len(samples) < min_rounds or time.perf_counter() < deadline:
+        call = make_call(len(samples) + 1)
+        started = time.perf_counter()
+        await call()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+async def _explanations(texts) -> list:
+    from app.repositories import close_storage, init_storage
+    from app.services.ai_service import ai_service
+    await init_storage()
+    explanations = []
+    for text in texts:
+        explanations.extend(s.explanation for s in await ai_service.generate_suggestions(text, "bench", "bench"))
+    await close_storage()
+    rng = random.Random(7)
+    explanations.extend(synthetic_text(rng.randint(80, 300), seed=5000 + n) for n in range(LLM_EXPLANATIONS))
+    rng.shuffle(explanations)
+    return explanations
+
+
+async def _stored_bytes(repository, doc_id: str) -> int:
+    import bson
+    record = await repository.records.get(doc_id)
+    size = len(bson.encode(record))
+    chunk_ids = [entry["id"] for entry in record.get("content_chunks") or []]
+    for chunk_id, payload in (await repository.chunks.get_many(chunk_ids)).items():
+        size += len(bson.encode({"_id": chunk_id, "document_id": doc_id, "data": payload}))
+    return size
+
+
+async def run_codec(codec: str, texts, explanations, args) -> dict:
+    from app.config import settings
+    from app.repositories import close_storage, init_storage, repositories
+    from app.repositories.codec import content_codec, samples_from
+
+    settings.content_codec = "none" if codec == "identity" else "zstd"
+    await init_storage()
+    if codec == "zstd+dict":
+        # Trained on other documents than the ones measured, as in production
+        samples = []
+        for seed in range(TRAINING_DOCUMENTS):
+            samples.extend(samples_from(synthetic_text(4000, seed=1000 + seed)))
+        await content_codec.train(samples + explanations[::2])
+
+    documents = repositories.documents
+    results = {}
+    for size_name, text in texts.items():
+        doc_id = await documents.insert({"title": size_name, "content": text, "user_id": "bench", "version": 1})
+        middle = len(text) // 2
+        stored = await _stored_bytes(documents, doc_id)
+        result = {
+            "chars": len(text),
+            "stored_bytes": stored,
+            "ratio": round(len(text.encode("utf-8")) / stored, 2),
+            "get": _summary(await _time(lambda n: lambda: documents.get(doc_id), args.min_time, args.min_rounds)),
+            "read_range": _summary(await _time(
+                lambda n: lambda: documents.read_range(doc_id, middle, middle + RANGE_CHARS), args.min_time, args.min_rounds
+            )),
+            "get_metadata": _summary(await _time(
+                lambda n: lambda: documents.get(doc_id, content=False), args.min_time, args.min_rounds
+            )),
+            "save": _summary(await _time(
+                lambda n: lambda: documents.update(doc_id, "bench", {"content": f"{text} Revision {n}."}),
+                args.min_time, args.min_rounds
+            )),
+        }
+        results[f"{codec}/document/{size_name}"] = result
+        _progress(f"{codec}/document/{size_name}", result)
+
+    held_out = explanations[1::2]
+    now = datetime.utcnow()
+    await repositories.suggestions.insert_many([
+        {"document_id": "bench", "user_id": "bench", "type": "style", "explanation": explanation,
+         "is_applied": False, "is_dismissed": False, "created_at": now}
+        for explanation in held_out
+    ])
+    stored = 0
+    async for record in repositories.suggestions.inner.scan(fields=("explanation", "explanation_encoded")):
+        stored += len(record.get("explanation_encoded") or record["explanation"].encode("utf-8"))
+    result = {
+        "count": len(held_out),
+        "stored_bytes": stored,
+        "ratio": round(sum(len(e.encode("utf-8")) for e in held_out) / stored, 2) if stored else 0.0,
+        "list": _summary(await _time(
+            lambda n: lambda: repositories.suggestions.list_for_document("bench", "bench"), args.min_time, args.min_rounds
+        )),
+    }
+    results[f"{codec}/explanations"] = result
+    _progress(f"{codec}/explanations", result)
+    await close_storage()
+    return results
+
+
+def _progress(name: str, result: dict):
+    print(f"  {name}: {json.dumps(result)}", file=sys.stderr)
+
+
+async def run(args):
+    texts = corpora(args.sizes)
+    explanations = await _explanations(corpora(["10KB"], seed=7).values())
+    results = {}
+    for codec in args.codecs:
+        results.update(await run_codec(codec, texts, explanations, args))
+    return results
+
+
+def _print_table(results: dict):
+    print(f"{'benchmark':<32} {'stored':>11} {'ratio':>6} {'read ms':>9} {'range ms':>9} {'save ms':>9}")
+    for name, result in results.items():
+        read = result.get("get", result.get("list"))
+        print(
+            f"{name:<32} {result['stored_bytes']:>11,} {result['ratio']:>6} {read['median_ms']:>9.3f} "
+            f"{result['read_range']['median_ms'] if 'read_range' in result else '-':>9} "
+            f"{result['save']['median_ms'] if 'save' in result else '-':>9}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=list(SIZES))
+    parser.add_argument("--codecs", nargs="+", choices=list(CODECS), default=list(CODECS))
+    parser.add_argument("--storage", choices=list(STORAGE_URLS), default="memory")
+    parser.add_argument("--min-time", type=float, default=0.5, help="seconds per latency measurement")
+    parser.add_argument("--min-rounds", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="writeflow-bench-") as scratch:
+        _configure_env(scratch, args.storage)
+        sys.path.insert(0, BACKEND_DIR)
+        results = asyncio.run(run(args))
+
+    if args.json:
+        print(json.dumps({"storage": args.storage, "results": results}, indent=2))
+    else:
+        _print_table(results)
+
+
+if __name__ == "__main__":
+    main()
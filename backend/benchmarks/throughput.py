@@ -0,0 +1,185 @@
+"""Throughput benchmark for `run.py --prod` across worker counts.
+
+Usage (from backend/):
+
+    python -m benchmarks.throughput --workers 1 2 4 --duration 10
+    python -m benchmarks.throughput --path /api/ai/tone-analysis --method POST \\
+        --body '{"content": "..."}' --header "Authorization: Bearer <token>"
+
+For each worker count a production server is started on a free port, warmed
+up, and driven by keep-alive HTTP/1.1 connections from several load
+generator processes. Reports requests/s and latency percentiles per
+worker count.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from typing import List
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BENCH_ENV = {
+    # Fail fast instead of waiting 30 s on server selection when no Mongo is running
+    "MONGODB_URL": "mongodb://localhost:27017/?serverSelectionTimeoutMS=500",
+    "DATABASE_NAME": "writeflow_bench",
+    "SECRET_KEY": "bench",
+    "ALGORITHM": "HS256",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "30",
+}
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _request_bytes(args) -> bytes:
+    body = args.body.encode() if args.body else b""
+    lines = [f"{args.method} {args.path} HTTP/1.1", "Host: localhost", f"Content-Length: {len(body)}"]
+    if body:
+        lines.append("Content-Type: application/json")
+    lines.extend(args.header)
+    return ("\r\n".join(lines) + "\r\n\r\n").encode() + body
+
+
+async def _connection(port: int, request: bytes, deadline: float, latencies: List[float], errors: List[int]):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            writer.write(request)
+            status_line = await reader.readline()
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b""):
+                    break
+                name, _, value = line.partition(b":")
+                if name.strip().lower() == b"content-length":
+                    length = int(value)
+            if length:
+                await reader.readexactly(length)
+            if not status_line.startswith(b"HTTP/1.1 2"):
+                errors[0] += 1
+            latencies.append(time.perf_counter() - started)
+    finally:
+        writer.close()
+
+
+def _generator(port: int, request: bytes, connections: int, duration: float, queue):
+    async def run():
+        latencies: List[float] = []
+        errors = [0]
+        deadline = time.perf_counter() + duration
+        results = await asyncio.gather(
+            *(_connection(port, request, deadline, latencies, errors) for _ in range(connections)),
+            return_exceptions=True
+        )
+        errors[0] += sum(isinstance(r, Exception) for r in results)
+        return latencies, errors[0]
+
+    queue.put(asyncio.run(run()))
+
+
+def _wait_ready(port: int, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1) as s:
+                s.sendall(b"GET /health HTTP/1.1\r\nHost: localhost\r\n\r\n")
+                if s.recv(64).startswith(b"HTTP/1.1 200"):
+                    return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Server on port {port} did not become ready")
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def bench(workers: int, args) -> dict:
+    port = _free_port()
+    server = subprocess.Popen(
+        [sys.executable, "run.py", "--prod", "--workers", str(workers), "--port", str(port),
+         "--host", "127.0.0.1", "--max-requests", "0", "--log-level", "warning"],
+        cwd=BACKEND_DIR, env={**BENCH_ENV, **os.environ},
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        _wait_ready(port)
+        request = _request_bytes(args)
+        # Warm-up so lazy initialization is not measured
+        _run_load(port, request, args.connections, 1.0, args.generators)
+        latencies, errors, elapsed = _run_load(port, request, args.connections, args.duration, args.generators)
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=60)
+    latencies.sort()
+    return {
+        "workers": workers,
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(_percentile(latencies, 0.50) * 1000, 2),
+        "p99_ms": round(_percentile(latencies, 0.99) * 1000, 2),
+    }
+
+
+def _run_load(port: int, request: bytes, connections: int, duration: float, generators: int):
+    queue = multiprocessing.Queue()
+    per_generator = max(1, connections // generators)
+    procs = [
+        multiprocessing.Process(target=_generator, args=(port, request, per_generator, duration, queue))
+        for _ in range(generators)
+    ]
+    started = time.perf_counter()
+    for p in procs:
+        p.start()
+    latencies, errors = [], 0
+    for _ in procs:
+        chunk, chunk_errors = queue.get()
+        latencies.extend(chunk)
+        errors += chunk_errors
+    for p in procs:
+        p.join()
+    return latencies, errors, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--connections", type=int, default=64)
+    parser.add_argument("--generators", type=int, default=max(1, (os.cpu_count() or 2) // 2),
+                        help="load generator processes")
+    parser.add_argument("--path", default="/health")
+    parser.add_argument("--method", default="GET")
+    parser.add_argument("--body", default="")
+    parser.add_argument("--header", action="append", default=[], help="extra request header, repeatable")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    results = [bench(w, args) for w in args.workers]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{args.method} {args.path}, {args.connections} connections, {args.duration:.0f}s per run")
+    print(f"{'workers':>7} {'req/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for r in results:
+        print(f"{r['workers']:>7} {r['rps']:>10} {r['p50_ms']:>8} {r['p99_ms']:>8} {r['errors']:>7}")
+
+
+if __name__ == "__main__":
+    main()
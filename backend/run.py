@@ -1,16 +1,191 @@
-import uvicorn
+import argparse
+import logging
 import os
-from app.main import app
+import random
+import signal
+import socket
+import time
+
+import uvicorn
+
+logger = logging.getLogger("writeflow.run")
+
+
+def _default_workers() -> int:
+    # Respect CPU affinity / container limits where the platform exposes them
+    if hasattr(os, "sched_getaffinity"):
+        return max(1, len(os.sched_getaffinity(0)))
+    return os.cpu_count() or 1
+
+
+def _parse_args():
+    parser = argparse.ArgumentParser(description="WriteFlow Pro API server")
+    parser.add_argument("--prod", action="store_true", default=os.getenv("APP_ENV") == "production",
+                        help="multi-worker production mode (default when APP_ENV=production)")
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", 8000)))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", 0)) or _default_workers())
+    parser.add_argument("--max-requests", type=int, default=int(os.getenv("MAX_REQUESTS", 10000)),
+                        help="recycle a worker after this many requests (0 disables)")
+    parser.add_argument("--max-requests-jitter", type=int, default=int(os.getenv("MAX_REQUESTS_JITTER", 1000)),
+                        help="random extra requests per worker so they do not all recycle at once")
+    parser.add_argument("--graceful-timeout", type=int, default=int(os.getenv("GRACEFUL_TIMEOUT", 30)),
+                        help="seconds a stopping worker may spend draining in-flight requests")
+    parser.add_argument("--log-level", default=os.getenv("LOG_LEVEL", "info"))
+    return parser.parse_args()
+
+
+def preload():
+    """Import the app and warm fork-safe shared state once, before workers are forked.
+
+    Workers inherit the loaded modules and tokenizer tables copy-on-write
+    instead of each paying for them. Network clients (Mongo, Groq) are not
+    created here; each worker creates its own after the fork.
+    """
+    from app.main import app
+    from app.services.languages import get_pack
+    from app.services import nlp_resources
+
+    nlp_resources.preflight()
+    get_pack("en").sentence_spans("Warm up the tokenizer.")
+    return app
+
+
+class Supervisor:
+    """Pre-fork process manager: one listening socket shared by N uvicorn workers.
+
+    Workers that exit (max-requests recycling or a crash) are replaced. On
+    SIGTERM/SIGINT every worker is asked to shut down gracefully and given
+    `graceful_timeout` seconds to drain before being killed.
+    """
+
+    RESPAWN_BACKOFF_SECONDS = 1.0
+
+    def __init__(self, app, args):
+        self.app = app
+        self.args = args
+        self.children = {}
+        self.stopping = False
+        self.sock = None
+
+    def _bind(self):
+        sock = socket.socket(socket.AF_INET6 if ":" in self.args.host else socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.args.host, self.args.port))
+        sock.listen(2048)
+        sock.set_inheritable(True)
+        return sock
+
+    def _spawn(self):
+        pid = os.fork()
+        if pid:
+            self.children[pid] = time.monotonic()
+            return
+        # Worker process
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(sig, signal.SIG_DFL)
+        random.seed()
+        limit = None
+        if self.args.max_requests:
+            limit = self.args.max_requests + random.randint(0, max(self.args.max_requests_jitter, 0))
+        config = uvicorn.Config(
+            self.app,
+            loop="auto",  # uvloop when installed
+            http="auto",  # httptools when installed
+            lifespan="on",
+            limit_max_requests=limit,
+            timeout_graceful_shutdown=self.args.graceful_timeout,
+            log_level=self.args.log_level,
+        )
+        code = 0
+        try:
+            uvicorn.Server(config).run(sockets=[self.sock])
+        except BaseException:
+            logger.exception("Worker crashed")
+            code = 1
+        os._exit(code)
+
+    def _signal(self, signum, frame):
+        if self.stopping:
+            return
+        self.stopping = True
+        logger.info(f"Received signal {signum}; draining {len(self.children)} workers")
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def _reap_remaining(self):
+        deadline = time.monotonic() + self.args.graceful_timeout + 5
+        while self.children and time.monotonic() < deadline:
+            pid, _ = os.waitpid(-1, os.WNOHANG)
+            if pid:
+                self.children.pop(pid, None)
+            else:
+                time.sleep(0.1)
+        for pid in self.children:
+            logger.warning(f"Worker {pid} did not drain in time; killing")
+            os.kill(pid, signal.SIGKILL)
+
+    def run(self):
+        self.sock = self._bind()
+        signal.signal(signal.SIGTERM, self._signal)
+        signal.signal(signal.SIGINT, self._signal)
+        logger.info(f"Listening on {self.args.host}:{self.args.port} with {self.args.workers} workers")
+        for _ in range(self.args.workers):
+            self._spawn()
+        while self.children and not self.stopping:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            started = self.children.pop(pid, None)
+            if self.stopping or started is None:
+                continue
+            code = os.waitstatus_to_exitcode(status)
+            if code != 0:
+                logger.warning(f"Worker {pid} exited with code {code}; restarting")
+                # Don't spin if workers die immediately (bad config, port issues)
+                if time.monotonic() - started < self.RESPAWN_BACKOFF_SECONDS:
+                    time.sleep(self.RESPAWN_BACKOFF_SECONDS)
+            else:
+                logger.info(f"Worker {pid} recycled")
+            self._spawn()
+        self._reap_remaining()
+        self.sock.close()
+
+
+def main():
+    args = _parse_args()
+    logging.basicConfig(level=args.log_level.upper(), format="%(asctime)s %(process)d %(levelname)s %(message)s")
+
+    if not args.prod:
+        # Development: single process with auto-reload
+        uvicorn.run(
+            "app.main:app",
+            host=args.host,
+            port=args.port,
+            reload=True,
+            log_level=args.log_level
+        )
+        return
+
+    if not hasattr(os, "fork"):
+        # No fork (Windows): uvicorn's spawn-based workers, without preloading
+        uvicorn.run(
+            "app.main:app",
+            host=args.host,
+            port=args.port,
+            workers=args.workers,
+            limit_max_requests=args.max_requests or None,
+            timeout_graceful_shutdown=args.graceful_timeout,
+            log_level=args.log_level
+        )
+        return
+
+    Supervisor(preload(), args).run()
+
 
 if __name__ == "__main__":
-    # Get port from environment or default to 8000
-    port = int(os.getenv("PORT", 8000))
-    
-    # Run the application
-    uvicorn.run(
-        "app.main:app",
-        host="0.0.0.0",
-        port=port,
-        reload=True,  # Enable auto-reload for development
-        log_level="info"
-    )
\ No newline at end of file
+    main()
@@ -0,0 +1,16 @@
+import os
+import sys
+
+# Settings are required at import; tests run against the in-process backends
+for name, value in {
+    "MONGODB_URL": "mongodb://localhost:27017",
+    "DATABASE_NAME": "writeflow_test",
+    "SECRET_KEY": "test",
+    "ALGORITHM": "HS256",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "30",
+    "STORAGE_BACKEND": "memory",
+    "LLM_CACHE_PATH": "",
+}.items():
+    os.environ.setdefault(name, value)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
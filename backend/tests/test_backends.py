@@ -0,0 +1,21 @@
+import asyncio
+
+import pytest
+
+from app.config import settings
+from app.repositories import close_storage, init_storage, repositories
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_backends_implement_every_interface_method(backend, monkeypatch):
+    # Abstract methods left unimplemented fail here, at construction
+    monkeypatch.setattr(settings, "storage_url", "sqlite://")
+
+    async def run():
+        await init_storage(backend)
+        try:
+            return [repositories.documents, repositories.users, repositories.suggestions, repositories.comments]
+        finally:
+            await close_storage()
+
+    assert all(asyncio.run(run()))
@@ -0,0 +1,52 @@
+import json
+import os
+import subprocess
+import sys
+
+from benchmarks import hotpaths
+from benchmarks.corpus import SIZES, corpora, synthetic_text
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_corpora_are_deterministic_and_sized():
+    assert synthetic_text(SIZES["1KB"]) == synthetic_text(SIZES["1KB"])
+    assert synthetic_text(SIZES["1KB"], seed=1) != synthetic_text(SIZES["1KB"])
+    texts = corpora(["1KB", "10KB"])
+    assert set(texts) == {"1KB", "10KB"}
+    assert all(len(text) >= SIZES[name] and text.endswith(".") for name, text in texts.items())
+
+
+def test_compare_flags_regressions_in_the_direction_that_matters(capsys):
+    baseline = {
+        "service/analyze_tone/1KB": {"median_ms": 10.0},
+        "api/POST /api/ai/ai/suggestions/1KB": {"rps": 100.0},
+        "service/extract_keywords/1KB": {"median_ms": 10.0},
+    }
+    results = {
+        "service/analyze_tone/1KB": {"median_ms": 12.0},
+        "api/POST /api/ai/ai/suggestions/1KB": {"rps": 80.0},
+        "service/extract_keywords/1KB": {"median_ms": 5.0},
+        "service/new_benchmark/1KB": {"median_ms": 1.0},
+    }
+    regressions = hotpaths.compare(results, baseline, threshold=10.0)
+    assert regressions == ["service/analyze_tone/1KB", "api/POST /api/ai/ai/suggestions/1KB"]
+    assert "improved" in capsys.readouterr().out
+
+
+def test_suite_runs_end_to_end_and_matches_the_baseline_names():
+    result = subprocess.run(
+        [sys.executable, "-m", "benchmarks.hotpaths", "--sizes", "1KB", "--api-sizes", "1KB", "--min-time", "0",
+         "--min-rounds", "1", "--max-rounds", "1", "--duration", "0.2", "--concurrency", "1", "--json"],
+        cwd=BACKEND_DIR, capture_output=True, text=True, timeout=120,
+    )
+    assert result.returncode == 0, result.stderr
+    report = json.loads(result.stdout)
+    results = report["results"]
+    assert report["meta"]["storage"] == "memory"
+    assert any(name.startswith("service/") for name in results) and any(name.startswith("api/") for name in results)
+    with open(hotpaths.BASELINE_PATH, encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+    assert set(results) <= set(baseline)
+    for name, values in results.items():
+        assert hotpaths._primary(name, values)[0] > 0
@@ -0,0 +1,70 @@
+import asyncio
+
+from app.config import settings
+from app.repositories.base import DocumentRepository
+from app.repositories.content import ChunkedDocumentRepository
+from app.repositories.memory import MemoryDatabase
+from app.repositories.mongo import MongoChunkStore, MongoDocumentRepository
+
+
+class SlowReads(MongoDocumentRepository):
+    """Widens the window between planning a chunked write and committing it"""
+
+    async def get(self, *args, **kwargs):
+        record = await super().get(*args, **kwargs)
+        await asyncio.sleep(0.01)
+        return record
+
+
+def _repository() -> ChunkedDocumentRepository:
+    database = MemoryDatabase("test")
+    return ChunkedDocumentRepository(SlowReads(database["documents"]), MongoChunkStore(database["document_chunks"]))
+
+
+def _body(marker: str = "", line: int = 0) -> str:
+    lines = [f"Line {n} of the shared body.\n" for n in range(400)]
+    if marker:
+        lines[line] = f"Edited by {marker}.\n"
+    return "".join(lines)
+
+
+def test_concurrent_updates_keep_document_readable(monkeypatch):
+    monkeypatch.setattr(settings, "content_chunk_threshold", 1000)
+    monkeypatch.setattr(settings, "content_chunk_chars", 1000)
+    monkeypatch.setattr(settings, "content_codec", "none")
+
+    async def run():
+        documents = _repository()
+        doc_id = await documents.insert({"user_id": "u", "title": "t", "content": _body(), "version": 1})
+        # Edits in different chunks: each plan keeps the chunk the other one replaces
+        results = await asyncio.gather(
+            documents.update(doc_id, "u", {"content": _body("first", 20)}),
+            documents.update(doc_id, "u", {"content": _body("second", 380)}),
+        )
+        record = await documents.get(doc_id)
+        referenced = {entry["id"] for entry in record["content_chunks"]}
+        stored = {chunk["_id"] async for chunk in documents.chunks.collection.find({})}
+        return results, record, referenced, stored
+
+    results, record, referenced, stored = asyncio.run(run())
+    assert results == [True, True]
+    assert record["version"] == 3
+    assert record["content"] in (_body("first", 20), _body("second", 380))
+    # Nothing referenced was deleted, and nothing orphaned was left behind
+    assert referenced == stored
+
+
+def test_update_with_stale_version_is_refused(monkeypatch):
+    monkeypatch.setattr(settings, "content_chunk_threshold", 1000)
+
+    async def run():
+        documents = _repository()
+        doc_id = await documents.insert({"user_id": "u", "title": "t", "content": _body(), "version": 1})
+        assert await documents.update(doc_id, "u", {"title": "a"}, version=1, check_version=True)
+        return await documents.update(doc_id, "u", {"content": _body("late", 20)}, version=1, check_version=True)
+
+    assert asyncio.run(run()) is False
+
+
+def test_interfaces_are_shared():
+    assert issubclass(ChunkedDocumentRepository, DocumentRepository)
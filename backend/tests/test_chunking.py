@@ -0,0 +1,73 @@
+import asyncio
+import json
+import re
+
+from app.config import settings
+from app.services import ai_service as ai_module
+from app.services.ai_service import ai_service
+from app.services.languages import get_pack
+from app.services.llm_cache import LLMCache
+from app.services.rate_limiter import InMemoryRateLimitBackend, LLMBudget
+from app.services.text_segmentation import chunk_text
+
+
+def _document(paragraphs: int = 40, first: str = "Opening paragraph.") -> str:
+    body = [first] + [
+        f"Paragraph {n} talks about topic{n}. It has a second sentence with more words in it, "
+        f"and a third sentence that keeps going for a while to add length." for n in range(1, paragraphs)
+    ]
+    return "\n\n".join(body)
+
+
+def test_chunks_cover_the_text_on_boundaries():
+    text = _document()
+    chunks = chunk_text(text, 600)
+    assert len(chunks) > 1
+    assert all(len(chunk.text) <= 600 and text[chunk.start:chunk.end] == chunk.text for chunk in chunks)
+    # Contiguous: nothing is skipped between chunks
+    assert "".join(chunk.text for chunk in chunks) == text
+    assert all(chunk.text.rstrip().endswith(".") for chunk in chunks)
+
+
+def test_edit_early_in_the_text_keeps_later_chunks():
+    before = chunk_text(_document(), 600)
+    after = chunk_text(_document(first="A rewritten and somewhat longer opening paragraph."), 600)
+    assert before[0].text != after[0].text
+    assert [chunk.text for chunk in before[-3:]] == [chunk.text for chunk in after[-3:]]
+
+
+def test_run_on_text_is_split_at_spaces():
+    text = " ".join(["word"] * 1000)
+    chunks = chunk_text(text, 500)
+    assert all(len(chunk.text) <= 500 for chunk in chunks)
+    assert "".join(chunk.text for chunk in chunks) == text
+    assert all(not chunk.text.startswith(" ") for chunk in chunks)
+
+
+def test_long_documents_are_analyzed_past_the_first_window(monkeypatch):
+    monkeypatch.setattr(settings, "llm_chunk_chars", 600)
+    monkeypatch.setattr(settings, "llm_structured_output", True)
+    monkeypatch.setattr(ai_module, "llm_budget", LLMBudget(InMemoryRateLimitBackend()))
+    monkeypatch.setattr(ai_module, "llm_cache", LLMCache(ttl_seconds=60, max_entries=100))
+    monkeypatch.setattr(ai_service, "_groq_client", object())
+    monkeypatch.setattr(ai_service, "_groq_initialized", True)
+
+    async def complete(prompt, model):
+        # Flag the first topic word of the chunk in the prompt
+        topic = re.search(r"topic\d+", prompt.split("Text:", 1)[1]).group()
+        return json.dumps({"suggestions": [{"type": "style", "issue": topic, "suggestion": "subject",
+                                            "explanation": "Be specific"}]})
+    monkeypatch.setattr(ai_service, "_complete_groq", complete)
+    text = _document()
+    pack = get_pack("en-US", text)
+
+    def analyze(max_chunks):
+        monkeypatch.setattr(settings, "llm_max_chunks", max_chunks)
+        return asyncio.run(ai_service._get_groq_suggestions(text, "d", "u", "professional", pack))
+
+    matches = analyze(50)
+    chunks = chunk_text(text, 600)
+    assert len(matches) == len(chunks)
+    assert max(match.start for match in matches) > 2000
+    assert all(re.fullmatch(r"topic\d+", text[match.start:match.end]) for match in matches)
+    assert len(analyze(2)) == 2
@@ -0,0 +1,42 @@
+from app.services.ai_service import CLARITY_RULES, LONG_SENTENCE_WORDS, UNIFORM_WINDOW, ai_service
+from app.services.languages import get_pack
+from app.services.text_segmentation import sentence_spans
+
+LONG = " ".join(["This sentence keeps adding words"] * 6) + "."
+NESTED = "The plan failed because the team, which was small, left when funding ended although we tried."
+ABSTRACT = "The implementation of the assessment required the consideration of the management."
+UNIFORM = " ".join(["The cat sat on the warm mat today."] * UNIFORM_WINDOW)
+
+
+def _rules(content, suppressed=frozenset()):
+    return [(m.rule_id, m.start, m.end) for m in ai_service._check_clarity(content, get_pack("en"), suppressed)]
+
+
+def test_sentence_spans_are_offsets_into_the_text():
+    text = "First one.  Second one!\nThird one?"
+    spans = sentence_spans(text)
+    assert [text[start:end] for start, end in spans] == ["First one.", "Second one!", "Third one?"]
+
+
+def test_repeated_sentences_get_their_own_offsets():
+    text = f"{LONG} Short one. {LONG}"
+    hits = [(start, end) for rule, start, end in _rules(text) if rule == "clarity.long_sentence"]
+    assert len(hits) == 2 and hits[0] != hits[1]
+    assert all(text[start:end] == LONG for start, end in hits)
+    assert len(LONG.split()) > LONG_SENTENCE_WORDS
+
+
+def test_each_clarity_rule_flags_its_sentence():
+    text = f"{NESTED} {ABSTRACT}"
+    rules = {rule: text[start:end] for rule, start, end in _rules(text)}
+    assert rules["clarity.nested_clauses"] == NESTED
+    assert rules["clarity.nominalizations"] == ABSTRACT
+    uniform = _rules(UNIFORM)
+    assert [(rule, start, end) for rule, start, end in uniform] == [("clarity.uniform_length", 0, len(UNIFORM))]
+
+
+def test_suppressed_clarity_rules_are_skipped():
+    text = f"{LONG} {NESTED} {ABSTRACT} {UNIFORM}"
+    assert {rule for rule, _, _ in _rules(text)} == CLARITY_RULES
+    assert {rule for rule, _, _ in _rules(text, {"clarity.long_sentence"})} == CLARITY_RULES - {"clarity.long_sentence"}
+    assert _rules(text, CLARITY_RULES) == []
@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+
+from app.config import settings
+from app.repositories import close_storage, codec, init_storage, repositories
+from app.repositories.codec import IDENTITY, ContentCodec, content_codec, samples_from
+from app.repositories.memory import MemoryDatabase
+from app.repositories.mongo import MongoDictionaryStore
+from benchmarks.corpus import synthetic_text
+
+pytest.importorskip("zstandard")
+
+PROSE = synthetic_text(60_000)
+BODY = PROSE[:5000]
+# Short, but in the vocabulary of the training prose: compresses only with a dictionary
+EXPLANATION = ("The quarterly report was reviewed by the committee last week, and the team improved the migration "
+               "plan before the deadline.")
+
+
+@pytest.fixture(autouse=True)
+def _zstd(monkeypatch):
+    monkeypatch.setattr(settings, "content_codec", "zstd")
+    monkeypatch.setattr(settings, "content_dictionary_size", 8192)
+
+
+def _with_storage(test):
+    async def run():
+        await init_storage("memory")
+        try:
+            return await test()
+        finally:
+            await close_storage()
+    return asyncio.run(run())
+
+
+def test_values_round_trip_and_short_ones_stay_plain():
+    async def test():
+        compressed = content_codec.encode(BODY)
+        return compressed, content_codec.encode("Too short.")
+
+    (name, payload), short = _with_storage(test)
+    assert name == "zstd:0" and isinstance(payload, bytes) and len(payload) < len(BODY)
+    assert content_codec.decode(name, payload) == BODY
+    assert short == (IDENTITY, "Too short.")
+
+
+def test_codec_can_be_turned_off(monkeypatch):
+    monkeypatch.setattr(settings, "content_codec", "none")
+
+    async def test():
+        return content_codec.current, content_codec.encode(BODY)
+
+    assert _with_storage(test) == (IDENTITY, (IDENTITY, BODY))
+
+
+def test_training_switches_new_writes_and_migrate_recodes_old_ones():
+    async def test():
+        doc_id = await repositories.documents.insert({"user_id": "u", "title": "t", "content": BODY, "version": 1})
+        await repositories.suggestions.insert_many([{"document_id": doc_id, "user_id": "u", "explanation": EXPLANATION,
+                                                    "is_dismissed": False, "created_at": 0}])
+        before = await codec._status(repositories)
+        for paragraph in samples_from(PROSE):
+            await repositories.suggestions.insert_many([{"document_id": "other", "user_id": "u", "explanation": paragraph}])
+        dict_id = await codec._train(repositories, max_samples=1000)
+        migrated = await codec._migrate(repositories)
+        after = await codec._status(repositories)
+        document = await repositories.documents.get(doc_id, "u")
+        explanations = [s["explanation"] for s in await repositories.suggestions.list_for_document(doc_id, "u")]
+        return before, dict_id, migrated, after, document["content"], explanations
+
+    before, dict_id, migrated, after, content, explanations = _with_storage(test)
+    assert before["current"] == "zstd:0" and before["documents"] == {"zstd:0": 1}
+    assert after["current"] == f"zstd:{dict_id}"
+    assert set(after["documents"]) == {f"zstd:{dict_id}"} and f"zstd:{dict_id}" in after["suggestions"]
+    assert migrated["documents"] == 1 and migrated["suggestions"] >= 1
+    assert content == BODY and explanations == [EXPLANATION]
+
+
+def test_values_written_with_a_newer_dictionary_are_readable_elsewhere():
+    store = MongoDictionaryStore(MemoryDatabase("test")["content_dictionaries"])
+    writer, reader = ContentCodec(), ContentCodec()
+
+    async def run():
+        await writer.load(store)
+        await reader.load(store)
+        await writer.train(samples_from(PROSE))
+        name, payload = writer.encode(EXPLANATION)
+        await reader.ensure([name])
+        return name, payload
+
+    name, payload = asyncio.run(run())
+    assert name == writer.current != "zstd:0" and reader.current == "zstd:0"
+    assert reader.decode(name, payload) == EXPLANATION
+    with pytest.raises(KeyError):
+        ContentCodec().decode(name, payload)
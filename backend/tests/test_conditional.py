@@ -0,0 +1,70 @@
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.services import compression
+from app.services.compression import CompressionMiddleware, negotiate
+from app.services.conditional import conditional_json
+
+
+def _client(size: int) -> TestClient:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware)
+
+    @app.get("/poll")
+    async def poll(request: Request):
+        return conditional_json(request, {"text": "x" * size})
+    return TestClient(app)
+
+
+def test_negotiate_honors_quality_and_brotli_availability(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+    assert negotiate("gzip, deflate") == "gzip"
+    assert negotiate("br, gzip;q=0") is None
+    assert negotiate("*") == "gzip"
+    assert negotiate("identity") is None
+    monkeypatch.setattr(compression, "brotli", object())
+    assert negotiate("gzip, br") == "br"
+    assert negotiate("br;q=0, gzip") == "gzip"
+
+
+@pytest.mark.parametrize("size", [10, 5000])
+def test_304_repeats_the_validator_of_the_encoded_200(size):
+    client = _client(size)
+    first = client.get("/poll", headers={"Accept-Encoding": "gzip"})
+    tag = first.headers["etag"]
+    assert tag.endswith('-gzip"')
+    assert first.headers.get("content-encoding") == ("gzip" if size >= settings.response_compression_min_bytes else None)
+    assert first.json() == {"text": "x" * size}
+
+    again = client.get("/poll", headers={"Accept-Encoding": "gzip", "If-None-Match": tag})
+    assert again.status_code == 304
+    assert again.headers["etag"] == tag
+    assert again.content == b""
+
+    # The suffix is ignored when comparing, so a client switching encodings still revalidates
+    plain = client.get("/poll", headers={"Accept-Encoding": "identity", "If-None-Match": tag})
+    assert plain.status_code == 304
+    assert plain.headers["etag"] == tag.replace('-gzip"', '"')
+
+
+def test_changed_body_gets_a_new_tag():
+    tag = _client(10).get("/poll", headers={"Accept-Encoding": "identity"}).headers["etag"]
+    response = _client(11).get("/poll", headers={"Accept-Encoding": "identity", "If-None-Match": tag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != tag
+
+
+def test_large_bodies_are_gzipped_unless_compression_is_off(monkeypatch):
+    client = _client(5000)
+    compressed = client.get("/poll", headers={"Accept-Encoding": "gzip"})
+    assert compressed.headers["vary"] == "Accept-Encoding"
+    assert int(compressed.headers["content-length"]) < 5000
+
+    monkeypatch.setattr(settings, "response_compression", False)
+    response = client.get("/poll", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert not response.headers["etag"].endswith('-gzip"')
+    again = client.get("/poll", headers={"Accept-Encoding": "gzip", "If-None-Match": response.headers["etag"]})
+    assert again.headers["etag"] == response.headers["etag"]
@@ -0,0 +1,72 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from pymongo.read_preferences import SecondaryPreferred
+
+from app import database
+from app.config import settings
+from app.services.metrics import MongoPoolMonitor
+
+ADDRESS = ("db.example.com", 27017)
+
+
+def test_client_options_come_from_settings_unless_the_uri_sets_them(monkeypatch):
+    monkeypatch.setattr(settings, "mongodb_url", "mongodb://localhost:27017/?maxPoolSize=7")
+    monkeypatch.setattr(settings, "mongo_min_pool_size", 2)
+    monkeypatch.setattr(settings, "mongo_socket_timeout_ms", None)
+    monkeypatch.setattr(settings, "mongo_compressors", "brotli,zlib")
+    options = database.client_options()
+    assert "maxPoolSize" not in options
+    assert options["minPoolSize"] == 2
+    assert "socketTimeoutMS" not in options
+    assert options["compressors"] == "zlib"
+    assert options["waitQueueTimeoutMS"] == settings.mongo_wait_queue_timeout_ms
+
+
+def test_analytics_reads_prefer_secondaries(monkeypatch):
+    monkeypatch.setattr(settings, "mongo_analytics_max_staleness_seconds", 120)
+    preference = database.analytics_read_preference()
+    assert isinstance(preference, SecondaryPreferred)
+    assert preference.max_staleness == 120
+
+
+def test_pool_monitor_tracks_saturation_and_waits():
+    monitor = MongoPoolMonitor(max_pool_size=4)
+
+    def event(**fields):
+        return SimpleNamespace(address=ADDRESS, **fields)
+
+    monitor.pool_created(event())
+    for _ in range(3):
+        monitor.connection_created(event())
+        monitor.connection_check_out_started(event())
+        monitor.connection_checked_out(event(duration=0.002))
+    monitor.connection_checked_in(event())
+    monitor.connection_check_out_started(event())
+    monitor.connection_check_out_failed(event(duration=2.0, reason="timeout"))
+    stats = monitor.snapshot()["db.example.com:27017"]
+    assert (stats["open"], stats["in_use"], stats["waiting"], stats["max_in_use"]) == (3, 2, 0, 3)
+    assert stats["saturation"] == 0.5
+    assert stats["checkout_failures"] == {"timeout": 1}
+    assert stats["avg_wait_ms"] == 2.0 and stats["checkouts"] == 3
+
+
+def test_unreachable_server_is_fatal_only_when_required(monkeypatch):
+    monkeypatch.setattr(settings, "mongodb_url", "mongodb://127.0.0.1:1")
+    monkeypatch.setattr(settings, "mongo_server_selection_timeout_ms", 100)
+    monkeypatch.setattr(settings, "mongo_compressors", "")
+    for attribute in ("client", "database", "analytics_database"):
+        monkeypatch.setattr(database.db, attribute, None)
+
+    async def connect():
+        try:
+            await database.connect_to_mongo()
+        finally:
+            await database.close_mongo_connection()
+
+    asyncio.run(connect())
+    assert database.db.analytics_database.read_preference == database.analytics_read_preference()
+    monkeypatch.setattr(settings, "mongo_require_connection", True)
+    with pytest.raises(Exception):
+        asyncio.run(connect())
@@ -0,0 +1,33 @@
+import asyncio
+
+import pytest
+
+from app.repositories.memory import MemoryDatabase
+from app.repositories.mongo import MongoDocumentRepository
+from app.repositories.sql import SQLDocumentRepository, SQLStorage
+
+
+async def _mongo_api():
+    return MongoDocumentRepository(MemoryDatabase("test")["documents"])
+
+
+async def _sql():
+    storage = SQLStorage("sqlite://")
+    await storage.open()
+    return SQLDocumentRepository(storage)
+
+
+@pytest.mark.parametrize("make", [_mongo_api, _sql])
+def test_first_edit_advances_version(make):
+    async def run():
+        documents = await make()
+        current = await documents.insert({"user_id": "u", "content": "a", "version": 1})
+        # Saved before versions were stored; reads as version 1
+        legacy = await documents.insert({"user_id": "u", "content": "a"})
+        for doc_id in (current, legacy):
+            assert await documents.update(doc_id, "u", {"content": "b"})
+        assert not await documents.update(legacy, "u", {"content": "c"}, version=1, check_version=True)
+        assert await documents.update(legacy, "u", {"content": "c"}, version=2, check_version=True)
+        return [(await documents.get(doc_id))["version"] for doc_id in (current, legacy)]
+
+    assert asyncio.run(run()) == [2, 3]
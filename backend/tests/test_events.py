@@ -0,0 +1,111 @@
+import asyncio
+
+from app.config import settings
+from app.database import db
+from app.services import events
+from app.services.events import DOCUMENT, SUGGESTION, UPDATED, Event, EventBus
+
+
+class FakeStream:
+    """A change stream whose first read returns a change another worker made while this one started"""
+
+    def __init__(self, changes):
+        self.changes = list(changes)
+        self.resume_token = None
+
+    async def try_next(self):
+        if not self.changes:
+            return None
+        self.resume_token = {"_data": len(self.changes)}
+        return self.changes.pop(0)
+
+    async def close(self):
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        pass
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        change = await self.try_next()
+        if change is None:
+            await asyncio.Event().wait()  # idle until stopped
+        return change
+
+
+class FakeCollection:
+    def __init__(self, changes):
+        self.stream = FakeStream(changes)
+
+    async def create_index(self, *args, **kwargs):
+        pass
+
+    def watch(self, pipeline, resume_after=None):
+        return self.stream
+
+
+def _collect(bus, **kwargs):
+    seen = []
+
+    async def handler(event):
+        seen.append(event)
+    bus.subscribe(handler, **kwargs)
+    return seen
+
+
+def test_local_subscribers_see_own_events_and_remote_only_do_not():
+    async def run():
+        bus = EventBus()
+        everything = _collect(bus)
+        remote_only = _collect(bus, local=False)
+        documents = _collect(bus, kinds=[DOCUMENT])
+        await bus.publish(DOCUMENT, UPDATED, id="d", user_id="u", fields=["title", "content"])
+        await bus.publish(SUGGESTION, UPDATED, id="s")
+        await bus._dispatch(Event(DOCUMENT, UPDATED, id="d2", origin="another-worker"))
+        return everything, remote_only, documents
+
+    everything, remote_only, documents = asyncio.run(run())
+    assert [event.id for event in everything] == ["d", "s", "d2"]
+    assert everything[0].fields == ("content", "title")
+    assert [event.id for event in remote_only] == ["d2"]
+    assert [event.id for event in documents] == ["d", "d2"]
+
+
+def test_failing_handler_does_not_stop_delivery():
+    async def run():
+        bus = EventBus()
+
+        async def broken(event):
+            raise RuntimeError("boom")
+        bus.subscribe(broken)
+        seen = _collect(bus)
+        await bus.publish(DOCUMENT, UPDATED, id="d")
+        return seen
+
+    assert [event.id for event in asyncio.run(run())] == ["d"]
+
+
+def test_change_read_while_opening_the_stream_is_dispatched(monkeypatch):
+    change = {"fullDocument": {"_id": "x", "kind": DOCUMENT, "action": UPDATED, "id": "d", "user_id": "u",
+                               "document_id": None, "fields": ["content"], "origin": "another-worker", "at": None}}
+    monkeypatch.setattr(settings, "event_bus_backend", "mongo")
+    monkeypatch.setattr(db, "database", {events.COLLECTION: FakeCollection([change])})
+
+    async def run():
+        bus = EventBus()
+        seen = _collect(bus, local=False)
+        await bus.start()
+        try:
+            assert bus.shared
+            return seen, bus._resume_token
+        finally:
+            await bus.stop()
+
+    seen, token = asyncio.run(run())
+    assert seen == [Event(DOCUMENT, UPDATED, "d", "u", None, ("content",), "another-worker", None)]
+    assert token is not None
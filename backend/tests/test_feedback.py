@@ -0,0 +1,89 @@
+import asyncio
+import json
+
+from app.repositories import close_storage, init_storage
+from app.services import ai_service as ai_module
+from app.services.ai_service import ai_service
+from app.services.feedback_service import FeedbackService
+from app.services.llm_cache import LLMCache
+from app.services.llm_parsing import SUGGESTION_TYPES
+from app.services.rate_limiter import InMemoryRateLimitBackend, LLMBudget
+
+TEXT = "The report was written by the team. Their going to review it tomorrow."
+
+
+def _with_storage(test):
+    async def run():
+        await init_storage("memory")
+        try:
+            return await test()
+        finally:
+            await close_storage()
+    return asyncio.run(run())
+
+
+def test_dismissed_rules_are_suppressed_and_applied_rules_rank_higher():
+    feedback = FeedbackService()
+
+    async def test():
+        for _ in range(FeedbackService.SUPPRESS_MIN_DISMISSED):
+            await feedback.record_dismissed("u", "style.passive_voice")
+        for _ in range(3):
+            await feedback.record_applied("u", "vocabulary.very")
+        await feedback.record_dismissed("other", "vocabulary.very")
+        return await feedback.weights("u"), await feedback.weights("other")
+
+    mine, theirs = _with_storage(test)
+    assert mine.suppressed == {"style.passive_voice"}
+    assert mine.weight("vocabulary.very") > 1.0 > mine.weight("style.passive_voice")
+    # Another user starts from the global rate, pulled towards their own history
+    assert theirs.suppressed == set()
+    assert mine.weight("vocabulary.very") > theirs.weight("vocabulary.very")
+
+
+def _llm(monkeypatch, feedback):
+    prompts = []
+
+    async def complete(prompt, model):
+        prompts.append(prompt)
+        return json.dumps({"suggestions": []})
+    monkeypatch.setattr(ai_module, "feedback_service", feedback)
+    monkeypatch.setattr(ai_module, "llm_budget", LLMBudget(InMemoryRateLimitBackend()))
+    monkeypatch.setattr(ai_module, "llm_cache", LLMCache(ttl_seconds=60, max_entries=10))
+    monkeypatch.setattr(ai_service, "_groq_client", object())
+    monkeypatch.setattr(ai_service, "_groq_initialized", True)
+    monkeypatch.setattr(ai_service, "_complete_groq", complete)
+    return prompts
+
+
+def test_suppressed_llm_types_are_left_out_of_the_prompt(monkeypatch):
+    feedback = FeedbackService()
+    prompts = _llm(monkeypatch, feedback)
+
+    async def test():
+        for _ in range(FeedbackService.SUPPRESS_MIN_DISMISSED):
+            await feedback.record_dismissed("u", "llm.tone")
+        await ai_service.generate_suggestions(TEXT, "d", "u")
+        await ai_service.generate_suggestions(TEXT, "d", "v")
+
+    _with_storage(test)
+    narrowed, full = prompts
+    assert "Only suggest these types: grammar, style, clarity, vocabulary." in narrowed
+    assert "Only suggest these types" not in full
+
+
+def test_llm_stage_is_skipped_when_every_llm_type_is_suppressed(monkeypatch):
+    feedback = FeedbackService()
+    prompts = _llm(monkeypatch, feedback)
+
+    async def test():
+        for suggestion_type in SUGGESTION_TYPES:
+            for _ in range(FeedbackService.SUPPRESS_MIN_DISMISSED):
+                await feedback.record_dismissed("u", f"llm.{suggestion_type}")
+        for _ in range(FeedbackService.SUPPRESS_MIN_DISMISSED):
+            await feedback.record_dismissed("u", "style.passive_voice")
+        return await ai_service.generate_suggestions(TEXT, "d", "u")
+
+    suggestions = _with_storage(test)
+    assert prompts == []
+    assert suggestions and all(s.rule_id != "style.passive_voice" for s in suggestions)
@@ -0,0 +1,69 @@
+import asyncio
+
+from app.database import get_database
+from app.repositories import close_storage, init_storage, repositories
+from app.services.keyword_service import CorpusStats, KeywordService, tokenize_terms
+
+
+def _with_storage(test):
+    async def run():
+        await init_storage("memory")
+        try:
+            return await test()
+        finally:
+            await close_storage()
+    return asyncio.run(run())
+
+
+def test_incremental_updates_match_a_rebuild():
+    service = KeywordService()
+    edits = [
+        "Budget planning for the garden project.",
+        "Garden irrigation replaces the budget section.",
+        "Irrigation schedule only.",
+    ]
+
+    async def test():
+        documents = repositories.documents
+        await documents.insert({"user_id": "u", "title": "a", "content": "Garden soil notes and compost.", "version": 1})
+        await service.get_stats("u")  # first use builds the table from the corpus
+        doc_id = await documents.insert({"user_id": "u", "title": "b", "content": edits[0], "version": 1})
+        await service.add_document("u", edits[0])
+        for old, new in zip(edits, edits[1:]):
+            await documents.update(doc_id, "u", {"content": new})
+            await service.update_document("u", old, new)
+        db = await get_database()
+        stored = await db[service.collection_name].find_one({"_id": "u"})
+        cached = await service.get_stats("u")
+        rebuilt = await KeywordService().rebuild("u")
+        return stored, cached, rebuilt
+
+    stored, cached, rebuilt = _with_storage(test)
+    assert stored["df"] == cached.df == rebuilt.df
+    assert min(stored["df"].values()) > 0
+    assert "budget" not in stored["df"] and stored["df"]["garden"] == 1
+    assert (stored["doc_count"], stored["total_terms"]) == (cached.doc_count, cached.total_terms) == (
+        rebuilt.doc_count, rebuilt.total_terms)
+
+
+def test_replace_never_leaves_zero_or_negative_counts():
+    stats = CorpusStats(1, 2, {"alpha": 1})
+    stats.replace(["alpha", "beta"], ["gamma"])
+    assert stats.df == {"gamma": 1}
+
+
+def test_bm25_prefers_terms_rare_in_the_corpus():
+    stats = CorpusStats()
+    for text in ["Quarterly revenue grew.", "Revenue targets for the quarter.", "Revenue and hiring plans."]:
+        stats.add(tokenize_terms(text))
+    result = KeywordService().extract_with_stats("Revenue growth depends on hiring engineers.", stats)
+    keywords = [next(iter(entry)) for entry in result.keywords]
+    assert keywords.index("engineers") < keywords.index("hiring") < keywords.index("revenue")
+
+
+def test_rake_phrases_and_entities():
+    text = "Machine learning models are trained on training data. Acme Corp sells data to Machine learning teams."
+    result = KeywordService().extract_with_stats(text, CorpusStats())
+    assert "machine learning models" in result.topics
+    assert "training data" in result.topics
+    assert {"Acme Corp": "PROPER_NOUN"} in result.entities
@@ -0,0 +1,70 @@
+import asyncio
+
+from app.repositories import close_storage, init_storage
+from app.services import ai_service as ai_module
+from app.services import languages
+from app.services.ai_service import ai_service
+from app.services.feedback_service import FeedbackService
+from app.services.languages import (
+    DEFAULT_LANGUAGE, UNDETERMINED, detect_language, get_pack, loaded_languages, normalize_language,
+    register_language, resolve_language, supported_languages,
+)
+
+GERMAN = "Die Besprechung ist nicht auf den Montag verschoben worden, und das Team hat mit der Planung begonnen."
+SPANISH = "El equipo de ventas presentó los resultados del trimestre y la empresa se prepara para el año que viene."
+FRENCH = "Le rapport est prêt et les chiffres de la semaine sont dans le dossier que nous avons partagé pour la réunion."
+
+
+def test_language_codes_are_normalized():
+    assert normalize_language("en-US") == "en"
+    assert normalize_language("pt_BR") == "pt"
+    assert normalize_language("FR") == "fr"
+    assert normalize_language("auto") is None and normalize_language(None) is None
+
+
+def test_undeclared_language_is_detected():
+    assert detect_language(GERMAN) == "de"
+    assert detect_language(SPANISH) == "es"
+    assert detect_language(FRENCH) == "fr"
+    assert detect_language("Lorem ipsum dolor sit amet") is None
+    assert resolve_language(None, "Lorem ipsum dolor sit amet") == DEFAULT_LANGUAGE
+    assert resolve_language("auto", GERMAN) == "de"
+
+
+def test_declared_language_wins_and_unknown_ones_fall_back_to_the_neutral_pack():
+    assert resolve_language("en-GB", GERMAN) == "en"
+    assert resolve_language("pt-BR", SPANISH) == UNDETERMINED
+    assert get_pack("pt-BR").code == UNDETERMINED
+    assert UNDETERMINED not in supported_languages()
+
+
+def test_packs_are_loaded_on_first_use_and_cached():
+    pack = get_pack("fr")
+    assert "fr" in loaded_languages()
+    assert get_pack("fr-CA") is pack
+    assert pack.name == "French"
+
+
+def test_registered_languages_are_resolvable(monkeypatch):
+    monkeypatch.setattr(languages, "_REGISTRY", dict(languages._REGISTRY))
+    register_language("xx", "app.services.languages.generic")
+    assert "xx" in supported_languages()
+    assert resolve_language("xx-YY") == "xx"
+
+
+def test_suggestions_use_the_rules_of_the_document_language(monkeypatch):
+    monkeypatch.setattr(ai_module, "feedback_service", FeedbackService())
+    monkeypatch.setattr(ai_service, "_groq_client", None)
+    monkeypatch.setattr(ai_service, "_groq_initialized", True)
+    text = "Das ist gut. Their plan is fine."
+
+    async def run():
+        await init_storage("memory")
+        try:
+            return [await ai_service.generate_suggestions(text, "d", "u", language=language) for language in ("de", "en")]
+        finally:
+            await close_storage()
+
+    german, english = ([s.rule_id for s in result] for result in asyncio.run(run()))
+    assert "grammar.das_dass" in german and "grammar.there_their" not in german
+    assert "grammar.there_their" in english and "grammar.das_dass" not in english
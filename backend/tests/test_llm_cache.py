@@ -0,0 +1,128 @@
+import asyncio
+
+import pytest
+
+from app.services.llm_cache import LLMCache, prompt_fingerprint
+
+
+class Upstream:
+    """Counts calls; each one waits until released"""
+
+    def __init__(self):
+        self.calls = 0
+        self.release = None
+
+    async def __call__(self):
+        self.calls += 1
+        await self.release.wait()
+        return f"reply {self.calls}"
+
+
+def test_fingerprint_covers_model_prompt_and_parameters():
+    key = prompt_fingerprint("m", "p", max_tokens=10, temperature=0.2)
+    assert key == prompt_fingerprint("m", "p", temperature=0.2, max_tokens=10)
+    assert key != prompt_fingerprint("m", "p", max_tokens=11, temperature=0.2)
+    assert key != prompt_fingerprint("other", "p", max_tokens=10, temperature=0.2)
+    assert key != prompt_fingerprint("m", "p2", max_tokens=10, temperature=0.2)
+
+
+def test_concurrent_callers_share_one_upstream_call():
+    cache = LLMCache(ttl_seconds=60, max_entries=10)
+    upstream = Upstream()
+
+    async def run():
+        upstream.release = asyncio.Event()
+        callers = [asyncio.ensure_future(cache.get_or_compute("k", upstream)) for _ in range(5)]
+        await asyncio.sleep(0)
+        upstream.release.set()
+        results = await asyncio.gather(*callers)
+        return results, await cache.get_or_compute("k", upstream)
+
+    results, cached = asyncio.run(run())
+    assert results == ["reply 1"] * 5 and cached == "reply 1"
+    assert upstream.calls == 1
+    assert (cache.misses, cache.coalesced, cache.hits) == (1, 4, 1)
+    assert cache.stats()["inflight"] == 0
+
+
+def test_cancelling_the_first_caller_does_not_cancel_the_shared_call():
+    cache = LLMCache(ttl_seconds=60, max_entries=10)
+    upstream = Upstream()
+
+    async def run():
+        upstream.release = asyncio.Event()
+        leader = asyncio.ensure_future(cache.get_or_compute("k", upstream))
+        follower = asyncio.ensure_future(cache.get_or_compute("k", upstream))
+        await asyncio.sleep(0)
+        leader.cancel()
+        await asyncio.sleep(0)
+        upstream.release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(run()) == "reply 1"
+    assert upstream.calls == 1
+
+
+def test_failures_reach_every_waiter_and_are_not_cached():
+    cache = LLMCache(ttl_seconds=60, max_entries=10)
+    attempts = []
+
+    async def failing():
+        attempts.append(1)
+        await asyncio.sleep(0)
+        raise RuntimeError("upstream down")
+
+    async def run():
+        results = await asyncio.gather(*(cache.get_or_compute("k", failing) for _ in range(3)), return_exceptions=True)
+        with pytest.raises(RuntimeError):
+            await cache.get_or_compute("k", failing)
+        return results
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert len(attempts) == 2
+
+
+def test_disk_tier_survives_a_restart_and_entries_expire(tmp_path):
+    path = str(tmp_path / "llm.sqlite")
+
+    async def compute():
+        return "stored"
+
+    async def run():
+        first = LLMCache(ttl_seconds=60, max_entries=10, disk_path=path)
+        await first.get_or_compute("k", compute)
+        first.close()
+        second = LLMCache(ttl_seconds=60, max_entries=10, disk_path=path)
+        value = await second.get_or_compute("k", Upstream())  # fails if it reaches upstream
+        second.close()
+        expired = LLMCache(ttl_seconds=-1, max_entries=10, disk_path=path)
+        await expired.get_or_compute("gone", compute)
+        expired.clear()
+        return value, second.disk_hits, expired.disk.get("gone")
+
+    value, disk_hits, gone = asyncio.run(run())
+    assert (value, disk_hits) == ("stored", 1)
+    assert gone is None
+
+
+def test_memory_tier_is_bounded_lru():
+    cache = LLMCache(ttl_seconds=60, max_entries=2)
+
+    async def run():
+        for key in ("a", "b"):
+            await cache.get_or_compute(key, _value(key))
+        await cache.get_or_compute("a", _value("unused"))  # touch a
+        await cache.get_or_compute("c", _value("c"))  # evicts b
+        return await cache.get_or_compute("b", _value("b again"))
+
+    assert asyncio.run(run()) == "b again"
+    assert cache.stats()["memory_entries"] == 2
+
+
+def _value(text):
+    async def compute():
+        return text
+    return compute
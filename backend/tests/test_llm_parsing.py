@@ -0,0 +1,56 @@
+import json
+
+from app.services.llm_parsing import SuggestionStreamParser, TextIndex, parse_suggestion_items, parse_text_items
+
+ITEM = {"type": "grammar", "issue": "Their going", "suggestion": "They're going", "explanation": "Contraction"}
+
+
+def test_items_are_emitted_as_soon_as_they_close():
+    reply = json.dumps({"suggestions": [ITEM, {**ITEM, "issue": "a {brace} and \"quote\""}]})
+    parser = SuggestionStreamParser()
+    cut = reply.index("}") + 1
+    first = parser.feed(reply[:cut])
+    rest = parser.feed(reply[cut:])
+    assert first == [ITEM]
+    assert rest == [{**ITEM, "issue": 'a {brace} and "quote"'}]
+
+
+def test_wrapped_bare_and_incomplete_replies():
+    fenced = "Here you go:\n```json\n" + json.dumps([ITEM]) + "\n```"
+    assert parse_suggestion_items(fenced) == [ITEM]
+    missing_field = {k: v for k, v in ITEM.items() if k != "explanation"}
+    truncated = json.dumps({"suggestions": [ITEM, missing_field, ITEM]})[:-20]
+    assert parse_suggestion_items(truncated) == [ITEM]
+
+
+def test_legacy_line_format():
+    text = "- Type: style\n- Issue: very good\n- Suggestion: excellent\n- Explanation: Stronger word\n- Type: tone"
+    assert parse_text_items(text) == [
+        {"type": "style", "issue": "very good", "suggestion": "excellent", "explanation": "Stronger word"}
+    ]
+
+
+def test_spans_resolve_to_the_occurrence_near_the_cursor():
+    text = "The cat sat. The Cat ran. The cat slept."
+    index = TextIndex(text)
+    assert index.find("the cat") == (0, 7)
+    assert index.find("the cat", near=10) == (13, 20)
+    assert index.find("the cat", near=10, lo=20) == (26, 33)
+    assert index.find("missing words entirely") is None
+
+
+def test_spans_tolerate_whitespace_punctuation_and_small_differences():
+    text = "We  need to\nfinalise the plan, before Friday's meeting."
+    index = TextIndex(text)
+    start, end = index.find("need to finalise the plan before")
+    assert text[start:end] == "need to\nfinalise the plan, before"
+    start, end = index.find("finalize the plan")
+    assert text[start:end] == "finalise the plan"
+
+
+def test_case_folding_keeps_offsets():
+    text = "Straße STRASSE straße"
+    index = TextIndex(text)
+    assert len(index.folded) == len(text)
+    start, end = index.find("STRAßE", near=10)
+    assert text[start:end] == "straße"
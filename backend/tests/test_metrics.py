@@ -0,0 +1,51 @@
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.metrics import CONTENT_TYPE, Registry
+
+
+def test_histograms_render_cumulative_buckets():
+    registry = Registry()
+    latency = registry.histogram("demo_seconds", "Demo latency", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        latency.observe(value, route="/a")
+    lines = registry.render().splitlines()
+    assert "# TYPE demo_seconds histogram" in lines
+    assert 'demo_seconds_bucket{route="/a",le="0.1"} 1' in lines
+    assert 'demo_seconds_bucket{route="/a",le="1.0"} 2' in lines
+    assert 'demo_seconds_bucket{route="/a",le="+Inf"} 3' in lines
+    assert 'demo_seconds_count{route="/a"} 3' in lines
+    assert 'demo_seconds_sum{route="/a"} 5.55' in lines
+
+
+def test_counters_escape_labels_and_are_registered_once():
+    registry = Registry()
+    hits = registry.counter("demo_total", "Demo hits", ("cache",))
+    assert registry.counter("demo_total", "Demo hits", ("cache",)) is hits
+    hits.inc(cache='a"b')
+    hits.inc(2, cache='a"b')
+    assert 'demo_total{cache="a\\"b"} 3' in registry.render().splitlines()
+
+
+def test_collectors_are_read_at_scrape_time():
+    registry = Registry()
+    size = [1]
+    registry.register_collector(lambda: [("demo_entries", "gauge", "Demo entries", [({}, size[0])])])
+    assert "demo_entries 1" in registry.render().splitlines()
+    size[0] = 4
+    assert "demo_entries 4" in registry.render().splitlines()
+
+
+def test_metrics_endpoint_labels_requests_by_route_template():
+    with TestClient(app) as client:
+        client.get("/health")
+        client.get("/api/auth/documents/documents/does-not-exist")
+        response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == CONTENT_TYPE
+    body = response.text
+    assert 'writeflow_http_request_duration_seconds_count{method="GET",route="/health",status="200"}' in body
+    assert "does-not-exist" not in body
+    assert 'route="/api/auth/documents/documents/{doc_id}"' in body
+    for family in ("writeflow_llm_cache_requests_total", "writeflow_scheduler_queued", "writeflow_word_hash_cache_requests_total"):
+        assert f"# TYPE {family} " in body
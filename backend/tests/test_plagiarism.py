@@ -0,0 +1,89 @@
+import asyncio
+
+from app.repositories import close_storage, init_storage, repositories
+from app.services.plagiarism_service import PlagiarismService
+
+ESSAY = (
+    "The migration of monarch butterflies spans thousands of kilometres every autumn, "
+    "guided by the position of the sun and an internal clock in their antennae. "
+    "Scientists tagging individual insects found that several generations complete one round trip, "
+    "and that no single butterfly ever sees both ends of the journey."
+)
+UNRELATED = (
+    "Sourdough bread relies on wild yeast and lactic acid bacteria cultivated in a starter, "
+    "which is fed flour and water daily until it reliably doubles within a few hours."
+)
+
+
+def _with_index(test):
+    async def run():
+        await init_storage("memory")
+        try:
+            service = PlagiarismService()
+
+            async def store(user_id, content):
+                doc_id = await repositories.documents.insert({"user_id": user_id, "content": content, "version": 1})
+                await service.index_document(doc_id, user_id, content)
+                return doc_id
+            return await test(service, store)
+        finally:
+            await close_storage()
+    return asyncio.run(run())
+
+
+def test_stored_document_checked_against_the_index_is_original():
+    async def test(service, store):
+        doc_id = await store("u", ESSAY)
+        await store("v", UNRELATED)
+        return await service.check(ESSAY, user_id="u", exclude_document_id=doc_id)
+
+    report = _with_index(test)
+    assert report.status == "original"
+    assert report.plagiarism_score == 0.0
+    assert report.matches == []
+
+
+def test_copies_by_other_users_count_and_own_copies_are_only_listed():
+    async def test(service, store):
+        own_copy = await store("u", ESSAY)
+        only_mine = await service.check(ESSAY, user_id="u")
+        await store("v", ESSAY)
+        with_theirs = await service.check(ESSAY, user_id="u")
+        await service.remove_document(own_copy)
+        return own_copy, only_mine, with_theirs, await service.check(ESSAY, user_id="u")
+
+    own_copy, only_mine, with_theirs, after_removal = _with_index(test)
+    # Reusing one's own writing is shown but not scored
+    assert only_mine.status == "original" and only_mine.plagiarism_score == 0.0
+    assert [match.document_id for match in only_mine.matches] == [own_copy]
+    assert with_theirs.status == "similarities_found" and with_theirs.plagiarism_score == 100.0
+    # Another user's document is never identified to the requester
+    assert sorted(match.document_id or "" for match in with_theirs.matches) == ["", own_copy]
+    assert [match.document_id for match in after_removal.matches] == [None]
+
+
+def test_near_duplicates_are_found_with_their_spans():
+    edited = ESSAY.replace("thousands of kilometres", "many thousands of miles").replace("Scientists", "Researchers")
+
+    async def test(service, store):
+        await store("v", ESSAY)
+        await store("v", UNRELATED)
+        return await service.check(edited, user_id="u")
+
+    near = _with_index(test)
+    assert near.status == "similarities_found"
+    assert len(near.matches) == 1 and near.matches[0].similarity > 50
+    spans = near.matches[0].matched_spans
+    assert spans and edited[spans[0].start:spans[0].end].startswith("The migration of monarch")
+
+
+def test_reindexing_an_edited_document_replaces_its_signature():
+    async def test(service, store):
+        doc_id = await store("v", ESSAY)
+        await repositories.documents.update(doc_id, "v", {"content": UNRELATED})
+        await service.index_document(doc_id, "v", UNRELATED)
+        return await service.check(ESSAY, user_id="u"), await service.check(UNRELATED, user_id="u")
+
+    old, new = _with_index(test)
+    assert old.status == "original"
+    assert new.status == "similarities_found"
@@ -0,0 +1,71 @@
+import asyncio
+import time
+from collections import Counter
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.dependencies import get_current_active_user
+from app.main import app
+from app.models.user import User
+from app.services import profiling
+from app.services.auth import create_access_token
+
+ADMIN = "admin@example.com"
+
+
+def _busy_loop(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def test_top_functions_rank_by_self_samples():
+    stacks = Counter({"main;parse;tokenize": 3, "main;parse": 1, "main;render": 2})
+    ranked = profiling.top_functions(stacks)
+    assert [(f["function"], f["self"], f["total"]) for f in ranked] == [
+        ("tokenize", 3, 3), ("render", 2, 2), ("parse", 1, 4)
+    ]
+    assert profiling.folded(stacks).splitlines()[0] == "main;parse;tokenize 3"
+
+
+def test_work_on_propagated_threads_is_sampled(monkeypatch):
+    monkeypatch.setattr(settings, "profiling_interval_ms", 1.0)
+
+    async def run():
+        session = profiling.ProfileSession("header", "GET", "/x")
+        token = profiling._current.set(session)
+        profiling.sampler.start(session)
+        try:
+            await asyncio.to_thread(profiling.propagate(_busy_loop), 0.2)
+        finally:
+            profiling.sampler.stop(session)
+            profiling._current.reset(token)
+        return session
+
+    session = asyncio.run(run())
+    assert session.samples > 0 and not session.threads
+    leaf = f"_busy_loop (tests/test_profiling.py:{_busy_loop.__code__.co_firstlineno})"
+    assert any(stack.endswith(leaf) for stack in session.stacks)
+    assert profiling._current.get() is None
+
+
+def test_admin_header_profiles_a_request_and_stores_it(monkeypatch):
+    monkeypatch.setattr(settings, "admin_emails", ADMIN)
+    admin = User(id="a", email=ADMIN, full_name="A", subscription_tier="free",
+                 created_at=datetime.utcnow(), updated_at=datetime.utcnow())
+    monkeypatch.setitem(app.dependency_overrides, get_current_active_user, lambda: admin)
+
+    def headers(email):
+        return {"X-Profile": "1", "Authorization": f"Bearer {create_access_token({'sub': email})}"}
+
+    with TestClient(app) as client:
+        assert profiling.PROFILE_ID_HEADER not in client.get("/health").headers
+        assert profiling.PROFILE_ID_HEADER not in client.get("/health", headers=headers("writer@example.com")).headers
+        profile_id = client.get("/health", headers=headers(ADMIN)).headers[profiling.PROFILE_ID_HEADER]
+        profile = client.get(f"/api/profiles/{profile_id}").json()
+        listed = client.get("/api/profiles/", params={"route": "/health"}).json()
+    assert (profile["trigger"], profile["route"], profile["status"]) == ("header", "/health", 200)
+    assert "folded" not in profile
+    assert [p["id"] for p in listed] == [profile_id]
@@ -0,0 +1,112 @@
+import asyncio
+import json
+from datetime import datetime
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from app.dependencies import get_current_active_user, rate_limited
+from app.models.user import User
+from app.services import ai_service as ai_module
+from app.services import rate_limiter as limiter_module
+from app.services.ai_service import ai_service
+from app.services.llm_cache import LLMCache
+from app.services.llm_parsing import TextIndex
+from app.services.rate_limiter import InMemoryRateLimitBackend, LLMBudget, LLMBudgetExhausted, RateLimiter, limits_for_tier
+from app.services.text_segmentation import TextChunk
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return self.now
+
+
+def test_token_bucket_allows_burst_then_refills(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(limiter_module, "time", clock)
+    limits = limits_for_tier("free")
+    limiter = RateLimiter(InMemoryRateLimitBackend())
+
+    async def run():
+        burst = [await limiter.hit("u", "free") for _ in range(limits.burst)]
+        refused = await limiter.hit("u", "free")
+        other_user = await limiter.hit("v", "free")
+        clock.now += 60.0 / limits.requests_per_minute
+        refilled = await limiter.hit("u", "free")
+        return burst, refused, other_user, refilled
+
+    burst, refused, other_user, refilled = asyncio.run(run())
+    assert burst == [0.0] * limits.burst
+    assert refused == pytest.approx(60.0 / limits.requests_per_minute)
+    assert other_user == 0.0
+    assert refilled == 0.0
+
+
+def test_exhausted_bucket_answers_429_with_retry_after():
+    app = FastAPI()
+    user = User(id="u429", email="u@example.com", full_name="U", subscription_tier="free",
+                created_at=datetime.utcnow(), updated_at=datetime.utcnow())
+    app.dependency_overrides[get_current_active_user] = lambda: user
+
+    @app.get("/limited")
+    async def limited(current_user: User = Depends(rate_limited("test", cost=limits_for_tier("free").burst))):
+        return {"ok": True}
+
+    client = TestClient(app)
+    assert client.get("/limited").status_code == 200
+    response = client.get("/limited")
+    assert response.status_code == 429
+    assert int(response.headers["retry-after"]) >= 1
+
+
+def test_budget_reservations_settle_to_actual_spend():
+    budget = LLMBudget(InMemoryRateLimitBackend())
+    allowance = limits_for_tier("free").daily_llm_tokens
+
+    async def run():
+        await budget.reserve("u", "free", allowance - 100)
+        with pytest.raises(LLMBudgetExhausted):
+            await budget.reserve("u", "free", 200)
+        await budget.settle("u", allowance - 100, 1000)
+        await budget.reserve("u", "free", 200)
+        return await budget.remaining("u", "free")
+
+    assert asyncio.run(run()) == allowance - 1200
+
+
+def test_coalesced_caller_is_not_refused_for_another_users_budget(monkeypatch):
+    budget = LLMBudget(InMemoryRateLimitBackend())
+    monkeypatch.setattr(ai_module, "llm_budget", budget)
+    monkeypatch.setattr(ai_module, "llm_cache", LLMCache(ttl_seconds=60, max_entries=10))
+    monkeypatch.setattr(ai_service, "_groq_client", object())
+    monkeypatch.setattr(ai_service, "_groq_initialized", True)
+    calls = []
+    text = "Their going to the store today."
+    chunk, index = TextChunk(0, len(text), text), TextIndex(text)
+
+    async def complete(prompt, model):
+        calls.append(prompt)
+        await asyncio.sleep(0.01)
+        return json.dumps({"suggestions": [{"type": "grammar", "issue": "Their",
+                                            "suggestion": "They're", "explanation": "Contraction of they are"}]})
+    monkeypatch.setattr(ai_service, "_complete_groq", complete)
+
+    async def run():
+        await budget.record("broke", limits_for_tier("free").daily_llm_tokens)
+        return await asyncio.gather(
+            ai_service._analyze_chunk(chunk, index, "broke", "general", "English"),
+            ai_service._analyze_chunk(chunk, index, "rich", "general", "English"),
+            return_exceptions=True,
+        )
+
+    broke, rich = asyncio.run(run())
+    assert isinstance(broke, LLMBudgetExhausted) and broke.user_id == "broke"
+    assert [match.suggestion for match in rich] == ["They're"]
+    assert len(calls) == 1
@@ -0,0 +1,60 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+
+from app.database import get_database
+from app.dependencies import get_current_active_user
+from app.models.user import User
+from app.repositories import close_storage, init_storage, repositories
+from app.services.rollup_service import DAY, WEEK, RollupService, bucket_start
+
+
+def _with_storage(test):
+    async def run():
+        await init_storage("memory")
+        try:
+            return await test()
+        finally:
+            await close_storage()
+    return asyncio.run(run())
+
+
+def test_backfill_after_live_saves_keeps_their_counters():
+    rollups = RollupService()
+    now = datetime.utcnow()
+    earlier = now - timedelta(days=30)
+
+    async def test():
+        documents = repositories.documents
+        await documents.insert({"user_id": "u", "content": "old " * 40, "word_count": 40, "created_at": earlier})
+        await documents.insert({"user_id": "u", "content": "new " * 70, "word_count": 70, "created_at": now})
+        await rollups.record("u", at=now, words_added=70, saves=1, readability=60.0)
+        await rollups.record("u", at=now, words_added=5, words_removed=2, saves=1)
+        db = await get_database()
+        collection = db[rollups.collection_name]
+        live = await collection.find_one({"_id": f"u:{DAY}:{bucket_start(now, DAY)}"})
+        for _ in range(2):  # re-runnable
+            assert await rollups.backfill("u", readability=lambda content: 50.0) == 2
+        after = await collection.find_one({"_id": f"u:{DAY}:{bucket_start(now, DAY)}"})
+        history = await collection.find_one({"_id": f"u:{WEEK}:{bucket_start(earlier, WEEK)}"})
+        trend = await rollups.productivity_trend("u", days=1)
+        return live, after, history, trend
+
+    live, after, history, trend = _with_storage(test)
+    assert after == live
+    assert (after["words_added"], after["saves"], after["readability_count"]) == (75, 2, 1)
+    assert "backfilled" not in after
+    # Periods without live data are synthesized from the stored document
+    assert history["backfilled"] and (history["words_added"], history["saves"]) == (40, 1)
+    assert trend == [{bucket_start(now, DAY): 73}]
+
+
+def test_backfill_requires_an_admin(monkeypatch):
+    from app.main import app
+
+    user = User(id="u", email="writer@example.com", full_name="W", subscription_tier="free",
+                created_at=datetime.utcnow(), updated_at=datetime.utcnow())
+    monkeypatch.setitem(app.dependency_overrides, get_current_active_user, lambda: user)
+    response = TestClient(app).post("/api/analytics/analytics/rollups/backfill")
+    assert response.status_code == 403
@@ -0,0 +1,71 @@
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+import pytest
+
+import run
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _get(url, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            with urllib.request.urlopen(url, timeout=5) as response:
+                return response.status
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.1)
+
+
+def test_default_workers_follow_cpu_affinity(monkeypatch):
+    monkeypatch.setattr(os, "sched_getaffinity", lambda pid: {0, 1, 2}, raising=False)
+    assert run._default_workers() == 3
+    monkeypatch.delattr(os, "sched_getaffinity")
+    monkeypatch.setattr(os, "cpu_count", lambda: None)
+    assert run._default_workers() == 1
+
+
+def test_production_settings_come_from_the_environment(monkeypatch):
+    monkeypatch.setattr(sys, "argv", ["run.py"])
+    monkeypatch.setenv("APP_ENV", "production")
+    monkeypatch.setenv("WEB_CONCURRENCY", "5")
+    monkeypatch.setenv("MAX_REQUESTS", "0")
+    args = run._parse_args()
+    assert args.prod and args.workers == 5 and args.max_requests == 0
+    monkeypatch.setenv("APP_ENV", "development")
+    monkeypatch.setattr(sys, "argv", ["run.py", "--workers", "2"])
+    args = run._parse_args()
+    assert not args.prod and args.workers == 2
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="pre-fork supervisor needs os.fork")
+def test_supervisor_recycles_workers_and_drains_on_sigterm():
+    port = _free_port()
+    server = subprocess.Popen(
+        [sys.executable, "run.py", "--prod", "--host", "127.0.0.1", "--port", str(port), "--workers", "2",
+         "--max-requests", "1", "--max-requests-jitter", "0", "--graceful-timeout", "5", "--log-level", "warning"],
+        cwd=BACKEND_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        # Every worker exits after one request; the supervisor keeps replacing them
+        assert [_get(f"http://127.0.0.1:{port}/health") for _ in range(6)] == [200] * 6
+        server.send_signal(signal.SIGTERM)
+        assert server.wait(timeout=20) == 0
+    finally:
+        if server.poll() is None:
+            server.kill()
+            server.wait()
@@ -0,0 +1,101 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.services.scheduler import BACKGROUND, INTERACTIVE, PriorityClass, PriorityScheduler, SchedulerOverloaded
+
+
+def _scheduler(max_queue: int = 10, max_total_queue: int = 100) -> PriorityScheduler:
+    return PriorityScheduler(
+        classes={
+            INTERACTIVE: PriorityClass(0, 1, max_queue),
+            BACKGROUND: PriorityClass(1, 1, max_queue),
+        },
+        max_total_queue=max_total_queue,
+    )
+
+
+def _job(log, name, gate=None):
+    async def job():
+        log.append(name)
+        if gate is not None:
+            await gate.wait()
+        return name
+    return job
+
+
+def test_full_queue_sheds_with_429_and_total_limit_with_503():
+    scheduler = _scheduler(max_queue=1, max_total_queue=2)
+
+    async def run():
+        gate, log = asyncio.Event(), []
+        running = [asyncio.ensure_future(scheduler.run(p, _job(log, p, gate))) for p in (INTERACTIVE, BACKGROUND)]
+        queued = [asyncio.ensure_future(scheduler.run(p, _job(log, p, gate))) for p in (INTERACTIVE, BACKGROUND)]
+        await asyncio.sleep(0.01)
+        with pytest.raises(SchedulerOverloaded) as per_class:
+            await scheduler.run(INTERACTIVE, _job(log, "shed"))
+        scheduler.classes[INTERACTIVE] = PriorityClass(0, 1, 5)
+        with pytest.raises(SchedulerOverloaded) as total:
+            await scheduler.run(INTERACTIVE, _job(log, "shed"))
+        gate.set()
+        await asyncio.gather(*running, *queued)
+        return per_class.value, total.value, scheduler.snapshot()
+
+    per_class, total, snapshot = asyncio.run(run())
+    assert per_class.status_code == 429 and per_class.headers["Retry-After"] == "1"
+    assert total.status_code == 503
+    assert snapshot[INTERACTIVE]["rejected"] == 2
+    assert snapshot[INTERACTIVE]["completed"] == 2 and snapshot[INTERACTIVE]["queued"] == 0
+
+
+def test_background_waits_while_interactive_work_is_queued():
+    scheduler = _scheduler()
+
+    async def run():
+        log = []
+        first_gate, second_gate = asyncio.Event(), asyncio.Event()
+        first = asyncio.ensure_future(scheduler.run(INTERACTIVE, _job(log, "interactive 1", first_gate)))
+        await asyncio.sleep(0)
+        second = asyncio.ensure_future(scheduler.run(INTERACTIVE, _job(log, "interactive 2", second_gate)))
+        background = asyncio.ensure_future(scheduler.run(BACKGROUND, _job(log, "background")))
+        await asyncio.sleep(0.01)
+        blocked = list(log)
+        first_gate.set()
+        await asyncio.sleep(0.01)
+        second_gate.set()
+        await asyncio.gather(first, second, background)
+        return blocked, log
+
+    blocked, log = asyncio.run(run())
+    # Its own slot is free, but an interactive job is waiting
+    assert blocked == ["interactive 1"]
+    assert log == ["interactive 1", "interactive 2", "background"]
+
+
+def test_jobs_start_in_arrival_order_and_cancelled_waiters_leave_the_queue():
+    scheduler = _scheduler()
+
+    async def run():
+        log, gate = [], asyncio.Event()
+        head = asyncio.ensure_future(scheduler.run(INTERACTIVE, _job(log, 0, gate)))
+        await asyncio.sleep(0)
+        waiters = [asyncio.ensure_future(scheduler.run(INTERACTIVE, _job(log, n))) for n in range(1, 5)]
+        await asyncio.sleep(0)
+        waiters[1].cancel()
+        gate.set()
+        await asyncio.gather(head, *waiters, return_exceptions=True)
+        return log, scheduler.snapshot()[INTERACTIVE]
+
+    log, snapshot = asyncio.run(run())
+    assert log == [0, 1, 3, 4]
+    assert (snapshot["queued"], snapshot["running"]) == (0, 0)
+
+
+def test_sync_jobs_run_on_the_class_thread_pool():
+    scheduler = _scheduler()
+    try:
+        name = asyncio.run(scheduler.run(BACKGROUND, lambda: threading.current_thread().name))
+    finally:
+        scheduler.shutdown()
+    assert name.startswith(f"scheduler-{BACKGROUND}")
@@ -0,0 +1,79 @@
+import asyncio
+import os
+
+from app.repositories import close_storage, init_storage, repositories
+from app.services.similarity_service import RECORD, SimilarityService, UserVectorIndex, embed
+
+GARDEN = "Tomatoes and peppers need full sun, rich compost and steady watering in the vegetable garden."
+GARDEN_TOO = "Water the vegetable garden steadily; peppers and tomatoes like compost and full sun."
+TAXES = "File quarterly tax returns and keep receipts for every deductible business expense."
+
+
+def _with_storage(test):
+    async def run():
+        await init_storage("memory")
+        try:
+            return await test()
+        finally:
+            await close_storage()
+    return asyncio.run(run())
+
+
+def _records(service: SimilarityService, user_id: str) -> int:
+    return os.path.getsize(service._index(user_id).path) // RECORD.itemsize
+
+
+def test_similar_ranks_related_documents_first(tmp_path):
+    service = SimilarityService(str(tmp_path))
+
+    async def test():
+        ids = {}
+        for name, content in (("garden", GARDEN), ("garden_too", GARDEN_TOO), ("taxes", TAXES)):
+            ids[name] = await repositories.documents.insert({"user_id": "u", "title": name, "content": content, "version": 1})
+        await repositories.documents.insert({"user_id": "other", "title": "x", "content": GARDEN, "version": 1})
+        return ids, await service.similar("u", ids["garden"], GARDEN)
+
+    ids, matches = _with_storage(test)
+    assert [doc_id for doc_id, _ in matches][0] == ids["garden_too"]
+    assert ids["garden"] not in dict(matches)
+    assert set(dict(matches)) <= {ids["garden_too"], ids["taxes"]}
+
+
+def test_unchanged_saves_do_not_append(tmp_path):
+    service = SimilarityService(str(tmp_path))
+
+    async def test():
+        for _ in range(3):
+            await service.add_document("u", "a" * 24, GARDEN)
+        # Another process has no digests; the stored vector still shows nothing changed
+        other = SimilarityService(str(tmp_path))
+        await other.add_document("u", "a" * 24, GARDEN)
+        return _records(service, "u")
+
+    assert asyncio.run(test()) == 1
+
+
+def test_repeated_edits_keep_the_file_bounded(tmp_path):
+    service = SimilarityService(str(tmp_path))
+    doc_id = "b" * 24
+    reader = UserVectorIndex(service._index("u").path)  # another worker's view of the same file
+
+    async def test():
+        await service.add_document("u", "c" * 24, TAXES)
+        service._index("u").mark_backfilled()
+        sizes, top = [], []
+        for n in range(100):
+            content = f"{GARDEN} Revision {n}."
+            await service.add_document("u", doc_id, content)
+            sizes.append(_records(service, "u"))
+            top.append(reader.query(embed(content), 1)[0])
+        return sizes, top
+
+    sizes, top = asyncio.run(test())
+    # Two live records plus fewer stale ones than the compaction threshold
+    assert max(sizes) <= UserVectorIndex.COMPACT_MIN_RECORDS
+    assert min(sizes) == 2
+    # The reader follows each rewrite and always sees the latest record
+    assert all(match == doc_id and abs(score - 1.0) < 1e-5 for match, score in top)
+    # Compaction asks the next query to backfill whatever a racing append lost
+    assert not service._index("u").backfilled()
@@ -0,0 +1,47 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from app.config import settings
+from app.services import nlp_resources, text_segmentation
+from app.services.ai_service import AIService
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_importing_the_app_loads_neither_nltk_nor_groq():
+    script = "import sys, app.main; print(sorted({'nltk', 'groq'} & set(sys.modules)))"
+    result = subprocess.run([sys.executable, "-c", script], cwd=BACKEND_DIR, capture_output=True, text=True,
+                            env={**os.environ, "GROQ_API_KEY": "test-key"}, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "[]"
+
+
+def test_groq_client_is_created_once_on_first_use(monkeypatch):
+    created = []
+    monkeypatch.setattr(AIService, "_create_groq_client", lambda self: created.append(1) or "client")
+    service = AIService()
+    assert created == []
+    assert service.groq_client == "client" and service.groq_client == "client"
+    assert created == [1]
+
+
+def test_no_client_without_an_api_key(monkeypatch):
+    monkeypatch.setattr(settings, "groq_api_key", "")
+    assert AIService().groq_client is None
+
+
+def test_preflight_reports_missing_resources(monkeypatch):
+    monkeypatch.setattr(nlp_resources, "REQUIRED_RESOURCES", {"not_a_package": "tokenizers/not_a_package/"})
+    assert nlp_resources.preflight(strict=False) == ["not_a_package"]
+    with pytest.raises(RuntimeError, match="python -m app.services.nlp_resources"):
+        nlp_resources.preflight(strict=True)
+
+
+def test_sentence_splitting_falls_back_to_regex_without_punkt(monkeypatch):
+    monkeypatch.setattr(text_segmentation, "_punkt", lambda language: None)
+    text = "One sentence here. Another one!  And a third?"
+    spans = text_segmentation.sentence_spans(text)
+    assert [text[start:end] for start, end in spans] == ["One sentence here.", "Another one!", "And a third?"]
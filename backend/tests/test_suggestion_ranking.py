@@ -0,0 +1,59 @@
+import asyncio
+from collections import Counter
+
+import pytest
+
+from app.repositories import close_storage, init_storage
+from app.services import ai_service as ai_module
+from app.services.ai_service import MAX_SUGGESTIONS, RULE_GROUP_LIMITS, RuleMatch, ai_service
+from app.services.feedback_service import FeedbackService
+from app.services.languages import get_pack
+
+CONTENT = " ".join(
+    ["Their plan was very good and a lot of thing was done."] * 12
+    + ["The draft was reviewed by the team, and the budget was approved."] * 6
+)
+
+
+def _suggest(monkeypatch, feedback=None):
+    monkeypatch.setattr(ai_module, "feedback_service", feedback or FeedbackService())
+    monkeypatch.setattr(ai_service, "_groq_client", None)
+    monkeypatch.setattr(ai_service, "_groq_initialized", True)
+
+    async def run():
+        await init_storage("memory")
+        try:
+            return await ai_service.generate_suggestions(CONTENT, "d", "u", language="en")
+        finally:
+            await close_storage()
+    return asyncio.run(run())
+
+
+def test_rule_matches_are_slotted():
+    match = RuleMatch("grammar.x", "grammar", 0, 3, None, "why", "warning", 75.0)
+    assert not hasattr(match, "__dict__")
+    with pytest.raises(AttributeError):
+        match.extra = 1
+
+
+def test_checkers_return_matches_with_offsets_into_the_content():
+    pack = get_pack("en")
+    matches = ai_service._check_vocabulary(CONTENT, pack) + ai_service._check_grammar(CONTENT, pack)
+    assert matches and all(isinstance(match, RuleMatch) for match in matches)
+    for match in matches:
+        found = CONTENT[match.start:match.end].lower()
+        assert found in ("very good", "a lot of", "thing", "their")
+
+
+def test_only_capped_survivors_become_suggestions(monkeypatch):
+    suggestions = _suggest(monkeypatch)
+    per_group = Counter(s.rule_id.split(".", 1)[0] for s in suggestions)
+    assert len(suggestions) == MAX_SUGGESTIONS
+    assert all(per_group[group] <= limit for group, limit in RULE_GROUP_LIMITS.items())
+    assert len({s.created_at for s in suggestions}) == 1
+    confidences = [s.confidence for s in suggestions]
+    assert confidences == sorted(confidences, reverse=True)
+    for s in suggestions:
+        if s.type != "clarity":
+            assert s.text == CONTENT[s.position.start:s.position.end]
+        assert s.id == f"{s.rule_id}_{s.position.start}"
@@ -0,0 +1,40 @@
+import numpy as np
+
+from app.services.tone_analyzer import DIMENSIONS, ToneAnalyzer
+
+FORMAL = "Therefore, the committee shall review the proposal. Furthermore, the results indicate significant progress."
+CASUAL = "Hey, yeah we're gonna grab some stuff. Thanks, cheers!"
+HEDGING = "Maybe we might possibly try it, perhaps. I guess it probably seems okay."
+
+
+def test_lexicon_hits_move_the_expected_dimensions():
+    analyzer = ToneAnalyzer()
+    formal, casual, hedging = (analyzer.analyze(text) for text in (FORMAL, CASUAL, HEDGING))
+    assert formal.formal > 0 and casual.formal == 0
+    assert formal.analytical > casual.analytical
+    assert casual.friendly > formal.friendly
+    assert hedging.confident == 0 and hedging.assertive == 0
+    assert all(0 <= getattr(formal, dimension) <= 100 for dimension in DIMENSIONS)
+
+
+def test_punctuation_case_and_curly_apostrophes_are_normalized():
+    analyzer = ToneAnalyzer()
+    assert analyzer.analyze("THEREFORE, thus.") == analyzer.analyze("therefore thus")
+    assert analyzer.analyze("Let’s go") == analyzer.analyze("let's go")
+
+
+def test_scores_are_per_word_density():
+    analyzer = ToneAnalyzer()
+    short = analyzer.analyze("Thanks for the help.")
+    padded = analyzer.analyze("Thanks for the help. " + "The report covers the quarter in detail. " * 5)
+    assert short.friendly > padded.friendly > 0
+
+
+def test_batch_scores_match_single_scores():
+    analyzer = ToneAnalyzer()
+    texts = [FORMAL, CASUAL, HEDGING, ""]
+    batch = analyzer.score_batch(texts)
+    single = np.array([[getattr(analyzer.analyze(text), d) for d in DIMENSIONS] for text in texts])
+    assert batch.shape == (4, len(DIMENSIONS))
+    np.testing.assert_allclose(batch, single)
+    assert not batch[3].any()
@@ -250,10 +250,10 @@ class APIClient {
     });
   }
 
-  async checkPlagiarism(content: string): Promise<any> {
+  async checkPlagiarism(content: string, documentId?: string): Promise<any> {
     return this.request('/ai/plagiarism-check', {
       method: 'POST',
-      body: JSON.stringify({ content }),
+      body: JSON.stringify({ content, document_id: documentId }),
     });
   }
 